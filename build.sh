@@ -1,4 +1,24 @@
 #!/bin/bash
 
 mkdir -p website/data
-cp output/schedule.json website/data/schedule.json
\ No newline at end of file
+cp output/schedule.json website/data/schedule.json
+if [ -d output/data ]; then
+    cp -r output/data/. website/data/
+fi
+# Departure tables and routes.json for the page, so the browser does no
+# schedule processing. static_site.py needs the generator's dependencies
+# (protobuf), so it runs in the Pipenv environment from
+# src/json-schedule-generator/Pipfile when there is one ("pipenv install"
+# there first), or else with a python3 that has them installed.
+cd src/json-schedule-generator || exit 1
+if command -v pipenv >/dev/null && pipenv --venv >/dev/null 2>&1; then
+    PYTHON=(pipenv run python)
+else
+    PYTHON=(python3)
+fi
+if ! "${PYTHON[@]}" -c "import google.protobuf" 2>/dev/null; then
+    echo "build.sh: protobuf is missing; run \"pipenv install\" in" \
+        "src/json-schedule-generator first" >&2
+    exit 1
+fi
+"${PYTHON[@]}" static_site.py --output ../../website/data
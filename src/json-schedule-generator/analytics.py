@@ -0,0 +1,268 @@
+import argparse
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Offline analysis only, so numpy is a dev dependency (pipenv install --dev)
+# and nothing the nightly generator imports depends on this module.
+import numpy as np
+
+from conversions import minutes_to_time
+from metrics import configure_logging
+from timetable import (
+    DIRECTIONS,
+    SCHEDULES_HELP,
+    SCHEDULES_PATH,
+    Timetable,
+    load_timetables,
+)
+
+GAP_MINUTES = 60
+HOURS = 24
+
+
+class RouteArrays:
+    # Every departure of every (timetable, location, direction) route in one
+    # sorted uint16 array of minutes; route i owns
+    # minutes[offsets[i]:offsets[i + 1]]. Route metadata sits in parallel
+    # arrays, so each metric is a handful of NumPy passes over all
+    # timetables at once instead of a Python loop per route.
+    def __init__(self, timetables: Iterable[Timetable]) -> None:
+        self.timetables = list(timetables)
+        self.locations: List[str] = []
+        location_ids: Dict[str, int] = {}
+        route_timetable = []
+        route_location = []
+        route_direction = []
+        chunks = []
+        for timetable_id, timetable in enumerate(self.timetables):
+            for location, departures in timetable.locations.items():
+                if location not in location_ids:
+                    location_ids[location] = len(self.locations)
+                    self.locations.append(location)
+                for direction_id, direction in enumerate(DIRECTIONS):
+                    route_timetable.append(timetable_id)
+                    route_location.append(location_ids[location])
+                    route_direction.append(direction_id)
+                    chunks.append(
+                        np.frombuffer(departures.direction(direction), dtype=np.uint16)
+                    )
+        self.route_timetable = np.array(route_timetable, dtype=np.int32)
+        self.route_location = np.array(route_location, dtype=np.int32)
+        self.route_direction = np.array(route_direction, dtype=np.int8)
+        counts = np.fromiter((len(chunk) for chunk in chunks), np.int64, len(chunks))
+        self.offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        minutes = np.concatenate(chunks) if chunks else np.zeros(0, np.uint16)
+        self.route_ids = np.repeat(np.arange(len(chunks), dtype=np.int64), counts)
+        # Departures are sorted on the page, but the metrics rely on it, so
+        # sort by (route, minute) in one pass rather than trust the input.
+        self.minutes = minutes[np.argsort((self.route_ids << 16) | minutes)]
+
+    @property
+    def routes(self) -> int:
+        return len(self.route_timetable)
+
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def first_last(self) -> Tuple[np.ndarray, np.ndarray]:
+        # -1 for routes without departures.
+        counts = self.counts()
+        first = np.full(self.routes, -1, dtype=np.int32)
+        last = np.full(self.routes, -1, dtype=np.int32)
+        served = counts > 0
+        first[served] = self.minutes[self.offsets[:-1][served]]
+        last[served] = self.minutes[self.offsets[1:][served] - 1]
+        return first, last
+
+    def headways(self) -> Tuple[np.ndarray, np.ndarray]:
+        # (route, minutes until the next departure) for consecutive
+        # departures of the same route.
+        headways = np.diff(self.minutes.astype(np.int32))
+        same_route = self.route_ids[1:] == self.route_ids[:-1]
+        return self.route_ids[1:][same_route], headways[same_route]
+
+    def headway_stats(self) -> Dict[str, np.ndarray]:
+        # Per-route min, median and max headway; NaN where a route has fewer
+        # than two departures.
+        routes, headways = self.headways()
+        order = np.lexsort((headways, routes))
+        ordered = headways[order].astype(np.float64)
+        counts = np.bincount(routes, minlength=self.routes)
+        starts = np.zeros(self.routes, dtype=np.int64)
+        np.cumsum(counts[:-1], out=starts[1:])
+        stats = {
+            name: np.full(self.routes, np.nan) for name in ("min", "median", "max")
+        }
+        some = counts > 0
+        starts, counts = starts[some], counts[some]
+        stats["min"][some] = ordered[starts]
+        stats["max"][some] = ordered[starts + counts - 1]
+        stats["median"][some] = (
+            ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]
+        ) / 2
+        return stats
+
+    def headway_histogram(self, edges: List[int]) -> np.ndarray:
+        # (routes, len(edges) - 1) counts of headways in [edges[i], edges[i + 1]).
+        routes, headways = self.headways()
+        bins = len(edges) - 1
+        bucket = np.searchsorted(edges, headways, side="right") - 1
+        inside = (bucket >= 0) & (bucket < bins)
+        return np.bincount(
+            routes[inside] * bins + bucket[inside], minlength=self.routes * bins
+        ).reshape(self.routes, bins)
+
+    def gaps(self, minimum: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (route, departure before the gap, gap length) for every headway
+        # longer than minimum.
+        headways = np.diff(self.minutes.astype(np.int32))
+        gap = (self.route_ids[1:] == self.route_ids[:-1]) & (headways > minimum)
+        return self.route_ids[1:][gap], self.minutes[:-1][gap], headways[gap]
+
+    def sailings_per_hour(self) -> np.ndarray:
+        # (routes, 24) departures by hour of day; sailings after midnight
+        # count in the early hours.
+        hours = self.minutes // 60 % HOURS
+        return np.bincount(
+            self.route_ids * HOURS + hours, minlength=self.routes * HOURS
+        ).reshape(self.routes, HOURS)
+
+    def pairings(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Pairs every city departure with the next island departure from the
+        # same dock in the same timetable, i.e. the boat's earliest return.
+        # Returns (city route, city minute, minutes until the return), with
+        # -1 for departures that have no return the same day.
+        dock = (
+            self.route_timetable.astype(np.int64) * max(len(self.locations), 1)
+            + self.route_location
+        )
+        departure_dock = dock[self.route_ids]
+        keys = (departure_dock << 16) | self.minutes
+        city = self.route_direction[self.route_ids] == 0
+        city_keys = keys[city]
+        island_keys = np.sort(keys[~city])
+        found = np.searchsorted(island_keys, city_keys)
+        returns = np.full(len(city_keys), -1, dtype=np.int32)
+        if len(island_keys):
+            candidate = island_keys[np.minimum(found, len(island_keys) - 1)]
+            paired = (found < len(island_keys)) & (
+                (candidate >> 16) == (city_keys >> 16)
+            )
+            returns[paired] = (candidate[paired] - city_keys[paired]).astype(np.int32)
+        return self.route_ids[city], self.minutes[city], returns
+
+    def report(self, *, gap_minutes: int = GAP_MINUTES) -> List[dict]:
+        counts = self.counts()
+        first, last = self.first_last()
+        stats = self.headway_stats()
+        gap_routes, _, _ = self.gaps(gap_minutes)
+        gaps = np.bincount(gap_routes, minlength=self.routes)
+        busiest = self.sailings_per_hour().max(axis=1)
+        pair_routes, _, returns = self.pairings()
+        paired = returns >= 0
+        unpaired = np.bincount(pair_routes[~paired], minlength=self.routes)
+        turnaround = np.full(self.routes, np.nan)
+        paired_counts = np.bincount(pair_routes[paired], minlength=self.routes)
+        np.divide(
+            np.bincount(
+                pair_routes[paired], weights=returns[paired], minlength=self.routes
+            ),
+            paired_counts,
+            out=turnaround,
+            where=paired_counts > 0,
+        )
+        rows = []
+        for route in range(self.routes):
+            timetable = self.timetables[self.route_timetable[route]]
+            city = self.route_direction[route] == 0
+            rows.append(
+                {
+                    "schedule": timetable.name,
+                    "start": timetable.start.isoformat() if timetable.start else None,
+                    "location": self.locations[self.route_location[route]],
+                    "direction": DIRECTIONS[self.route_direction[route]],
+                    "sailings": int(counts[route]),
+                    "first": optional_time(first[route]),
+                    "last": optional_time(last[route]),
+                    "minHeadway": optional_minutes(stats["min"][route]),
+                    "medianHeadway": optional_minutes(stats["median"][route]),
+                    "maxHeadway": optional_minutes(stats["max"][route]),
+                    "gaps": int(gaps[route]),
+                    "peakPerHour": int(busiest[route]),
+                    "meanReturn": (
+                        optional_minutes(turnaround[route]) if city else None
+                    ),
+                    "unpaired": int(unpaired[route]) if city else None,
+                }
+            )
+        return rows
+
+
+def optional_time(minutes: int) -> Optional[str]:
+    return minutes_to_time(int(minutes)) if minutes >= 0 else None
+
+
+def optional_minutes(minutes: float) -> Optional[float]:
+    return None if np.isnan(minutes) else round(float(minutes), 1)
+
+
+def print_report(rows: List[dict], *, gap_minutes: int) -> None:
+    print(
+        f"{'schedule':<8} {'start':<10} {'location':<16} {'direction':<13} "
+        f"{'sailings':>8} {'first':>5} {'last':>5} {'median':>6} {'max':>5} "
+        f"{f'>{gap_minutes}m':>5} {'peak/h':>6} {'return':>6} {'unpaired':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['schedule']:<8} {row['start'] or '':<10} {row['location']:<16} "
+            f"{row['direction']:<13} {row['sailings']:>8} {row['first'] or '-':>5} "
+            f"{row['last'] or '-':>5} {format_optional(row['medianHeadway']):>6} "
+            f"{format_optional(row['maxHeadway']):>5} {row['gaps']:>5} "
+            f"{row['peakPerHour']:>6} {format_optional(row['meanReturn']):>6} "
+            f"{format_optional(row['unpaired']):>8}"
+        )
+
+
+def format_optional(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Report headways, gaps, sailings per hour and returns per route"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--schedules",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    source.add_argument(
+        "--archive", help="report on every timetable in a schedule archive"
+    )
+    parser.add_argument(
+        "--gap-minutes",
+        type=int,
+        default=GAP_MINUTES,
+        help="count headways longer than this as gaps",
+    )
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    if args.archive:
+        from schedule_archive import ScheduleArchive
+
+        with ScheduleArchive(path=args.archive) as archive:
+            timetables = archive.timetables()
+    else:
+        timetables = load_timetables(path=args.schedules)
+    rows = RouteArrays(timetables).report(gap_minutes=args.gap_minutes)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=4))
+    else:
+        print_report(rows, gap_minutes=args.gap_minutes)
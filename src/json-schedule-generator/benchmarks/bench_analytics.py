@@ -0,0 +1,149 @@
+import argparse
+import logging
+import random
+import statistics
+import time
+from array import array
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from analytics import HOURS, RouteArrays
+from benchmarks.bench_archive import synthetic_year
+from timetable import DIRECTIONS, Timetable
+
+EDGES = [0, 10, 15, 20, 30, 45, 60, 90, 120, 24 * 60]
+
+
+def naive_routes(timetables: List[Timetable]) -> List[Tuple[int, str, str, list]]:
+    return [
+        (timetable_id, location, direction, sorted(departures.direction(direction)))
+        for timetable_id, timetable in enumerate(timetables)
+        for location, departures in timetable.locations.items()
+        for direction in DIRECTIONS
+    ]
+
+
+def naive_report(timetables: List[Timetable], gap_minutes: int) -> dict:
+    # The straightforward per-route loops the vectorized version replaces.
+    first, last, medians, maxima, gaps, histograms, hourly = [], [], [], [], [], [], []
+    returns = []
+    routes = naive_routes(timetables)
+    for route, (timetable_id, location, direction, minutes) in enumerate(routes):
+        first.append(minutes[0] if minutes else -1)
+        last.append(minutes[-1] if minutes else -1)
+        headways = [b - a for a, b in zip(minutes, minutes[1:])]
+        medians.append(statistics.median(headways) if headways else float("nan"))
+        maxima.append(max(headways) if headways else float("nan"))
+        for departs, headway in zip(minutes, headways):
+            if headway > gap_minutes:
+                gaps.append((route, departs, headway))
+        histogram = [0] * (len(EDGES) - 1)
+        for headway in headways:
+            for bucket in range(len(EDGES) - 1):
+                if EDGES[bucket] <= headway < EDGES[bucket + 1]:
+                    histogram[bucket] += 1
+        histograms.append(histogram)
+        hours = [0] * HOURS
+        for departs in minutes:
+            hours[departs // 60] += 1
+        hourly.append(hours)
+        if direction == "departsCity":
+            island = timetables[timetable_id].locations[location].departs_island
+            for departs in minutes:
+                later = [back for back in island if back >= departs]
+                returns.append(min(later) - departs if later else -1)
+    return {
+        "first": first,
+        "last": last,
+        "median": medians,
+        "max": maxima,
+        "gaps": gaps,
+        "histogram": histograms,
+        "hourly": hourly,
+        "returns": returns,
+    }
+
+
+def vectorized_report(arrays: RouteArrays, gap_minutes: int) -> dict:
+    first, last = arrays.first_last()
+    stats = arrays.headway_stats()
+    gap_routes, gap_departs, gap_lengths = arrays.gaps(gap_minutes)
+    return {
+        "first": first.tolist(),
+        "last": last.tolist(),
+        "median": stats["median"].tolist(),
+        "max": stats["max"].tolist(),
+        "gaps": list(
+            zip(gap_routes.tolist(), gap_departs.tolist(), gap_lengths.tolist())
+        ),
+        "histogram": arrays.headway_histogram(EDGES).tolist(),
+        "hourly": arrays.sailings_per_hour().tolist(),
+        "returns": arrays.pairings()[2].tolist(),
+    }
+
+
+def best_of(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def assert_same(naive: Dict[str, list], vectorized: Dict[str, list]) -> None:
+    for name, expected in naive.items():
+        actual = vectorized[name]
+        if name in ("median", "max"):
+            assert np.allclose(expected, actual, equal_nan=True), name
+        else:
+            assert expected == actual, name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare vectorized timetable analytics with per-route loops"
+    )
+    parser.add_argument("--years", type=int, default=250)
+    parser.add_argument("--gap-minutes", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    timetables = [
+        Timetable.from_proto(schedule)
+        for year in range(args.years)
+        for schedule in synthetic_year(2000 + year, rng).schedules
+    ]
+    # A dock without island departures exercises empty routes and unpaired
+    # city departures.
+    timetables[0].locations["Centre Island"].departs_island = array("H")
+    arrays = RouteArrays(timetables)
+    departures = len(arrays.minutes)
+
+    naive = naive_report(timetables, args.gap_minutes)
+    assert_same(naive, vectorized_report(arrays, args.gap_minutes))
+
+    load = best_of(lambda: RouteArrays(timetables), args.repeat)
+    naive_seconds = best_of(
+        lambda: naive_report(timetables, args.gap_minutes), args.repeat
+    )
+    vectorized_seconds = best_of(
+        lambda: vectorized_report(arrays, args.gap_minutes), args.repeat
+    )
+    print(f"timetables:         {len(timetables)}")
+    print(f"routes:             {arrays.routes}")
+    print(f"departures:         {departures}")
+    print(f"load arrays:        {load * 1000:.1f} ms")
+    print(f"naive loops:        {naive_seconds * 1000:.1f} ms")
+    print(f"vectorized:         {vectorized_seconds * 1000:.1f} ms")
+    print(
+        f"speedup:            {naive_seconds / (load + vectorized_seconds):.1f}x "
+        f"including load, {naive_seconds / vectorized_seconds:.1f}x excluding"
+    )
+
+
+if __name__ == "__main__":
+    main()
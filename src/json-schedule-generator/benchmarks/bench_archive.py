@@ -0,0 +1,115 @@
+import argparse
+import datetime
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import List, Tuple
+
+from conversions import datetime_date_to_date
+from json_schedule_generator import JsonScheduleGenerator
+from models.proto.schedules_pb2 import ScheduleTimetable, Timetables
+from schedule_archive import ScheduleArchive
+
+SEASON_STARTS = [
+    ("Spring", 4, 11),
+    ("Summer", 5, 16),
+    ("Fall", 9, 2),
+    ("Winter", 10, 15),
+]
+
+
+def synthetic_year(year: int, rng: random.Random) -> Timetables:
+    schedules = []
+    for name, month, day in SEASON_STARTS:
+        schedule = ScheduleTimetable()
+        schedule.name = name
+        schedule.start.CopyFrom(
+            datetime_date_to_date(
+                datetime.date(year, month, day)
+                + datetime.timedelta(days=rng.randint(-3, 3))
+            )
+        )
+        for location in ["Ward’s Island", "Centre Island", "Hanlan’s Point"]:
+            first = rng.choice([390, 405, 420, 480])
+            headway = rng.choice([15, 30, 45])
+            city = list(range(first, 23 * 60, headway))
+            schedule.locations[location].departsCity.extend(city)
+            schedule.locations[location].departsIsland.extend(
+                minute + 15 for minute in city
+            )
+        schedules.append(schedule)
+    JsonScheduleGenerator._populate_end_dates(schedules=schedules)
+    timetables = Timetables()
+    timetables.schedules.extend(schedules)
+    return timetables
+
+
+def expected_in_effect(
+    seasons: List[Tuple[datetime.date, str]], date: datetime.date
+) -> str:
+    candidates = [name for start, name in seasons if start <= date]
+    return candidates[-1] if candidates else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time archive appends and queries")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--snapshots-per-year", type=int, default=365)
+    parser.add_argument("--queries", type=int, default=100_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    first_year = 2010
+    years = [synthetic_year(first_year + i, rng) for i in range(args.years)]
+    seasons = sorted(
+        (datetime.date(s.start.year, s.start.month, s.start.day), s.name)
+        for year in years
+        for s in year.schedules
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "archive.sqlite3")
+        with ScheduleArchive(path=path) as archive:
+            started = time.perf_counter()
+            for i, timetables in enumerate(years):
+                captured = datetime.datetime(first_year + i, 1, 1)
+                for night in range(args.snapshots_per_year):
+                    archive.append(
+                        timetables,
+                        captured_at=captured + datetime.timedelta(days=night),
+                    )
+            append_seconds = time.perf_counter() - started
+            snapshots = archive.snapshot_count()
+
+            dates = [
+                datetime.date(first_year, 1, 1)
+                + datetime.timedelta(days=rng.randrange(args.years * 365))
+                for _ in range(args.queries)
+            ]
+            for date in dates[:1000]:
+                timetable = archive.in_effect(date)
+                expected = expected_in_effect(seasons, date)
+                actual = timetable.name if timetable is not None else None
+                assert expected == actual, f"{date}: {actual} != {expected}"
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            for date in dates:
+                archive.in_effect(date)
+            query_seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        size = os.path.getsize(path)
+
+    print(f"snapshots:          {snapshots}")
+    print(f"archive size:       {size / 1024:.0f} KiB")
+    print(f"appends/sec:        {snapshots / append_seconds:.0f}")
+    print(f"queries/sec:        {args.queries / query_seconds:.0f}")
+    print(f"query peak memory:  {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
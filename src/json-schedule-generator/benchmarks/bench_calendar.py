@@ -0,0 +1,148 @@
+import argparse
+import datetime
+import logging
+import random
+import time
+import tracemalloc
+from typing import List, Optional, Tuple
+
+from benchmarks.bench_archive import synthetic_year
+from conversions import datetime_date_to_date, minutes_to_time, optional_date
+from models.proto.schedules_pb2 import ServiceException
+from service_calendar import ServiceCalendarIndex, apply_exceptions
+from timetable import Timetable
+
+LOCATIONS = ["Ward’s Island", "Centre Island", "Hanlan’s Point"]
+
+
+def synthetic_exceptions(
+    years: range, per_year: int, rng: random.Random
+) -> List[ServiceException]:
+    exceptions = []
+    for year in years:
+        for number in range(per_year):
+            start = datetime.date(year, 1, 1) + datetime.timedelta(
+                days=rng.randrange(365)
+            )
+            exception = ServiceException()
+            exception.name = f"Event {year}-{number}"
+            exception.start.CopyFrom(datetime_date_to_date(start))
+            if rng.random() < 0.3:
+                exception.end.CopyFrom(
+                    datetime_date_to_date(
+                        start + datetime.timedelta(days=rng.randint(1, 4))
+                    )
+                )
+            override = exception.overrides.add()
+            override.location = rng.choice(LOCATIONS)
+            if rng.random() < 0.5:
+                first = rng.randrange(16, 21) * 60
+                override.startTime = minutes_to_time(first)
+                override.endTime = minutes_to_time(first + 180)
+                override.departures.departsCity.extend(
+                    minutes_to_time(minute) for minute in range(first, first + 180, 10)
+                )
+            exceptions.append(exception)
+    return exceptions
+
+
+def naive_effective(
+    timetables: List[Timetable],
+    exceptions: List[ServiceException],
+    date: datetime.date,
+) -> Optional[Tuple[Timetable, Tuple[str, ...]]]:
+    # Scan every season and every exception for each date.
+    season = None
+    for timetable in timetables:
+        if timetable.start <= date and (timetable.end is None or date <= timetable.end):
+            if season is None or timetable.start >= season.start:
+                season = timetable
+    if season is None:
+        return None
+    covering = [
+        exception
+        for exception in exceptions
+        if optional_date(exception.start)
+        <= date
+        <= (optional_date(exception.end) or optional_date(exception.start))
+    ]
+    return (
+        apply_exceptions(season, covering) if covering else season,
+        tuple(exception.name for exception in covering),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time service calendar lookups and year expansion"
+    )
+    parser.add_argument("--years", type=int, default=50)
+    parser.add_argument("--exceptions-per-year", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=100_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    years = range(2000, 2000 + args.years)
+    timetables = [
+        Timetable.from_proto(schedule)
+        for year in years
+        for schedule in synthetic_year(year, rng).schedules
+    ]
+    exceptions = synthetic_exceptions(years, args.exceptions_per_year, rng)
+    started = time.perf_counter()
+    index = ServiceCalendarIndex(timetables, exceptions)
+    build_seconds = time.perf_counter() - started
+
+    dates = [
+        datetime.date(years[0], 1, 1)
+        + datetime.timedelta(days=rng.randrange(args.years * 365))
+        for _ in range(args.queries)
+    ]
+    for date in dates[:2000]:
+        expected = naive_effective(index.timetables, exceptions, date)
+        service = index.effective(date)
+        if expected is None:
+            assert service is None, date
+            continue
+        assert service.timetable == expected[0], date
+        assert service.exceptions == expected[1], date
+
+    started = time.perf_counter()
+    for date in dates:
+        index.effective(date)
+    query_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for date in dates[:2000]:
+        naive_effective(index.timetables, exceptions, date)
+    naive_seconds = (time.perf_counter() - started) / 2000 * len(dates)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    expanded = [index.expand_year(year) for year in years]
+    expand_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    days = sum(len(year) for year in expanded)
+    distinct = len(
+        {id(service.timetable) for year in expanded for service in year.values()}
+    )
+    for year in expanded[:2]:
+        for date, service in year.items():
+            assert (
+                service.timetable
+                == naive_effective(index.timetables, exceptions, date)[0]
+            ), date
+
+    print(f"seasons:             {len(timetables)}")
+    print(f"exceptions:          {len(exceptions)}")
+    print(f"build:               {build_seconds * 1000:.1f} ms")
+    print(f"lookups/sec:         {len(dates) / query_seconds:.0f}")
+    print(f"naive lookups/sec:   {len(dates) / naive_seconds:.0f}")
+    print(f"expanded days:       {days} in {expand_seconds * 1000:.1f} ms")
+    print(f"distinct timetables: {distinct}")
+    print(f"expansion peak:      {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import gzip
+import logging
+import os
+import random
+import tempfile
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.bench_archive import synthetic_year
+from benchmarks.fixtures import FIXTURES, load_fixture
+from departure_tables import DepartureTables, compact_schedules, expand_schedules
+from json_schedule_generator import OUTPUT_PATH, JsonScheduleGenerator
+from models.proto.schedules_pb2 import Schedules
+from schedule_archive import ScheduleArchive
+from schedule_scraper import ScheduleScraper
+from schedule_writer import ScheduleWriter
+from timetable import Timetable, load_schedules
+
+
+def archived_schedules(archive: ScheduleArchive) -> Schedules:
+    schedules = Schedules()
+    for timetable in archive.timetables():
+        schedules.schedules.add().CopyFrom(timetable.to_schedule())
+    return schedules
+
+
+def synthetic_archive(path: str, years: int) -> None:
+    # Nightly snapshots over several years; each season is re-published a
+    # few times a year with one dock's timetable changed.
+    rng = random.Random(0)
+    with ScheduleArchive(path=path) as archive:
+        for year in range(years):
+            timetables = synthetic_year(2010 + year, rng)
+            for revision in range(3):
+                schedule = rng.choice(timetables.schedules)
+                location = rng.choice(list(schedule.locations))
+                schedule.locations[location].departsCity.append(23 * 60 + revision)
+                archive.append(timetables)
+
+
+def report(name: str, schedules: Schedules) -> Dict[str, int]:
+    compact = compact_schedules(schedules)
+    assert ScheduleWriter.to_json(expand_schedules(compact)) == ScheduleWriter.to_json(
+        schedules
+    ), f"{name} does not expand back to the same schedule.json"
+    json_bytes = ScheduleWriter.to_json(schedules)
+    compact_bytes = ScheduleWriter.to_json(compact, minified=True)
+    return {
+        "lists": sum(len(schedule.locations) * 2 for schedule in schedules.schedules),
+        "tables": len(compact.tables),
+        "json": len(json_bytes),
+        "compact": len(compact_bytes),
+        "json.gz": len(gzip.compress(json_bytes, compresslevel=9, mtime=0)),
+        "compact.gz": len(gzip.compress(compact_bytes, compresslevel=9, mtime=0)),
+    }
+
+
+def interned_memory(timetables: List[Timetable]) -> int:
+    tracemalloc.start()
+    tables = DepartureTables()
+    interned = [tables.intern_timetable(timetable) for timetable in timetables]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del interned
+    return peak
+
+
+def copied_memory(timetables: List[Timetable]) -> int:
+    tracemalloc.start()
+    copies = [timetable.to_proto() for timetable in timetables]
+    copies = [Timetable.from_proto(copy) for copy in copies]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report schedule.compact.json savings on current and archived data"
+    )
+    parser.add_argument(
+        "--archive", help="also report on every timetable in this archive"
+    )
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    datasets = {"output/schedule.json": load_schedules(path=OUTPUT_PATH)}
+    for fixture in FIXTURES:
+        datasets[fixture] = JsonScheduleGenerator.create_schedules(
+            schedules_soup=ScheduleScraper.parse_schedules(body=load_fixture(fixture))
+        )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "archive.sqlite3")
+        synthetic_archive(path, args.years)
+        with ScheduleArchive(path=path) as archive:
+            datasets[f"synthetic archive ({args.years} years)"] = archived_schedules(
+                archive
+            )
+            archived = archive.timetables()
+    if args.archive:
+        with ScheduleArchive(path=args.archive) as archive:
+            datasets[args.archive] = archived_schedules(archive)
+
+    print(
+        f"{'data':<40} {'lists':>6} {'tables':>6} {'json':>9} {'compact':>9} "
+        f"{'saved':>6} {'json.gz':>8} {'cmp.gz':>8} {'saved':>6}"
+    )
+    for name, schedules in datasets.items():
+        row = report(name, schedules)
+        print(
+            f"{name:<40} {row['lists']:>6} {row['tables']:>6} {row['json']:>9} "
+            f"{row['compact']:>9} {1 - row['compact'] / row['json']:>6.0%} "
+            f"{row['json.gz']:>8} {row['compact.gz']:>8} "
+            f"{1 - row['compact.gz'] / row['json.gz']:>6.0%}"
+        )
+    print(
+        f"archived timetables in memory: {copied_memory(archived) / 1024:.0f} KiB "
+        f"as copies, {interned_memory(archived) / 1024:.0f} KiB interned"
+    )
+
+
+if __name__ == "__main__":
+    main()
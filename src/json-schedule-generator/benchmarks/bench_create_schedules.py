@@ -0,0 +1,106 @@
+import argparse
+import logging
+import statistics
+import time
+from typing import Callable
+
+from benchmarks.fixtures import FIXTURES, load_fixture
+from bs4 import BeautifulSoup
+from json_schedule_generator import JsonScheduleGenerator, datetime_date_to_date
+from models.proto.schedules_pb2 import Schedule, Schedules
+from schedule_scraper import ScheduleScraper
+
+
+class LegacyScheduleGenerator:
+    # The create_schedules path before sections were indexed in one pass:
+    # a find(id=...) per season and repeated table/caption lookups.
+    @staticmethod
+    def create_schedules(*, schedules_soup: BeautifulSoup) -> Schedules:
+        schedules_list = []
+        for season in JsonScheduleGenerator.SEASONS:
+            schedule_soup = schedules_soup.find(id=f"accordion-{season}-schedule")
+            if not LegacyScheduleGenerator._is_valid_schedule(
+                schedule_soup=schedule_soup
+            ):
+                continue
+            schedules_list.append(
+                LegacyScheduleGenerator._create_schedule(schedule_soup=schedule_soup)
+            )
+        JsonScheduleGenerator._populate_end_dates(schedules=schedules_list)
+        schedules = Schedules()
+        schedules.schedules.extend(schedules_list)
+        return schedules
+
+    @staticmethod
+    def _is_valid_schedule(*, schedule_soup) -> bool:
+        table_soup = schedule_soup.find("table", class_="cot-table")
+        start = JsonScheduleGenerator._get_start_date(
+            schedule_caption=table_soup.contents[1].contents[0]
+        )
+        return start is not None
+
+    @staticmethod
+    def _create_schedule(*, schedule_soup: BeautifulSoup) -> Schedule:
+        table_soup = schedule_soup.find("table", class_="cot-table")
+        schedule = Schedule()
+        schedule.name = schedule_soup.get("id").split("-")[1].capitalize()
+        schedule.start.CopyFrom(
+            datetime_date_to_date(
+                JsonScheduleGenerator._get_start_date(
+                    schedule_caption=table_soup.contents[1].contents[0]
+                )
+            )
+        )
+        for location_schedule_soup in schedule_soup.find_all(
+            "table", class_="cot-table"
+        ):
+            location, location_schedule = (
+                JsonScheduleGenerator._create_location_schedule(
+                    location_schedule_soup=location_schedule_soup
+                )
+            )
+            schedule.locations[location].CopyFrom(location_schedule)
+        return schedule
+
+
+def median_time(function: Callable[[], Schedules], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare indexed and legacy create_schedules"
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'fixture':<40} {'parse':<9} {'legacy ms':>10} {'indexed ms':>11}")
+    for name in FIXTURES:
+        body = load_fixture(name)
+        for mode, targeted in [("full", False), ("targeted", True)]:
+            soup = ScheduleScraper.parse_schedules(body=body, targeted=targeted)
+            legacy = LegacyScheduleGenerator.create_schedules(schedules_soup=soup)
+            indexed = JsonScheduleGenerator.create_schedules(schedules_soup=soup)
+            assert legacy == indexed, f"{name}: indexed schedules differ"
+            legacy_time = median_time(
+                lambda: LegacyScheduleGenerator.create_schedules(schedules_soup=soup),
+                args.repeat,
+            )
+            indexed_time = median_time(
+                lambda: JsonScheduleGenerator.create_schedules(schedules_soup=soup),
+                args.repeat,
+            )
+            print(
+                f"{name:<40} {mode:<9} {legacy_time * 1000:>10.2f} "
+                f"{indexed_time * 1000:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
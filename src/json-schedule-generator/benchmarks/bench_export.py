@@ -0,0 +1,192 @@
+import argparse
+import csv
+import datetime
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.bench_archive import synthetic_year
+from conversions import clock_to_minutes
+from departure_export import COLUMNS, export_departures, pyarrow
+from models.proto.schedules_pb2 import Schedules
+from schedule_writer import atomic_file, iter_json
+from timetable import DIRECTIONS, Timetable
+
+# Dev dependencies, like pyarrow, so every load path is timed.
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+def snapshot_timetables(years: int, snapshots: int) -> List[Timetable]:
+    # Every snapshot of a year repeats that year's seasons, as nightly
+    # archives mostly do.
+    rng = random.Random(0)
+    timetables = []
+    for year in range(2010, 2010 + years):
+        seasons = [
+            Timetable.from_proto(schedule)
+            for schedule in synthetic_year(year, rng).schedules
+        ]
+        for _ in range(snapshots):
+            timetables.extend(seasons)
+    return timetables
+
+
+def write_nested(timetables: List[Timetable], path: str) -> None:
+    schedules = Schedules()
+    for timetable in timetables:
+        schedules.schedules.add().CopyFrom(timetable.to_schedule())
+    with atomic_file(path) as f:
+        for piece in iter_json(schedules):
+            f.write(piece.encode("utf-8"))
+
+
+def flatten_json(path: str) -> Dict[str, list]:
+    # What every consumer of schedule.json has to write by hand today.
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    columns: Dict[str, list] = {column: [] for column in COLUMNS}
+    for schedule in document["schedules"]:
+        start = datetime.date(**schedule["start"])
+        end = datetime.date(**schedule["end"]) if schedule.get("end") else None
+        for location, departures in schedule["locations"].items():
+            for direction in DIRECTIONS:
+                for departure in departures.get(direction, []):
+                    columns["schedule"].append(schedule["name"])
+                    columns["start"].append(start)
+                    columns["end"].append(end)
+                    columns["location"].append(location)
+                    columns["direction"].append(direction)
+                    columns["minute"].append(clock_to_minutes(departure))
+    return columns
+
+
+def read_csv(path: str) -> Dict[str, list]:
+    columns: Dict[str, list] = {column: [] for column in COLUMNS}
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        assert next(reader) == COLUMNS
+        for schedule, start, end, location, direction, minute in reader:
+            columns["schedule"].append(schedule)
+            columns["start"].append(datetime.date.fromisoformat(start))
+            columns["end"].append(datetime.date.fromisoformat(end) if end else None)
+            columns["location"].append(location)
+            columns["direction"].append(direction)
+            columns["minute"].append(int(minute))
+    return columns
+
+
+def timed(function: Callable[[], object]) -> Tuple[float, object]:
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare loading flat departures with flattening schedule.json"
+    )
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--snapshots-per-year", type=int, default=26)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    missing = [
+        name
+        for name, module in [
+            ("pyarrow", pyarrow),
+            ("pandas", pandas),
+            ("duckdb", duckdb),
+        ]
+        if module is None
+    ]
+    if missing:
+        sys.exit(f"bench_export needs {', '.join(missing)}: run pipenv install --dev")
+
+    timetables = snapshot_timetables(args.years, args.snapshots_per_year)
+    with tempfile.TemporaryDirectory() as directory:
+        nested_path = os.path.join(directory, "schedule.json")
+        write_nested(timetables, nested_path)
+        flat_paths = {
+            "csv": os.path.join(directory, "departures.csv"),
+            "parquet": os.path.join(directory, "departures.parquet"),
+        }
+
+        export_times = {}
+        export_peaks = {}
+        for export_format, path in flat_paths.items():
+            export_times[export_format], _ = timed(
+                lambda: export_departures(timetables, path=path)
+            )
+            # Batching keeps this well under the size of the output.
+            tracemalloc.start()
+            export_departures(timetables, path=path)
+            _, export_peaks[export_format] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        loads: Dict[str, float] = {}
+        loads["json + python"], nested = timed(lambda: flatten_json(nested_path))
+        loads["csv module"], flat = timed(lambda: read_csv(flat_paths["csv"]))
+        assert flat == nested, "departures.csv does not match schedule.json"
+        from pyarrow import parquet
+
+        loads["pyarrow.parquet"], table = timed(
+            lambda: parquet.read_table(flat_paths["parquet"])
+        )
+        assert (
+            table.to_pydict() == nested
+        ), "departures.parquet does not match schedule.json"
+        rows = len(nested["minute"])
+        loads["json + pandas"], frame = timed(
+            lambda: pandas.DataFrame(flatten_json(nested_path))
+        )
+        loads["pandas.read_csv"], frame = timed(
+            lambda: pandas.read_csv(flat_paths["csv"])
+        )
+        assert len(frame) == rows
+        loads["pandas.read_parquet"], frame = timed(
+            lambda: pandas.read_parquet(flat_paths["parquet"])
+        )
+        assert len(frame) == rows
+        assert frame["minute"].tolist() == nested["minute"]
+        connection = duckdb.connect()
+        for export_format, path in flat_paths.items():
+            loads[f"duckdb {export_format}"], (count,) = timed(
+                lambda: connection.execute(
+                    f"SELECT COUNT(*) FROM read_{export_format}(?)", [path]
+                ).fetchone()
+            )
+            assert count == rows
+        sizes = {"json": os.path.getsize(nested_path)}
+        sizes.update(
+            {
+                export_format: os.path.getsize(path)
+                for export_format, path in flat_paths.items()
+            }
+        )
+
+    print(f"rows: {rows} from {len(timetables)} archived timetables")
+    for name, size in sizes.items():
+        print(f"{name:<8} {size / 1024:>10.0f} KiB")
+    for export_format in flat_paths:
+        print(
+            f"export {export_format:<8} {export_times[export_format] * 1000:>8.1f} ms, "
+            f"peak {export_peaks[export_format] / 1024:.0f} KiB"
+        )
+    for name, seconds in loads.items():
+        print(f"load {name:<20} {seconds * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
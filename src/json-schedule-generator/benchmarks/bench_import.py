@@ -0,0 +1,117 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative -X importtime budget per entry point, as a multiple of the
+# time the same interpreter takes to import REFERENCE, so the budgets hold
+# on machines of any speed.
+REFERENCE = "asyncio"
+BUDGETS = {
+    "conversions": 0.15,
+    "timetable": 1.0,
+    "schedule_query": 1.25,
+    "json_schedule_generator": 3.0,
+    "schedule_api": 3.5,
+}
+# Modules that importing the entry point must not pull in on its own; they
+# belong to the fetch, parse, archive or profile paths.
+DEFERRED = {
+    "conversions": ["google.protobuf"],
+    "timetable": ["google.protobuf.json_format", "bs4", "requests"],
+    "schedule_query": ["google.protobuf.json_format", "bs4", "requests"],
+    "json_schedule_generator": [
+        "bs4",
+        "requests",
+        "sqlite3",
+        "cProfile",
+        "tracemalloc",
+        "google.protobuf.json_format",
+    ],
+    "schedule_api": ["bs4", "requests", "sqlite3"],
+}
+
+
+def import_time_us(module: str) -> int:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SOURCE_DIRECTORY,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+            return int(parts[1])
+    raise RuntimeError(f"No -X importtime line for {module}")
+
+
+def loaded_modules(module: str) -> List[str]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print('\\n'.join(sys.modules))",
+        ],
+        cwd=SOURCE_DIRECTORY,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+def median_import_ms(module: str, runs: int) -> float:
+    return statistics.median(import_time_us(module) for _ in range(runs)) / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check entry point import times against their budgets"
+    )
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="fail on budgets too, not only on modules imported eagerly",
+    )
+    args = parser.parse_args()
+
+    # Eager imports are the hard check; timings are noisy, so a budget
+    # overrun is only reported unless --strict is given.
+    failures = []
+    warnings = []
+    for module, forbidden in DEFERRED.items():
+        loaded = set(loaded_modules(module))
+        eager = [name for name in forbidden if name in loaded]
+        if eager:
+            failures.append(f"{module} imports {', '.join(eager)} eagerly")
+
+    reference = median_import_ms(REFERENCE, args.runs)
+    print(f"{REFERENCE} reference: {reference:.1f} ms")
+    print(f"{'module':<26} {'median ms':>10} {'relative':>9} {'budget':>7}")
+    for module, budget in BUDGETS.items():
+        median = median_import_ms(module, args.runs)
+        relative = median / reference
+        print(f"{module:<26} {median:>10.1f} {relative:>9.2f} {budget:>7.2f}")
+        if relative > budget:
+            (failures if args.strict else warnings).append(
+                f"{module} took {relative:.2f}x {REFERENCE} (budget {budget}x)"
+            )
+
+    for warning in warnings:
+        print(f"WARN: {warning}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from benchmarks.bench_sources import StubHost
+from benchmarks.fixtures import FIXTURES, large_sections, load_fixture, render_page
+from bs4 import BeautifulSoup
+from schedule_scraper import TARGETED_SHARE, ScheduleScraper
+
+LARGE_PAGE = "synthetic-large"
+
+
+def measure(parse: Callable[[], BeautifulSoup], repeat: int) -> Tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    soup = parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+    return statistics.median(timings), peak
+
+
+def section_share(body: str) -> float:
+    sections = ScheduleScraper.extract_sections(chunks=[body])
+    return sum(map(len, sections)) / len(body)
+
+
+def check_streaming(pages: Dict[str, str]) -> None:
+    # fetch_schedules extracts the sections while the body streams in, and
+    # parsing from them gives the same tree as extracting afterwards.
+    host = StubHost(delay=0)
+    for name, body in pages.items():
+        host.pages[f"/{name}"] = body
+    threading.Thread(target=host.serve_forever, daemon=True).start()
+    try:
+        for name, body in pages.items():
+            result = ScheduleScraper.fetch_schedules(url=host.url(f"/{name}"))
+            assert result.response.body == body, name
+            assert result.sections == ScheduleScraper.extract_sections(
+                chunks=[body]
+            ), name
+            streamed = ScheduleScraper.parse_schedules(
+                body=result.response.body, sections=result.sections
+            )
+            assert str(streamed) == str(ScheduleScraper.parse_schedules(body=body))
+            # Pages that are mostly schedule are parsed whole.
+            whole = section_share(body) > TARGETED_SHARE
+            assert (streamed.find("main") is not None) == whole, name
+    finally:
+        host.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare whole-page and targeted schedule parsing"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--large-repeat", type=int, default=3, help=f"repeats for {LARGE_PAGE}"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    pages = {name: load_fixture(name) for name in FIXTURES}
+    pages[LARGE_PAGE] = render_page(sections=large_sections())
+    check_streaming(pages)
+
+    print(
+        f"{'page':<40} {'sections':>8} {'mode':<9} {'median ms':>10} {'peak KiB':>10}"
+    )
+    for name, body in pages.items():
+        repeat = args.large_repeat if name == LARGE_PAGE else args.repeat
+        share = f"{section_share(body):.0%}"
+        for mode, targeted in [("full", False), ("targeted", True)]:
+            median, peak = measure(
+                lambda: ScheduleScraper.parse_schedules(body=body, targeted=targeted),
+                repeat,
+            )
+            print(
+                f"{name:<40} {share:>8} {mode:<9} {median * 1000:>10.2f} "
+                f"{peak / 1024:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
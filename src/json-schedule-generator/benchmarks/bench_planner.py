@@ -0,0 +1,175 @@
+import argparse
+import datetime
+import logging
+import os
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.fixtures import FIXTURES_DIRECTORY, FULL_YEAR_JSON, large_sections
+from conversions import clock_to_minutes
+from journey_planner import CROSSING_MINUTES, NO_RETURN, JourneyPlanner
+from schedule_query import ScheduleIndex, at_minutes
+from timetable import Departures, Timetable, load_timetables
+
+STAYS = [0, 45, 180]
+
+# (location, at, return location, stay)
+Query = Tuple[str, datetime.datetime, str, int]
+
+
+def synthetic_timetables(locations: int) -> List[Timetable]:
+    timetables = []
+    sections = sorted(large_sections(locations=locations), key=lambda s: s[1])
+    for (season, start, rows_by_location), following in zip(
+        sections, [*sections[1:], None]
+    ):
+        timetables.append(
+            Timetable(
+                name=season.capitalize(),
+                start=start,
+                end=following[1] - datetime.timedelta(days=1) if following else None,
+                locations={
+                    location: Departures(
+                        departs_city=(clock_to_minutes(city) for city, _ in rows),
+                        departs_island=(clock_to_minutes(island) for _, island in rows),
+                    )
+                    for location, rows in rows_by_location.items()
+                },
+            )
+        )
+    return timetables
+
+
+def naive_earliest(timetable: Timetable) -> Dict[tuple, array]:
+    # Nested scans: every outbound sailing searches the returns from the top.
+    earliest = {}
+    for outbound_location, outbound in timetable.locations.items():
+        for return_location, returns in timetable.locations.items():
+            earliest[outbound_location, return_location] = array(
+                "h",
+                (
+                    next(
+                        (
+                            back
+                            for back in returns.departs_island
+                            if back >= departure + CROSSING_MINUTES
+                        ),
+                        NO_RETURN,
+                    )
+                    for departure in outbound.departs_city
+                ),
+            )
+    return earliest
+
+
+def naive_round_trip(
+    index: ScheduleIndex,
+    location: str,
+    at: datetime.datetime,
+    return_location: str,
+    stay: int,
+) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+    # Linear scans with the planner's rules: the first city sailing strictly
+    # after at's minute, yesterday's service day first, then the first boat
+    # back at least the crossing and stay later.
+    for position, date, now in index.service_days(at):
+        locations = index.timetables[position].locations
+        if location not in locations:
+            continue
+        departure = next((d for d in locations[location].departs_city if d > now), None)
+        if departure is None:
+            continue
+        if return_location not in locations:
+            return None
+        for back in locations[return_location].departs_island:
+            if back >= departure + CROSSING_MINUTES + stay:
+                return (
+                    at_minutes(at, departure, date=date),
+                    at_minutes(at, back, date=date),
+                )
+        return None
+    return None
+
+
+def round_trip_queries(planner: JourneyPlanner) -> List[Query]:
+    queries = []
+    for timetable in planner.index.timetables:
+        day = datetime.datetime.combine(timetable.start, datetime.time())
+        for location, departures in timetable.locations.items():
+            for departure in departures.departs_city:
+                # The minute before: a sailing in the current minute has
+                # already left.
+                at = day + datetime.timedelta(minutes=departure - 1)
+                for return_location in timetable.locations:
+                    for stay in STAYS:
+                        queries.append((location, at, return_location, stay))
+    return queries
+
+
+def check_round_trips(planner: JourneyPlanner, queries: List[Query]) -> int:
+    # The planner's trips equal the linear scans'; returns the number whose
+    # boat back leaves after midnight, on the day after the service date.
+    after_midnight = 0
+    for location, at, back, stay in queries:
+        answer = planner.round_trip(location, at=at, stay=stay, return_location=back)
+        actual = None if answer is None else (answer.outbound, answer.returns)
+        expected = naive_round_trip(planner.index, location, at, back, stay)
+        assert actual == expected, f"{location, at, back, stay}: {actual} != {expected}"
+        if expected is not None and expected[1].date() > at.date():
+            after_midnight += 1
+    return after_midnight
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time round-trip precomputation and queries over all dock pairs"
+    )
+    parser.add_argument("--locations", type=int, default=16)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    # The full-year fixture has a summer boat back at 00:05.
+    fixture = JourneyPlanner(
+        load_timetables(path=os.path.join(FIXTURES_DIRECTORY, FULL_YEAR_JSON))
+    )
+    assert check_round_trips(fixture, round_trip_queries(fixture)) > 0
+
+    timetables = synthetic_timetables(args.locations)
+    started = time.perf_counter()
+    planner = JourneyPlanner(timetables)
+    precompute_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    naive = [naive_earliest(timetable) for timetable in planner.index.timetables]
+    naive_precompute_seconds = time.perf_counter() - started
+    assert naive == planner._earliest, "two-pointer and nested-scan tables differ"
+
+    queries = round_trip_queries(planner)
+    check_round_trips(planner, queries)
+    started = time.perf_counter()
+    for location, at, back, stay in queries:
+        planner.round_trip(location, at=at, stay=stay, return_location=back)
+    planner_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for location, at, back, stay in queries:
+        naive_round_trip(planner.index, location, at, back, stay)
+    naive_seconds = time.perf_counter() - started
+    # At the departure minute itself the next sailing is taken.
+    location, before, *_ = queries[0]
+    at = before + datetime.timedelta(minutes=1)
+    trip = planner.round_trip(location, at=at)
+    assert trip is not None and trip.outbound > at, trip
+
+    pairs = sum(len(timetable.locations) ** 2 for timetable in timetables)
+    print(f"timetables:               {len(timetables)}")
+    print(f"dock pairs:               {pairs}")
+    print(f"two-pointer precompute:   {precompute_seconds * 1000:.1f} ms")
+    print(f"nested-scan precompute:   {naive_precompute_seconds * 1000:.1f} ms")
+    print(f"queries:                  {len(queries)}")
+    print(f"planner queries/sec:      {len(queries) / planner_seconds:.0f}")
+    print(f"linear-scan queries/sec:  {len(queries) / naive_seconds:.0f}")
+    print(f"speedup:                  {naive_seconds / planner_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
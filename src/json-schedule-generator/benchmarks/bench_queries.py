@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import logging
+import random
+import time
+from typing import List
+
+from benchmarks.fixtures import load_fixture
+from conversions import MINUTES_PER_DAY
+from json_schedule_generator import JsonScheduleGenerator
+from schedule_query import ScheduleIndex, at_minutes
+from schedule_scraper import ScheduleScraper
+from timetable import DIRECTIONS, Timetable
+
+
+def naive_next_departures(
+    timetables: List[Timetable],
+    location: str,
+    direction: str,
+    *,
+    at: datetime.datetime,
+    n: int,
+) -> List[datetime.datetime]:
+    # What website/script.js does: scan every schedule, then every time,
+    # for yesterday's service day (sailings after midnight) and today's.
+    upcoming = []
+    for days_back in (1, 0):
+        day = at.date() - datetime.timedelta(days=days_back)
+        now = at.hour * 60 + at.minute + days_back * MINUTES_PER_DAY
+        for timetable in timetables:
+            end = timetable.end or datetime.date.max
+            if timetable.start <= day <= end and location in timetable.locations:
+                times = timetable.locations[location].direction(direction)
+                upcoming.extend(
+                    at_minutes(at, minutes, date=day)
+                    for minutes in times
+                    if minutes > now
+                )
+                break
+    return sorted(upcoming)[:n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time next-departure queries")
+    parser.add_argument("--queries", type=int, default=1_000_000)
+    parser.add_argument("--n", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    soup = ScheduleScraper.parse_schedules(
+        body=load_fixture("all-ferry-schedules-full-year.html")
+    )
+    timetables = [
+        Timetable.from_proto(schedule)
+        for schedule in JsonScheduleGenerator.create_timetables(
+            schedules_soup=soup
+        ).schedules
+    ]
+    index = ScheduleIndex(timetables)
+    routes = [
+        (location, direction)
+        for timetable in timetables
+        for location in timetable.locations
+        for direction in DIRECTIONS
+    ]
+    rng = random.Random(0)
+    first = datetime.datetime(2024, 10, 1)
+    queries = [
+        (
+            *rng.choice(routes),
+            first + datetime.timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+        )
+        for _ in range(args.queries)
+    ]
+
+    for location, direction, at in queries[:10_000]:
+        expected = naive_next_departures(
+            timetables, location, direction, at=at, n=args.n
+        )
+        actual = index.next_departures(location, direction, at=at, n=args.n)
+        assert expected == actual, f"{location} {direction} {at}: {actual}"
+    # The last summer boat from Centre Island leaves at 00:05 the next day.
+    late = datetime.datetime(2025, 7, 2, 0, 1)
+    assert index.next_departures("Centre Island", "departsIsland", at=late) == [
+        datetime.datetime(2025, 7, 2, 0, 5)
+    ]
+
+    naive_queries = queries[: max(1, args.queries // 10)]
+    started = time.perf_counter()
+    for location, direction, at in naive_queries:
+        naive_next_departures(timetables, location, direction, at=at, n=args.n)
+    naive_rate = len(naive_queries) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for location, direction, at in queries:
+        index.next_departures(location, direction, at=at, n=args.n)
+    indexed_rate = len(queries) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for location, direction, at in queries:
+        index.within_next_hour(location, direction, at=at)
+    hour_rate = len(queries) / (time.perf_counter() - started)
+
+    print(f"{'query':<24} {'queries':>10} {'per second':>12}")
+    print(f"{'naive next_departures':<24} {len(naive_queries):>10} {naive_rate:>12.0f}")
+    print(f"{'next_departures':<24} {len(queries):>10} {indexed_rate:>12.0f}")
+    print(f"{'within_next_hour':<24} {len(queries):>10} {hour_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import datetime
+import gzip
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.bench_calendar import naive_effective, synthetic_exceptions
+from benchmarks.fixtures import FIXTURES, large_sections, load_fixture, render_page
+from conversions import minutes_to_am_pm
+from json_schedule_generator import OUTPUT_PATH, JsonScheduleGenerator
+from models.proto.schedules_pb2 import ServiceException
+from schedule_scraper import ScheduleScraper
+from static_site import StaticSite, route_label
+from timetable import DIRECTIONS, Timetable, load_timetables
+
+WEBSITE_PATH = "../../website"
+PAGE_FILES = ["index.html", "script.js", "styles.css"]
+ROW = re.compile(r'<tr data-m="(\d+)"><td>([^<]*)</td></tr>')
+TODAY = datetime.date(2024, 6, 1)
+
+
+def page_timetables(body: str) -> List[Timetable]:
+    soup = ScheduleScraper.parse_schedules(body=body)
+    return [
+        Timetable.from_proto(schedule)
+        for schedule in JsonScheduleGenerator.create_timetables(
+            schedules_soup=soup
+        ).schedules
+    ]
+
+
+def check_format() -> None:
+    # The same text moment's "hh:mm A" gave the page before.
+    for minute in range(24 * 60):
+        expected = datetime.time(minute // 60, minute % 60).strftime("%I:%M %p")
+        assert minutes_to_am_pm(minute) == expected, (minute, expected)
+
+
+def check_site(
+    directory: str, timetables: List[Timetable], exceptions: List[ServiceException]
+) -> None:
+    # Each run's routes and fragment rows match the timetable in effect on
+    # its first day, found by scanning every season and exception. Only the
+    # last run may be open-ended, and only when its season has no end date.
+    with open(os.path.join(directory, "routes.json"), encoding="utf-8") as f:
+        site = json.load(f)
+    referenced = set()
+    for position, run in enumerate(site["runs"]):
+        effective = naive_effective(
+            timetables, exceptions, datetime.date.fromisoformat(run["start"])
+        )
+        assert effective is not None, run["start"]
+        timetable, names = effective
+        if run["end"] is None:
+            assert position == len(site["runs"]) - 1, run["start"]
+            assert timetable.end is None, run["start"]
+        else:
+            assert run["end"] <= site["last"], run["start"]
+        assert run.get("exceptions", []) == list(names), run["start"]
+        expected = [
+            (route_label(location, direction), list(departures.direction(direction)))
+            for location, departures in sorted(timetable.locations.items())
+            for direction in DIRECTIONS
+            if departures.direction(direction)
+        ]
+        found = []
+        for route in run["routes"]:
+            referenced.add(f"{route['fragment']}.html")
+            path = os.path.join(directory, "fragments", f"{route['fragment']}.html")
+            with open(path, encoding="utf-8") as f:
+                rows = ROW.findall(f.read())
+            for minute, text in rows:
+                assert text == minutes_to_am_pm(int(minute)), (path, minute, text)
+            found.append((route["label"], [int(minute) for minute, _ in rows]))
+        assert found == expected, run["start"]
+    assert referenced == set(os.listdir(os.path.join(directory, "fragments")))
+
+
+def median_seconds(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def payload(directory: str) -> Dict[str, int]:
+    # What a visitor downloads to see one route: the page, today's run index
+    # and the largest fragment, gzip-compressed as a static host serves them.
+    sizes = {}
+    for name in PAGE_FILES:
+        with open(os.path.join(WEBSITE_PATH, name), "rb") as f:
+            sizes[name] = len(gzip.compress(f.read()))
+    with open(os.path.join(directory, "routes.json"), "rb") as f:
+        sizes["routes.json"] = len(gzip.compress(f.read()))
+    fragments = os.path.join(directory, "fragments")
+    largest = 0
+    for name in os.listdir(fragments):
+        with open(os.path.join(fragments, name), "rb") as f:
+            largest = max(largest, len(gzip.compress(f.read())))
+    sizes["largest fragment"] = largest
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the static site build and check the page payload"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--exceptions-per-year", type=int, default=12)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=250.0,
+        help="slowest acceptable cold build",
+    )
+    parser.add_argument(
+        "--payload-budget",
+        type=int,
+        default=8 * 1024,
+        help="largest acceptable gzip-compressed page payload in bytes",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    check_format()
+    with open(os.path.join(WEBSITE_PATH, "index.html"), encoding="utf-8") as f:
+        index = f.read()
+    assert "moment" not in index, "index.html still loads moment"
+    assert not re.search(r"<script[^>]+src=\"https?:", index), "external script"
+
+    rng = random.Random(0)
+    exceptions = synthetic_exceptions(
+        range(TODAY.year, TODAY.year + 2), args.exceptions_per_year, rng
+    )
+    inputs = {"schedule.json": (load_timetables(path=OUTPUT_PATH), [])}
+    for name in FIXTURES:
+        inputs[name] = (page_timetables(load_fixture(name)), [])
+    large = page_timetables(render_page(sections=large_sections()))
+    inputs["large sections"] = (large, [])
+    inputs["large sections + exceptions"] = (large, exceptions)
+
+    print(
+        f"{'input':<44} {'runs':>5} {'fragments':>9} {'cold ms':>8} "
+        f"{'rebuild ms':>10}"
+    )
+    for name, (timetables, input_exceptions) in inputs.items():
+        with tempfile.TemporaryDirectory() as directory:
+
+            def build():
+                return StaticSite.build(
+                    timetables,
+                    directory=directory,
+                    exceptions=input_exceptions,
+                    today=TODAY,
+                )
+
+            started = time.perf_counter()
+            report = build()
+            cold = time.perf_counter() - started
+            check_site(directory, timetables, input_exceptions)
+            rebuild = median_seconds(build, args.repeat)
+            again = build()
+            assert not again.written and not again.removed, name
+            with open(os.path.join(directory, "routes.json"), encoding="utf-8") as f:
+                runs = len(json.load(f)["runs"])
+            if name == "schedule.json":
+                sizes = payload(directory)
+        print(
+            f"{name:<44} {runs:>5} {len(report.written):>9} {cold * 1000:>8.1f} "
+            f"{rebuild * 1000:>10.1f}"
+        )
+        assert cold * 1000 <= args.budget_ms, f"building {name} took {cold:.3f}s"
+
+    with open(OUTPUT_PATH, "rb") as f:
+        schedule_json = len(gzip.compress(f.read()))
+    total = sum(sizes.values())
+    for name, size in sizes.items():
+        print(f"{name:<20} {size:>7} B gzip")
+    print(f"{'page payload':<20} {total:>7} B gzip")
+    # The old page fetched all of schedule.json on load and again for every
+    # route picked, after moment and moment-timezone from a CDN.
+    print(f"{'schedule.json':<20} {schedule_json:>7} B gzip, per route picked")
+    assert sizes["largest fragment"] < schedule_json
+    assert total <= args.payload_budget, f"page payload is {total} bytes"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import http.server
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import json_schedule_generator
+from benchmarks.bench_watch import redirect_output
+from benchmarks.fixtures import load_fixture
+from response_cache import ResponseCache, content_hash
+from schedule_sources import Source, SourcePipeline, parse_page_summary
+
+
+class StubHost(http.server.ThreadingHTTPServer):
+    # One "host" serving a page per path after a fixed delay, with an ETag
+    # answered by 304, and recording how many requests were in flight at once.
+    def __init__(self, *, delay: float) -> None:
+        super().__init__(("127.0.0.1", 0), StubHostHandler)
+        self.delay = delay
+        self.pages: Dict[str, str] = {}
+        self.etag_version = 0
+        self.statuses: List[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def etag(self, path: str) -> str:
+        return f'"{content_hash(self.pages[path])[:16]}-{self.etag_version}"'
+
+
+class StubHostHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server._lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            etag = server.etag(self.path)
+            status = 304 if self.headers.get("If-None-Match") == etag else 200
+            # No charset, as some servers send: the body must still be
+            # read as UTF-8.
+            body = b"" if status == 304 else server.pages[self.path].encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+                server.statuses.append(status)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def notice_page(number: int) -> str:
+    return (
+        f"<html><head><title>Ward’s Island notice {number}</title></head>"
+        f"<body><main><h1>Notice {number}</h1><p>Service update {number}.</p>"
+        "</main></body></html>"
+    )
+
+
+def start_hosts(count: int, pages_per_host: int, delay: float) -> List[StubHost]:
+    hosts = []
+    for _ in range(count):
+        host = StubHost(delay=delay)
+        for number in range(pages_per_host):
+            host.pages[f"/notice-{number}"] = notice_page(number)
+        threading.Thread(target=host.serve_forever, daemon=True).start()
+        hosts.append(host)
+    return hosts
+
+
+def sources_for(hosts: List[StubHost]) -> List[Source]:
+    return [
+        Source(name=f"host{i}{path}", url=host.url(path), parse=parse_page_summary)
+        for i, host in enumerate(hosts)
+        for path in host.pages
+    ]
+
+
+def check_pipeline(directory: str, args: argparse.Namespace) -> Dict[str, float]:
+    hosts = start_hosts(args.hosts, args.pages, args.delay)
+    sources = sources_for(hosts)
+    cache = ResponseCache(directory=os.path.join(directory, "cache"))
+    pipeline = SourcePipeline(
+        sources=sources,
+        fetch_workers=len(sources),
+        connections_per_host=args.connections_per_host,
+        cache=cache,
+    )
+    try:
+        started = time.perf_counter()
+        results = pipeline.run()
+        cold = time.perf_counter() - started
+        # The per-host limit holds, and is used: hosts are fetched in
+        # parallel, each at most connections_per_host at a time.
+        for host in hosts:
+            assert host.max_in_flight == args.connections_per_host, host.max_in_flight
+        serial = len(sources) * args.delay
+        per_host = args.pages / args.connections_per_host * args.delay
+        assert cold < serial * 0.75, (cold, serial)
+        assert cold >= per_host, (cold, per_host)
+        for result in results:
+            assert result.error is None, result.error
+            assert result.fetch_seconds >= args.delay, result
+            assert result.parse_seconds > 0 and result.bytes > 0, result
+            assert not result.not_modified, result
+            assert result.result["title"].startswith("Ward’s Island"), result
+        summaries = {result.name: result.result for result in results}
+
+        # Nothing changed: every source revalidates with a 304 and nothing is
+        # parsed again.
+        for host in hosts:
+            host.statuses.clear()
+        started = time.perf_counter()
+        results = pipeline.run()
+        warm = time.perf_counter() - started
+        assert all(result.not_modified and result.result is None for result in results)
+        assert all(result.parse_seconds == 0 for result in results)
+        assert all(host.statuses == [304] * args.pages for host in hosts)
+
+        # New validators for the same bodies are stored, so the next run is
+        # answered with 304 again rather than full pages.
+        for host in hosts:
+            host.etag_version += 1
+            host.statuses.clear()
+        results = pipeline.run()
+        assert all(result.not_modified for result in results)
+        assert all(host.statuses == [200] * args.pages for host in hosts)
+        for host in hosts:
+            host.statuses.clear()
+        pipeline.run()
+        assert all(host.statuses == [304] * args.pages for host in hosts)
+        assert {result.name: result.result for result in results} == {
+            name: None for name in summaries
+        }
+    finally:
+        for host in hosts:
+            host.shutdown()
+    return {"cold": cold, "warm": warm, "serial": serial}
+
+
+def check_run(directory: str) -> None:
+    # run() fetches --source pages alongside the schedules page and writes
+    # their report; the page without a charset is read as UTF-8.
+    host = StubHost(delay=0)
+    host.pages["/schedules"] = load_fixture("all-ferry-schedules-full-year.html")
+    host.pages["/notice"] = notice_page(0)
+    threading.Thread(target=host.serve_forever, daemon=True).start()
+    report_path = os.path.join(directory, "sources.json")
+    try:
+        changes = json_schedule_generator.run(
+            url=host.url("/schedules"),
+            use_cache=False,
+            sources=[
+                Source(name="notice", url=host.url("/notice"), parse=parse_page_summary)
+            ],
+            sources_path=report_path,
+        )
+    finally:
+        host.shutdown()
+    assert changes is not None and changes.validation.ok
+    with open(json_schedule_generator.OUTPUT_PATH, encoding="utf-8") as f:
+        assert "Ward’s Island" in f.read()
+    with open(report_path, encoding="utf-8") as f:
+        (report,) = json.load(f)
+    assert report["name"] == "notice" and report["error"] is None, report
+    assert report["result"]["title"] == "Ward’s Island notice 0", report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the source pipeline against local stub servers"
+    )
+    parser.add_argument("--hosts", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=6, help="pages per host")
+    parser.add_argument("--delay", type=float, default=0.1, help="seconds per page")
+    parser.add_argument("--connections-per-host", type=int, default=2)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        timings = check_pipeline(directory, args)
+        redirect_output(directory)
+        check_run(directory)
+    print("pipeline: per-host limit, timings and 304 revalidation checked")
+    print(f"serial fetch estimate: {timings['serial'] * 1000:8.0f} ms")
+    print(f"cold pipeline run:     {timings['cold'] * 1000:8.0f} ms")
+    print(f"warm pipeline run:     {timings['warm'] * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import logging
+import statistics
+import time
+from typing import Callable, Tuple
+
+from benchmarks.fixtures import (
+    FIXTURES,
+    IRREGULAR_EXPECTED,
+    IRREGULAR_FIXTURE,
+    load_fixture,
+)
+from bs4 import Tag
+from conversions import minutes_to_time, service_day_minutes, time_to_minutes
+from json_schedule_generator import JsonScheduleGenerator
+from models.proto.schedules_pb2 import LocationTimetable
+from schedule_scraper import ScheduleScraper
+from table_extractor import extract_location_timetable
+
+
+def legacy_location_timetable(table: Tag) -> Tuple[str, LocationTimetable]:
+    # The fixed .contents walk that the header-driven extractor replaced,
+    # with sailings after midnight moved into the service day the same way.
+    location = table.contents[3].contents[1].contents[3].contents[0]
+    if not isinstance(location, str):
+        location = location.contents[0]
+    location = " ".join(location.split()[1:])
+    rows = table.contents[5].contents
+    location_timetable = LocationTimetable()
+    location_timetable.departsCity.extend(
+        service_day_minutes(
+            time_to_minutes(row.contents[1].contents[0]) for row in rows if row != "\n"
+        )
+    )
+    location_timetable.departsIsland.extend(
+        service_day_minutes(
+            time_to_minutes(row.contents[3].contents[0]) for row in rows if row != "\n"
+        )
+    )
+    return location, location_timetable
+
+
+def median_time(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def check_irregular() -> None:
+    soup = ScheduleScraper.parse_schedules(body=load_fixture(IRREGULAR_FIXTURE))
+    sections = JsonScheduleGenerator._index_sections(schedules_soup=soup)
+    extracted = {}
+    for table in sections["spring"].tables:
+        location, location_timetable = extract_location_timetable(table)
+        extracted[location] = {
+            "departsCity": [
+                minutes_to_time(minutes) for minutes in location_timetable.departsCity
+            ],
+            "departsIsland": [
+                minutes_to_time(minutes) for minutes in location_timetable.departsIsland
+            ],
+        }
+    assert extracted == IRREGULAR_EXPECTED, f"{IRREGULAR_FIXTURE}: {extracted}"
+    print(f"{IRREGULAR_FIXTURE}: rowspan, colspan and extra columns extracted")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare header-driven and fixed-index table extraction"
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    check_irregular()
+    print(
+        f"{'fixture':<40} {'season':<7} {'rows':>5} {'legacy µs':>10} "
+        f"{'header µs':>10}"
+    )
+    for name in FIXTURES:
+        soup = ScheduleScraper.parse_schedules(body=load_fixture(name))
+        sections = JsonScheduleGenerator._index_sections(schedules_soup=soup)
+        for season in JsonScheduleGenerator.SEASONS:
+            tables = sections[season].tables
+            for table in tables:
+                assert legacy_location_timetable(table) == (
+                    extract_location_timetable(table)
+                ), f"{name} {season}: extracted tables differ"
+            rows = sum(
+                len(extract_location_timetable(table)[1].departsCity)
+                for table in tables
+            )
+            legacy_time = median_time(
+                lambda: [legacy_location_timetable(table) for table in tables],
+                args.repeat,
+            )
+            header_time = median_time(
+                lambda: [extract_location_timetable(table) for table in tables],
+                args.repeat,
+            )
+            print(
+                f"{name:<40} {season:<7} {rows:>5} {legacy_time * 1e6:>10.0f} "
+                f"{header_time * 1e6:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import datetime
+import logging
+import random
+import re
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from json_schedule_generator import JsonScheduleGenerator, time_to_minutes
+
+
+def legacy_parse_date(sentence) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    month_pattern = r"(January|February|March|April|May|June|July|August|September|October|November|December)"
+    day_pattern = r"\b([1-9]|[12][0-9]|3[01])\b"
+    year_pattern = r"\b(\d{4})\b"
+    month_match = re.search(month_pattern, sentence, re.IGNORECASE)
+    day_match = re.search(day_pattern, sentence)
+    year_match = re.search(year_pattern, sentence)
+    month = month_match.group(0) if month_match else None
+    day = int(day_match.group(0)) if day_match else None
+    year = int(year_match.group(0)) if year_match else None
+    return month, day, year
+
+
+def legacy_format_time(*, time: str) -> str:
+    if time.lower() == "noon":
+        return "12:00"
+    time = time.replace("a.m.", "AM").replace("p.m.", "PM")
+    time_obj = datetime.datetime.strptime(time, "%I:%M %p")
+    return time_obj.strftime("%H:%M")
+
+
+def outcome(function: Callable, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    except ValueError:
+        return ValueError
+
+
+def page_times() -> List[str]:
+    times = ["noon", "Noon", "NOON"]
+    for minute in range(24 * 60):
+        hour = minute // 60 % 12 or 12
+        suffix = "a.m." if minute < 12 * 60 else "p.m."
+        times.append(f"{hour}:{minute % 60:02d} {suffix}")
+    return times
+
+
+def random_times(rng: random.Random, count: int) -> Iterable[str]:
+    parts = ["0", "1", "6", "9", "10", "12", "13", "00", "05", "5", "30", "59", "60"]
+    suffixes = ["a.m.", "p.m.", "AM", "pm", "A.M.", "a.m", "am.", ""]
+    separators = [" ", "  ", "\t", ""]
+    for _ in range(count):
+        yield (
+            f"{rng.choice(parts)}:{rng.choice(parts)}"
+            f"{rng.choice(separators)}{rng.choice(suffixes)}"
+        )
+
+
+def random_captions(rng: random.Random, count: int) -> Iterable[str]:
+    words = [
+        "Winter", "schedule", "effective", "October", "MAY", "mayor", "june",
+        "15,", "2024", "1", "31", "32", "0", "20245", "(April", "3)", "-", "to",
+        "2025.", "Sept.", "12:30",
+    ]  # fmt: skip
+    for _ in range(count):
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(0, 10)))
+
+
+def check_equivalence(samples: int) -> None:
+    rng = random.Random(0)
+    for value in [*page_times(), *random_times(rng, samples)]:
+        expected = outcome(legacy_format_time, time=value)
+        actual = outcome(JsonScheduleGenerator._format_time, time=value)
+        assert expected == actual, f"{value!r}: {expected!r} != {actual!r}"
+    for caption in random_captions(rng, samples):
+        expected = legacy_parse_date(caption)
+        actual = JsonScheduleGenerator.parse_date(caption)
+        assert expected == actual, f"{caption!r}: {expected!r} != {actual!r}"
+    print(f"Checked {samples} random times and captions against strptime/re.search")
+
+
+def throughput(function: Callable[[str], object], values: List[str]) -> float:
+    started = time.perf_counter()
+    for value in values:
+        function(value)
+    return len(values) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check and time the date/time parsing fast paths"
+    )
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--cells", type=int, default=200000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    check_equivalence(args.samples)
+    rng = random.Random(1)
+    # A page repeats a few dozen distinct times across every location and season.
+    distinct = rng.sample(page_times()[3:], 60)
+    cells = [rng.choice(distinct) for _ in range(args.cells)]
+    captions = list(random_captions(rng, args.cells // 10))
+    time_to_minutes.cache_clear()
+    rows = [
+        (
+            "time cells",
+            throughput(lambda value: legacy_format_time(time=value), cells),
+            throughput(
+                lambda value: JsonScheduleGenerator._format_time(time=value), cells
+            ),
+        ),
+        (
+            "captions",
+            throughput(legacy_parse_date, captions),
+            throughput(JsonScheduleGenerator.parse_date, captions),
+        ),
+    ]
+    print(f"{'input':<12} {'legacy/s':>12} {'fast/s':>12} {'speedup':>8}")
+    for name, legacy, fast in rows:
+        print(f"{name:<12} {legacy:>12.0f} {fast:>12.0f} {fast / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
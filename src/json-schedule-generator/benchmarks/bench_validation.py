@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+import json_schedule_generator
+from benchmarks.bench_watch import StubSite, redirect_output
+from benchmarks.fixtures import (
+    FIXTURES,
+    full_year_sections,
+    large_sections,
+    load_fixture,
+    render_page,
+)
+from json_schedule_generator import JsonScheduleGenerator, run
+from schedule_scraper import ScheduleScraper
+from schedule_validation import (
+    ScheduleValidationError,
+    ValidationReport,
+    check_departures,
+    validate_timetables,
+)
+
+
+def checks(body: str) -> List[str]:
+    soup = ScheduleScraper.parse_schedules(body=body)
+    _, changes = JsonScheduleGenerator.update_timetables(schedules_soup=soup)
+    return [issue.check for issue in changes.validation.errors]
+
+
+def broken_pages() -> dict:
+    good = render_page(sections=full_year_sections())
+    unordered = full_year_sections()
+    rows = unordered[0][2]["Centre Island"]
+    rows[2], rows[3] = rows[3], rows[2]
+    overlapping = full_year_sections()
+    overlapping[2] = ("fall", overlapping[1][1], overlapping[2][2])
+    return {
+        "table-format": good.replace("Departs City", "Leaves City", 1),
+        "unordered": render_page(sections=unordered),
+        "overlap": render_page(sections=overlapping),
+        "no-schedules": render_page(sections=[]),
+    }
+
+
+def check_reports() -> None:
+    for name in FIXTURES:
+        assert checks(load_fixture(name)) == [], name
+    for check, body in broken_pages().items():
+        found = checks(body)
+        assert check in found, (check, found)
+    # Used to end in IndexError from _populate_end_dates.
+    try:
+        JsonScheduleGenerator.create_schedules(
+            schedules_soup=ScheduleScraper.parse_schedules(
+                body=broken_pages()["no-schedules"]
+            )
+        )
+    except ScheduleValidationError as error:
+        assert error.report.errors[0].check == "no-schedules"
+    else:
+        raise AssertionError("an empty page was not rejected")
+
+
+def departure_checks(minutes: List[int]) -> List[tuple]:
+    report = ValidationReport()
+    check_departures(report, "Summer", "Centre Island", "departsCity", minutes)
+    return [(issue.check, issue.severity) for issue in report.issues]
+
+
+def check_rollover() -> None:
+    # One large drop late in the day is a sailing after midnight written
+    # as "00:15", not a misordered row; a small step back still is.
+    assert departure_checks([1380, 1410, 1425, 15]) == [("rollover", "warning")]
+    assert departure_checks([1380, 1410, 1425, 1455]) == []
+    assert departure_checks([600, 630, 615, 660]) == [("unordered", "error")]
+    assert departure_checks([1380, 1425, 15, 5]) == [
+        ("rollover", "warning"),
+        ("unordered", "error"),
+    ]
+
+
+def check_fallback(directory: str, site: StubSite) -> None:
+    # A page that fails validation fails the run and leaves the last good
+    # output in place.
+    report_path = os.path.join(directory, "validation.json")
+    site.page = render_page(sections=full_year_sections())
+    assert run(url=site.url, use_cache=False, validation_path=report_path)
+    with open(json_schedule_generator.OUTPUT_PATH, "rb") as f:
+        good = f.read()
+    for check, body in broken_pages().items():
+        site.page = body
+        try:
+            run(url=site.url, use_cache=False, validation_path=report_path)
+        except ScheduleValidationError as error:
+            assert check in [issue.check for issue in error.report.errors], check
+        else:
+            raise AssertionError(f"{check} did not fail the run")
+        with open(json_schedule_generator.OUTPUT_PATH, "rb") as f:
+            assert f.read() == good, check
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+        assert not report["ok"]
+        assert check in [issue["check"] for issue in report["issues"]], report
+
+
+def median_seconds(function: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check schedule validation and time its share of generation"
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.05,
+        help="largest acceptable validation time as a fraction of parsing and "
+        "create_schedules",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    check_reports()
+    check_rollover()
+    site = StubSite()
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            redirect_output(directory)
+            check_fallback(directory, site)
+    finally:
+        site.shutdown()
+
+    pages = {name: load_fixture(name) for name in FIXTURES}
+    pages["large sections"] = render_page(sections=large_sections())
+    print(
+        f"{'page':<40} {'departures':>10} {'parse ms':>9} {'create ms':>10} "
+        f"{'validate ms':>12} {'share':>6}"
+    )
+    for name, body in pages.items():
+        soup = ScheduleScraper.parse_schedules(body=body)
+        timetables = JsonScheduleGenerator.create_timetables(schedules_soup=soup)
+        departures = sum(
+            len(location.departsCity) + len(location.departsIsland)
+            for schedule in timetables.schedules
+            for location in schedule.locations.values()
+        )
+        parse = median_seconds(
+            lambda: ScheduleScraper.parse_schedules(body=body), args.repeat
+        )
+        create = median_seconds(
+            lambda: JsonScheduleGenerator.create_schedules(schedules_soup=soup),
+            args.repeat,
+        )
+        validate = median_seconds(
+            lambda: validate_timetables(timetables, previous=timetables),
+            args.repeat,
+        )
+        # Share of turning a fetched page into schedules, which validation
+        # is now part of.
+        share = validate / (parse + create)
+        print(
+            f"{name:<40} {departures:>10} {parse * 1000:>9.2f} "
+            f"{create * 1000:>10.2f} {validate * 1000:>12.3f} {share:>6.1%}"
+        )
+        assert share <= args.budget, f"validation takes {share:.1%} on {name}"
+
+
+if __name__ == "__main__":
+    main()
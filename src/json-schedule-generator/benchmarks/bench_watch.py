@@ -0,0 +1,267 @@
+import argparse
+import datetime
+import http.server
+import logging
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+import json_schedule_generator
+from benchmarks.bench_import import SOURCE_DIRECTORY
+from benchmarks.fixtures import full_year_sections, render_page, sailings
+from json_schedule_generator import JsonScheduleGenerator
+from response_cache import content_hash
+from schedule_scraper import ScheduleScraper
+from schedule_watcher import (
+    CommandHook,
+    PollPolicy,
+    ScheduleWatcher,
+    SocketHook,
+    WebhookHook,
+)
+from schedule_writer import ScheduleWriter
+
+# Far from every fixture season start, so only backoff shapes the intervals.
+QUIET_DAY = datetime.date(2030, 1, 1)
+
+
+class StubSite(http.server.ThreadingHTTPServer):
+    # Serves one page at a time with an ETag, answering If-None-Match with
+    # 304, and records anything POSTed to /hook.
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.page = ""
+        self.statuses: List[int] = []
+        self.webhook_events: List[bytes] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = self.server.page.encode("utf-8")
+        etag = f'"{content_hash(self.server.page)[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.server.statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.server.webhook_events.append(
+            self.rfile.read(int(self.headers["Content-Length"]))
+        )
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class SocketListener:
+    def __init__(self, path: str) -> None:
+        self.events: List[bytes] = []
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            connection, _ = self._server.accept()
+            with connection:
+                chunks = []
+                while chunk := connection.recv(65536):
+                    chunks.append(chunk)
+                self.events.append(b"".join(chunks))
+
+
+def pages() -> List[str]:
+    # The page as first published, a timetable change to one summer dock,
+    # then the same timetables inside different page chrome.
+    original = full_year_sections()
+    changed = full_year_sections()
+    changed[1][2]["Ward’s Island"] = sailings(
+        first="06:30", last="23:45", headway=20, offset=15
+    )
+    return [
+        render_page(sections=original),
+        render_page(sections=changed),
+        render_page(sections=changed, seed=1),
+    ]
+
+
+def redirect_output(directory: str) -> None:
+    json_schedule_generator.OUTPUT_PATH = os.path.join(directory, "schedule.json")
+    json_schedule_generator.PROTOBUF_PATH = os.path.join(directory, "schedule.pb")
+    json_schedule_generator.MANIFEST_PATH = os.path.join(
+        directory, "schedule.manifest.json"
+    )
+
+
+def check_policy() -> None:
+    policy = PollPolicy(minimum=300, maximum=3600, backoff=2, lead_days=7)
+    start = datetime.date(2025, 5, 16)
+    interval = None
+    intervals = []
+    for _ in range(6):
+        interval = policy.next_interval(
+            interval, changed=False, today=QUIET_DAY, starts=[start]
+        )
+        intervals.append(interval)
+    assert intervals == [300, 600, 1200, 2400, 3600, 3600], intervals
+    assert policy.next_interval(3600, changed=True, today=QUIET_DAY, starts=[]) == 300
+    for days_before, expected in [(8, 3600), (7, 300), (0, 300), (-1, 3600)]:
+        today = start - datetime.timedelta(days=days_before)
+        interval = policy.next_interval(
+            3600, changed=False, today=today, starts=[start]
+        )
+        assert interval == expected, (days_before, interval)
+
+
+def check_watcher(directory: str, site: StubSite) -> None:
+    served = pages()
+    # Poll n is answered with pages()[schedule[n]]: polls 0 and 3 change the
+    # timetables, poll 5 only the chrome around them.
+    schedule = [0, 0, 0, 1, 1, 2, 2]
+    events_path = os.path.join(directory, "command-events.jsonl")
+    listener = SocketListener(os.path.join(directory, "hook.sock"))
+    delays: List[float] = []
+    written: List[int] = []
+
+    def wait(seconds: float) -> bool:
+        delays.append(seconds)
+        written.append(os.stat(json_schedule_generator.OUTPUT_PATH).st_mtime_ns)
+        site.page = served[schedule[len(delays)]]
+        return False
+
+    site.page = served[schedule[0]]
+    command = shlex.join(
+        [
+            sys.executable,
+            "-c",
+            "import sys; open(sys.argv[1], 'ab').write(sys.stdin.buffer.read())",
+            events_path,
+        ]
+    )
+    watcher = ScheduleWatcher(
+        url=site.url,
+        policy=PollPolicy(minimum=300, maximum=3600, backoff=2, jitter=0),
+        hooks=[
+            CommandHook(command),
+            WebhookHook(f"{site.url}hook"),
+            SocketHook(os.path.join(directory, "hook.sock")),
+        ],
+        use_cache=False,
+        today=lambda: QUIET_DAY,
+        wait=wait,
+    )
+    polls = watcher.run_forever(max_polls=len(schedule))
+    assert polls == len(schedule)
+    assert site.statuses == [200, 304, 304, 200, 304, 200, 304], site.statuses
+    assert delays == [300, 600, 1200, 300, 600, 1200], delays
+    written.append(os.stat(json_schedule_generator.OUTPUT_PATH).st_mtime_ns)
+    rewrites = sum(1 for a, b in zip(written, written[1:]) if a != b)
+    assert rewrites == 1, written
+
+    with open(events_path, encoding="utf-8") as f:
+        command_events = f.read().splitlines()
+    deadline = time.monotonic() + 5
+    while len(listener.events) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for events in [
+        command_events,
+        [event.decode("utf-8").rstrip("\n") for event in site.webhook_events],
+        [event.decode("utf-8").rstrip("\n") for event in listener.events],
+    ]:
+        assert len(events) == 2, events
+        assert '"changed": ["spring", "summer", "fall", "winter"]' in events[0]
+        assert '"changed": ["summer"]' in events[1], events[1]
+
+    with open(json_schedule_generator.OUTPUT_PATH, "rb") as f:
+        assert f.read() == ScheduleWriter.to_json(
+            JsonScheduleGenerator.create_schedules(
+                schedules_soup=ScheduleScraper.parse_schedules(body=served[2])
+            )
+        ), "watched output differs from a one-off conversion"
+
+
+def warm_poll_seconds(site: StubSite, repeat: int) -> List[float]:
+    watcher = ScheduleWatcher(url=site.url, use_cache=False)
+    watcher.poll()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        assert watcher.poll() is None
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def cold_poll_seconds(directory: str, site: StubSite, repeat: int) -> List[float]:
+    # What the cron job pays when nothing changed: a new interpreter, the
+    # imports, a new connection and the cache file, for a 304.
+    script = (
+        "import json_schedule_generator as g;"
+        f"g.OUTPUT_PATH = {json_schedule_generator.OUTPUT_PATH!r};"
+        f"g.PROTOBUF_PATH = {json_schedule_generator.PROTOBUF_PATH!r};"
+        f"g.MANIFEST_PATH = {json_schedule_generator.MANIFEST_PATH!r};"
+        f"g.run(url={site.url!r})"
+    )
+    environment = {**os.environ, "PYTHONPATH": SOURCE_DIRECTORY}
+    times = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", script], cwd=directory, env=environment, check=True
+        )
+        times.append(time.perf_counter() - started)
+    return times[1:]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check --watch against a stub site and time warm vs cold polls"
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    check_policy()
+    site = StubSite()
+    threading.Thread(target=site.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            redirect_output(directory)
+            check_watcher(directory, site)
+            warm = warm_poll_seconds(site, args.repeat)
+            cold = cold_poll_seconds(directory, site, args.repeat)
+    finally:
+        site.shutdown()
+    print("watcher: regenerated and notified only on timetable changes")
+    print(f"warm unchanged poll: {statistics.median(warm) * 1000:8.2f} ms")
+    print(f"cold unchanged run:  {statistics.median(cold) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from benchmarks.bench_archive import synthetic_year
+from benchmarks.fixtures import FIXTURES, FULL_YEAR_JSON, load_fixture
+from google.protobuf import json_format
+from models.proto.schedules_pb2 import Schedules, Timetables
+from json_schedule_generator import OUTPUT_PATH, JsonScheduleGenerator
+from schedule_scraper import ScheduleScraper
+from schedule_writer import ScheduleWriter, write_atomic
+from timetable import Timetable, load_schedules, timetables_to_schedules
+
+# Peak traced memory the streaming writer may use, whatever the input size.
+STREAM_PEAK_BUDGET = 1 << 20
+
+
+def legacy_write(schedules: Schedules, directory: str) -> None:
+    # The writer before streaming: a full dict, a full string and full
+    # bytes in memory before anything reaches the file.
+    data = legacy_json(schedules)
+    write_atomic(os.path.join(directory, "schedule.json"), data)
+    write_atomic(
+        os.path.join(directory, "schedule.json.gz"),
+        gzip.compress(data, compresslevel=9, mtime=0),
+    )
+
+
+def legacy_json(schedules: Schedules) -> bytes:
+    # Locations in key order, which the streaming writer uses instead of
+    # upb's random map order.
+    schedules_dict = json_format.MessageToDict(schedules)
+    for schedule in schedules_dict.get("schedules", []):
+        if "locations" in schedule:
+            schedule["locations"] = dict(sorted(schedule["locations"].items()))
+    return json.dumps(schedules_dict, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+def check_fixtures() -> None:
+    for name in FIXTURES:
+        schedules = JsonScheduleGenerator.create_schedules(
+            schedules_soup=ScheduleScraper.parse_schedules(body=load_fixture(name))
+        )
+        assert ScheduleWriter.to_json(schedules) == legacy_json(schedules), name
+    # Byte for byte the original format: sailings after midnight are
+    # written "00:05", not "24:05", and read back in their service day.
+    schedules = JsonScheduleGenerator.create_schedules(
+        schedules_soup=ScheduleScraper.parse_schedules(
+            body=load_fixture("all-ferry-schedules-full-year.html")
+        )
+    )
+    expected = load_fixture(FULL_YEAR_JSON).encode("utf-8")
+    assert ScheduleWriter.to_json(schedules) == expected
+    (summer,) = [s for s in schedules.schedules if s.name == "Summer"]
+    centre = Timetable.from_schedule(summer).locations["Centre Island"]
+    assert summer.locations["Centre Island"].departsIsland[-1] == "00:05"
+    assert centre.departs_island[-1] == 24 * 60 + 5
+    with open(OUTPUT_PATH, "rb") as f:
+        output = f.read()
+    assert ScheduleWriter.to_json(load_schedules(path=OUTPUT_PATH)) == output
+
+
+def stream_write(schedules: Schedules, directory: str) -> None:
+    ScheduleWriter.write(
+        schedules, json_path=os.path.join(directory, "schedule.json"), artifacts=["gz"]
+    )
+
+
+def traced(function: Callable[[], object]) -> Tuple[float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of the streaming and dict-based writers"
+    )
+    parser.add_argument("--years", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    check_fixtures()
+
+    rng = random.Random(0)
+    timetables = Timetables()
+    for year in range(args.years):
+        timetables.schedules.extend(synthetic_year(2000 + year, rng).schedules)
+    schedules = timetables_to_schedules(timetables)
+
+    with tempfile.TemporaryDirectory() as legacy, tempfile.TemporaryDirectory() as new:
+        legacy_seconds, legacy_peak = traced(lambda: legacy_write(schedules, legacy))
+        stream_seconds, stream_peak = traced(lambda: stream_write(schedules, new))
+        for name in ("schedule.json", "schedule.json.gz"):
+            with open(os.path.join(legacy, name), "rb") as f:
+                expected = f.read()
+            with open(os.path.join(new, name), "rb") as f:
+                actual = f.read()
+            if name.endswith(".gz"):
+                expected, actual = gzip.decompress(expected), gzip.decompress(actual)
+            assert expected == actual, f"{name} differs from the dict-based writer"
+        size = os.path.getsize(os.path.join(new, "schedule.json"))
+
+    print(f"schedules:          {len(schedules.schedules)}")
+    print(f"schedule.json:      {size / 1024:.0f} KiB")
+    print(
+        f"dict-based writer:  {legacy_seconds * 1000:.0f} ms, "
+        f"peak {legacy_peak / 1024:.0f} KiB"
+    )
+    print(
+        f"streaming writer:   {stream_seconds * 1000:.0f} ms, "
+        f"peak {stream_peak / 1024:.0f} KiB"
+    )
+    assert stream_peak <= STREAM_PEAK_BUDGET, (
+        f"streaming writer peaked at {stream_peak} bytes, "
+        f"budget {STREAM_PEAK_BUDGET}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import datetime
+import html
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures")
+MONTHS = [datetime.date(2000, month, 1).strftime("%B") for month in range(1, 13)]
+
+# Times are "HH:MM" strings in service-day minutes: sailings after midnight
+# run past "24:00" here, though the page and schedule.json show clock times.
+Rows = List[Tuple[str, str]]
+
+
+def format_page_time(time: str) -> str:
+    hour, minute = (int(part) for part in time.split(":"))
+    hour %= 24
+    if (hour, minute) == (12, 0):
+        return "noon"
+    suffix = "a.m." if hour < 12 else "p.m."
+    return f"{hour % 12 or 12}:{minute:02d} {suffix}"
+
+
+def render_table(*, caption: str, location: str, rows: Rows, strong: bool) -> str:
+    header = f"Departs {location}"
+    if strong:
+        header = f"<strong>{header}</strong>"
+    body = "".join(
+        f"\n<tr>\n<td>{format_page_time(city)}</td>\n"
+        f"<td>{format_page_time(island)}</td>\n</tr>"
+        for city, island in rows
+    )
+    return (
+        '<table class="cot-table">\n'
+        f"<caption>{html.escape(caption, quote=False)}</caption>\n"
+        '<thead>\n<tr>\n<th scope="col">Departs City</th>\n'
+        f'<th scope="col">{header}</th>\n</tr>\n</thead>\n'
+        f"<tbody>{body}\n</tbody>\n</table>"
+    )
+
+
+def render_section(
+    *, season: str, start: Optional[datetime.date], locations: Dict[str, Rows]
+) -> str:
+    if start is None:
+        caption = f"{season.capitalize()} schedule to be announced"
+    else:
+        caption = (
+            f"{season.capitalize()} ferry schedule, effective "
+            f"{MONTHS[start.month - 1]} {start.day}, {start.year}"
+        )
+    tables = "\n".join(
+        render_table(caption=caption, location=location, rows=rows, strong=i % 2 == 1)
+        for i, (location, rows) in enumerate(locations.items())
+    )
+    return (
+        f'<div class="accordion-item">\n<h2 class="accordion-header">'
+        f'<button aria-controls="accordion-{season}-schedule">'
+        f"{season.capitalize()} Schedule</button></h2>\n"
+        f'<div id="accordion-{season}-schedule" class="accordion-collapse collapse">\n'
+        '<div class="accordion-body">\n'
+        f"<p>Ferry service for the {season} season.</p>\n{tables}\n</div>\n</div>\n</div>"
+    )
+
+
+def render_chrome(*, seed: int, links: int, paragraphs: int) -> Tuple[str, str]:
+    # Stand-in for the toronto.ca header, navigation, scripts and footer that
+    # surround the schedule accordion on the real page.
+    rng = random.Random(seed)
+    words = (
+        "city toronto park island ferry service residents visitors program "
+        "information permit beach garden recreation community council"
+    ).split()
+    nav = "\n".join(
+        f'<li class="nav-item"><a href="/explore-enjoy/{rng.choice(words)}-{i}/">'
+        f"{rng.choice(words).capitalize()} {rng.choice(words)}</a></li>"
+        for i in range(links)
+    )
+    text = "\n".join(
+        "<p>" + " ".join(rng.choice(words) for _ in range(60)) + ".</p>"
+        for _ in range(paragraphs)
+    )
+    script = "var cot = {" + ",".join(f'"k{i}": {i}' for i in range(400)) + "};"
+    head = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+        "<title>All Ferry Schedules – City of Toronto</title>\n"
+        f"<script>{script}</script>\n</head>\n<body>\n<header>\n<nav><ul>\n{nav}\n"
+        '</ul></nav>\n</header>\n<main id="main">\n<h1>All Ferry Schedules</h1>\n'
+        f'{text}\n<div class="accordion" id="accordion">\n'
+    )
+    foot = (
+        f"</div>\n</main>\n<footer>\n<ul>\n{nav}\n</ul>\n{text}\n</footer>\n"
+        "</body>\n</html>\n"
+    )
+    return head, foot
+
+
+def render_page(
+    *,
+    sections: List[Tuple[str, Optional[datetime.date], Dict[str, Rows]]],
+    seed: int = 0,
+    links: int = 300,
+    paragraphs: int = 40,
+) -> str:
+    head, foot = render_chrome(seed=seed, links=links, paragraphs=paragraphs)
+    body = "\n".join(
+        render_section(season=season, start=start, locations=locations)
+        for season, start, locations in sections
+    )
+    return head + body + foot
+
+
+def sailings(*, first: str, last: str, headway: int, offset: int) -> Rows:
+    first_hour, first_minute = (int(part) for part in first.split(":"))
+    last_hour, last_minute = (int(part) for part in last.split(":"))
+    rows = []
+    for minute in range(
+        first_hour * 60 + first_minute, last_hour * 60 + last_minute + 1, headway
+    ):
+        island = minute + offset
+        rows.append(
+            (
+                f"{minute // 60:02d}:{minute % 60:02d}",
+                f"{island // 60:02d}:{island % 60:02d}",
+            )
+        )
+    return rows
+
+
+def recorded_sections() -> List[Tuple[str, Optional[datetime.date], Dict[str, Rows]]]:
+    # Mirrors output/schedule.json: only the winter table carries a start date.
+    with open(
+        os.path.join(os.path.dirname(__file__), "../../../output/schedule.json"),
+        encoding="utf-8",
+    ) as f:
+        winter = json.load(f)["schedules"][0]
+    locations = {
+        location: list(zip(times["departsCity"], times["departsIsland"]))
+        for location, times in winter["locations"].items()
+    }
+    start = datetime.date(**winter["start"])
+    return [
+        (season, start if season == "winter" else None, locations)
+        for season in ["spring", "summer", "fall", "winter"]
+    ]
+
+
+def full_year_sections() -> List[Tuple[str, Optional[datetime.date], Dict[str, Rows]]]:
+    def locations(first: str, last: str, headway: int) -> Dict[str, Rows]:
+        return {
+            "Ward’s Island": sailings(
+                first=first, last=last, headway=headway, offset=15
+            ),
+            "Centre Island": sailings(
+                first="08:00", last=last, headway=headway, offset=20
+            ),
+            "Hanlan’s Point": sailings(
+                first="08:45", last="22:45", headway=headway * 2, offset=15
+            ),
+        }
+
+    return [
+        ("spring", datetime.date(2025, 4, 11), locations("06:30", "23:15", 30)),
+        ("summer", datetime.date(2025, 5, 16), locations("06:30", "23:45", 15)),
+        ("fall", datetime.date(2025, 9, 2), locations("06:30", "23:15", 30)),
+        ("winter", datetime.date(2024, 10, 15), locations("06:30", "23:30", 45)),
+    ]
+
+
+def large_sections(
+    *, locations: int = 16, headway: int = 3
+) -> List[Tuple[str, Optional[datetime.date], Dict[str, Rows]]]:
+    # Far bigger than the real page: every season has many docks and a
+    # sailing every few minutes, a few thousand rows per season.
+    def season_locations(offset: int) -> Dict[str, Rows]:
+        return {
+            f"Dock {number + 1}": sailings(
+                first="05:00",
+                last="23:30",
+                headway=headway + number % 3,
+                offset=offset + number % 10,
+            )
+            for number in range(locations)
+        }
+
+    return [
+        ("spring", datetime.date(2025, 4, 11), season_locations(10)),
+        ("summer", datetime.date(2025, 5, 16), season_locations(12)),
+        ("fall", datetime.date(2025, 9, 2), season_locations(14)),
+        ("winter", datetime.date(2024, 10, 15), season_locations(16)),
+    ]
+
+
+def render_irregular_section() -> str:
+    # Layouts the header-driven extractor must cope with: a notes column, a
+    # header row in <tbody> with no <thead>, a "no service" row spanning both
+    # directions, a rowspanned island departure, a sailing after midnight
+    # and an extra trailing column.
+    return (
+        '<div id="accordion-spring-schedule" class="accordion-collapse collapse">\n'
+        '<table class="cot-table">\n'
+        "<caption>Spring ferry schedule, effective April 11, 2025</caption>\n"
+        "<thead>\n<tr>\n<th>Notes</th>\n<th>Departs City</th>\n"
+        "<th><strong>Departs Ward’s\nIsland</strong></th>\n</tr>\n</thead>\n"
+        "<tbody>\n"
+        '<tr><td rowspan="2">Weekdays</td><td>6:30 a.m.</td><td>6:45 a.m.</td></tr>\n'
+        '<tr><td>7:00 a.m.</td><td rowspan="2">7:20 a.m.</td></tr>\n'
+        "<tr><td>Express</td><td>7:10 a.m.</td></tr>\n"
+        '<tr><td></td><td colspan="2">No service, dock maintenance</td></tr>\n'
+        "<tr><td></td><td>noon</td><td>–</td></tr>\n"
+        "<tr><td></td><td>11:30 p.m.</td><td>11:45 p.m.</td></tr>\n"
+        "<tr><td></td><td>11:50 p.m.</td><td>12:10 a.m.</td></tr>\n"
+        "</tbody>\n</table>\n"
+        '<table class="cot-table">\n'
+        "<caption>Spring ferry schedule, effective April 11, 2025</caption>\n"
+        "<tr><th>Departs Centre Island</th><th>Departs City</th>"
+        '<th colspan="2">Accessible</th></tr>\n'
+        "<tr><td>8:15 a.m.</td><td>8:00 a.m.</td><td>Yes</td><td></td></tr>\n"
+        "<tr><td>8:45 a.m.</td><td>8:30 a.m.</td><td>No</td><td></td></tr>\n"
+        "</table>\n</div>"
+    )
+
+
+IRREGULAR_FIXTURE = "all-ferry-schedules-irregular.html"
+IRREGULAR_EXPECTED = {
+    "Ward’s Island": {
+        "departsCity": ["06:30", "07:00", "07:10", "12:00", "23:30", "23:50"],
+        "departsIsland": ["06:45", "07:20", "23:45", "24:10"],
+    },
+    "Centre Island": {
+        "departsCity": ["08:00", "08:30"],
+        "departsIsland": ["08:15", "08:45"],
+    },
+}
+
+
+FIXTURES = {
+    "all-ferry-schedules-2024-10.html": recorded_sections,
+    "all-ferry-schedules-full-year.html": full_year_sections,
+}
+# schedule.json for the full-year page as the original generator wrote it,
+# locations sorted. Recorded once, not rewritten by main(): the output
+# format must not change.
+FULL_YEAR_JSON = "all-ferry-schedules-full-year.json"
+
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURES_DIRECTORY, name)
+
+
+def load_fixture(name: str) -> str:
+    with open(fixture_path(name), encoding="utf-8") as f:
+        return f.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regenerate the HTML fixtures")
+    parser.parse_args()
+    os.makedirs(FIXTURES_DIRECTORY, exist_ok=True)
+    for name, sections in FIXTURES.items():
+        with open(fixture_path(name), "w", encoding="utf-8") as f:
+            f.write(render_page(sections=sections()))
+        print(f"Wrote {fixture_path(name)}")
+    head, foot = render_chrome(seed=0, links=10, paragraphs=2)
+    with open(fixture_path(IRREGULAR_FIXTURE), "w", encoding="utf-8") as f:
+        f.write(head + render_irregular_section() + foot)
+    print(f"Wrote {fixture_path(IRREGULAR_FIXTURE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List, Tuple
+from urllib.parse import quote
+
+from benchmarks.fixtures import load_fixture
+from json_schedule_generator import JsonScheduleGenerator
+from models.proto.schedules_pb2 import Schedules
+from schedule_api import ScheduleApi, serve, start_server
+from schedule_scraper import ScheduleScraper
+from schedule_writer import write_atomic
+from timetable import timetables_to_schedules
+
+HOST = "127.0.0.1"
+RELOADED = " (reloaded)"
+
+
+def run_server(path: str, port: int, ports: "multiprocessing.Queue[int]") -> None:
+    # The server as deployed: the real clock, and watch() reloading the file.
+    logging.disable(logging.INFO)
+    asyncio.run(serve(host=HOST, port=port, path=path, ready=ports.put))
+
+
+async def fetch(port: int, request: bytes) -> Tuple[int, bytes]:
+    # One request on its own connection, read until the server closes it.
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+async def get(port: int, target: str) -> Tuple[int, bytes]:
+    return await fetch(
+        port, f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+    )
+
+
+async def client(port: int, targets: List[str], latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    for target in targets:
+        started = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+        await writer.drain()
+        status = await reader.readline()
+        assert status.split()[1] == b"200", (target, status)
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                content_length = int(line.split(b":")[1])
+        await reader.readexactly(content_length)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def reload_partway(
+    port: int, path: str, schedules: Schedules, latencies: List[float], after: int
+) -> Tuple[int, float]:
+    # Rewrites the file with renamed schedules once after requests have been
+    # answered, then polls /routes until the new name is served. Returns the
+    # requests answered by then and the seconds it took.
+    while len(latencies) < after:
+        await asyncio.sleep(0.001)
+    for schedule in schedules.schedules:
+        schedule.name += RELOADED
+    write_atomic(path, schedules.SerializeToString())
+    touched = time.perf_counter()
+    deadline = touched + 5 * ScheduleApi.RELOAD_INTERVAL
+    while time.perf_counter() < deadline:
+        _, body = await get(port, "/routes")
+        if (json.loads(body)["schedule"] or "").endswith(RELOADED):
+            return len(latencies), time.perf_counter() - touched
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{path} was not reloaded")
+
+
+async def load_test(
+    args: argparse.Namespace, port: int, path: str, schedules: Schedules
+) -> Tuple[int, float, List[float], Tuple[int, float]]:
+    status, body = await get(port, "/routes")
+    assert status == 200, body
+    routes = json.loads(body)["routes"]
+    assert routes, "no routes today"
+    targets = ["/routes"] + [
+        f"/next?location={quote(route['location'])}"
+        f"&direction={route['direction']}&n={n}"
+        for route in routes
+        for n in (1, 3, 5)
+    ]
+    rng = random.Random(0)
+    per_client = args.requests // args.connections
+    latencies: List[float] = []
+    reload = asyncio.create_task(
+        reload_partway(port, path, schedules, latencies, args.requests // 2)
+    )
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(port, [rng.choice(targets) for _ in range(per_client)], latencies)
+            for _ in range(args.connections)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    return len(latencies), elapsed, latencies, await reload
+
+
+async def check_errors(port: int, directory: str) -> None:
+    # A malformed request line is answered, not dropped.
+    status, _ = await fetch(port, b"GARBAGE\r\n\r\n")
+    assert status == 400, status
+    # Until the schedules load, requests get 503.
+    api = ScheduleApi(path=os.path.join(directory, "missing.pb"))
+    server = await start_server(api, host=HOST, port=0)
+    status, _ = await get(server.sockets[0].getsockname()[1], "/routes")
+    server.close()
+    await server.wait_closed()
+    assert status == 503, status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the schedule API")
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    # check_errors starts a server without its file, which logs a warning.
+    logging.disable(logging.WARNING)
+
+    soup = ScheduleScraper.parse_schedules(
+        body=load_fixture("all-ferry-schedules-full-year.html")
+    )
+    schedules = timetables_to_schedules(
+        JsonScheduleGenerator.create_timetables(schedules_soup=soup)
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schedule.pb")
+        write_atomic(path, schedules.SerializeToString())
+        ports: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=run_server, args=(path, args.port, ports), daemon=True
+        )
+        server.start()
+        try:
+            port = ports.get(timeout=10)
+            asyncio.run(check_errors(port, directory))
+            count, elapsed, latencies, (answered, reload_seconds) = asyncio.run(
+                load_test(args, port, path, schedules)
+            )
+            assert answered < count, "the reload was only served after the load"
+        finally:
+            server.terminate()
+            server.join()
+
+    latencies.sort()
+    print(f"requests:     {count}")
+    print(f"connections:  {args.connections}")
+    print(f"requests/sec: {count / elapsed:.0f}")
+    print(f"p50 latency:  {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"p99 latency:  {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    print(f"max latency:  {latencies[-1] * 1000:.2f} ms")
+    print(
+        f"reload:       served {reload_seconds * 1000:.0f} ms after the file "
+        f"changed, {answered} requests in"
+    )
+
+
+if __name__ == "__main__":
+    main()
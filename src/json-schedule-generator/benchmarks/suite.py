@@ -0,0 +1,275 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.bench_archive import synthetic_year
+from benchmarks.fixtures import FIXTURES, large_sections, load_fixture, render_page
+from json_schedule_generator import JsonScheduleGenerator
+from models.proto.schedules_pb2 import ScheduleTimetable
+from schedule_query import ScheduleIndex
+from schedule_scraper import ScheduleScraper
+from schedule_writer import ScheduleWriter
+from timetable import DIRECTIONS, Timetable, timetables_to_schedules
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+THRESHOLD = 25.0
+MIN_SAMPLE_SECONDS = 0.05
+QUERIES = 10_000
+
+# A case builds its inputs once and returns the callable that is timed.
+Case = Callable[[], Callable[[], object]]
+
+
+def pages() -> Dict[str, str]:
+    bodies = {name[: -len(".html")]: load_fixture(name) for name in FIXTURES}
+    bodies["synthetic-large"] = render_page(sections=large_sections())
+    return bodies
+
+
+def parse_case(body: str, targeted: bool) -> Case:
+    return lambda: lambda: ScheduleScraper.parse_schedules(body=body, targeted=targeted)
+
+
+def create_case(body: str) -> Case:
+    def setup() -> Callable[[], object]:
+        soup = ScheduleScraper.parse_schedules(body=body)
+        return lambda: JsonScheduleGenerator.create_schedules(schedules_soup=soup)
+
+    return setup
+
+
+def end_dates_case(years: int) -> Case:
+    def setup() -> Callable[[], object]:
+        rng = random.Random(0)
+        schedules = [
+            schedule
+            for year in range(2000, 2000 + years)
+            for schedule in synthetic_year(year, rng).schedules
+        ]
+        rng.shuffle(schedules)
+
+        def populate() -> None:
+            copies = []
+            for schedule in schedules:
+                copy = ScheduleTimetable()
+                copy.name = schedule.name
+                copy.start.CopyFrom(schedule.start)
+                copies.append(copy)
+            JsonScheduleGenerator._populate_end_dates(schedules=copies)
+
+        return populate
+
+    return setup
+
+
+def serialize_json_case(body: str) -> Case:
+    def setup() -> Callable[[], object]:
+        schedules = JsonScheduleGenerator.create_schedules(
+            schedules_soup=ScheduleScraper.parse_schedules(body=body)
+        )
+        return lambda: ScheduleWriter.to_json(schedules)
+
+    return setup
+
+
+def serialize_pb_case(body: str) -> Case:
+    def setup() -> Callable[[], object]:
+        schedules = JsonScheduleGenerator.create_schedules(
+            schedules_soup=ScheduleScraper.parse_schedules(body=body)
+        )
+        return schedules.SerializeToString
+
+    return setup
+
+
+def query_case(body: str) -> Case:
+    def setup() -> Callable[[], object]:
+        timetables = JsonScheduleGenerator.create_timetables(
+            schedules_soup=ScheduleScraper.parse_schedules(body=body)
+        )
+        index = ScheduleIndex.from_timetables(timetables)
+        rng = random.Random(0)
+        routes = [
+            (location, direction)
+            for schedule in timetables.schedules
+            for location in schedule.locations
+            for direction in DIRECTIONS
+        ]
+        queries = [
+            (
+                *rng.choice(routes),
+                datetime.datetime(2025, 1, 1)
+                + datetime.timedelta(minutes=rng.randrange(365 * 24 * 60)),
+            )
+            for _ in range(QUERIES)
+        ]
+
+        def run_queries() -> None:
+            for location, direction, at in queries:
+                index.next_departures(location, direction, at=at, n=3)
+
+        return run_queries
+
+    return setup
+
+
+def index_case(body: str) -> Case:
+    def setup() -> Callable[[], object]:
+        schedules = timetables_to_schedules(
+            JsonScheduleGenerator.create_timetables(
+                schedules_soup=ScheduleScraper.parse_schedules(body=body)
+            )
+        )
+        return lambda: ScheduleIndex(
+            Timetable.from_schedule(schedule) for schedule in schedules.schedules
+        )
+
+    return setup
+
+
+def cases() -> Dict[str, Case]:
+    suite: Dict[str, Case] = {}
+    for page, body in pages().items():
+        suite[f"parse.targeted[{page}]"] = parse_case(body, targeted=True)
+        suite[f"parse.full[{page}]"] = parse_case(body, targeted=False)
+        suite[f"create_schedules[{page}]"] = create_case(body)
+        suite[f"serialize.json[{page}]"] = serialize_json_case(body)
+        suite[f"serialize.pb[{page}]"] = serialize_pb_case(body)
+        suite[f"query.index[{page}]"] = index_case(body)
+        suite[f"query.next_departures_x{QUERIES}[{page}]"] = query_case(body)
+    suite["populate_end_dates[100 seasons]"] = end_dates_case(25)
+    return suite
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    # Like timeit: enough loops per sample to last MIN_SAMPLE_SECONDS, and
+    # the best sample, which is the least noisy figure for comparisons.
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        if time.perf_counter() - started >= MIN_SAMPLE_SECONDS or loops >= 1000:
+            break
+        loops *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        best = min(best, (time.perf_counter() - started) / loops)
+    return best
+
+
+def calibration_case() -> Callable[[], object]:
+    # A fixed pure-Python workload timed with every run and saved with the
+    # baseline. Results are compared relative to it, so a baseline saved on
+    # one machine still flags regressions, not slower hardware, on another.
+    rng = random.Random(0)
+    rows = [
+        {"minutes": rng.randrange(24 * 60), "location": f"Dock {i % 16}"}
+        for i in range(2000)
+    ]
+    return lambda: json.dumps(
+        sorted(rows, key=lambda row: (row["location"], row["minutes"]))
+    )
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float,
+    *,
+    scale: float = 1.0,
+) -> List[str]:
+    # scale is this machine's calibration time over the baseline's.
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if seconds > before * scale * (1 + threshold / 100):
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the offline benchmark suite and compare with a baseline"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run cases whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save", action="store_true", help="write the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="percentage slower than the baseline that counts as a regression",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    baseline: Dict[str, float] = {}
+    baseline_calibration = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        baseline_calibration = saved.get("calibration")
+
+    calibration = measure(calibration_case(), args.repeat)
+    scale = calibration / baseline_calibration if baseline_calibration else 1.0
+    print(f"calibration: {calibration * 1000:.3f} ms, {scale:.2f}x the baseline's")
+    results: Dict[str, float] = {}
+    print(f"{'case':<58} {'ms':>10} {'baseline':>10} {'change':>8}")
+    for name, setup in cases().items():
+        if args.only and args.only not in name:
+            continue
+        seconds = measure(setup(), args.repeat)
+        results[name] = seconds
+        before = baseline.get(name)
+        # Baseline times are shown scaled to this machine.
+        before = before * scale if before else None
+        change = f"{(seconds / before - 1) * 100:+.0f}%" if before else "new"
+        print(
+            f"{name:<58} {seconds * 1000:>10.3f} "
+            f"{before * 1000 if before else float('nan'):>10.3f} {change:>8}"
+        )
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "calibration": calibration,
+                    # Cases not run this time keep their time, rescaled.
+                    "results": {
+                        **{name: before * scale for name, before in baseline.items()},
+                        **results,
+                    },
+                },
+                f,
+                indent=4,
+            )
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.threshold, scale=scale)
+    if regressions:
+        print(f"Regressions over {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
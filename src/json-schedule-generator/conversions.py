@@ -0,0 +1,81 @@
+import datetime
+import functools
+import re
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from models.proto.schedules_pb2 import Date
+
+TIME_PATTERN = re.compile(r"(1[0-2]|0?[1-9]):([0-5][0-9]) ([ap])\.m\.")
+MINUTES_PER_DAY = 24 * 60
+
+
+@functools.lru_cache(maxsize=1024)
+def time_to_minutes(time: str) -> int:
+    # Fast path for the "h:mm a.m."/"h:mm p.m."/"noon" cells on the page;
+    # anything else goes through strptime exactly as before.
+    if time.lower() == "noon":
+        return 12 * 60
+    match = TIME_PATTERN.fullmatch(time)
+    if match is not None:
+        hour, minute, meridiem = match.groups()
+        return (int(hour) % 12 + (12 if meridiem == "p" else 0)) * 60 + int(minute)
+    time = time.replace("a.m.", "AM").replace("p.m.", "PM")
+    time_obj = datetime.datetime.strptime(time, "%I:%M %p")
+    return time_obj.hour * 60 + time_obj.minute
+
+
+def service_day_minutes(minutes: Iterable[int]) -> List[int]:
+    # The page lists sailings after midnight last, as "12:15 a.m."; they
+    # belong to the same service day, so they are kept as minutes past that
+    # day's midnight (1455, written "24:15"). Only a drop of more than half
+    # a day counts as crossing midnight; smaller steps back are left for
+    # validation to report.
+    result: List[int] = []
+    offset = 0
+    for minute in minutes:
+        minute += offset
+        if not offset and result and result[-1] - minute > MINUTES_PER_DAY // 2:
+            offset = MINUTES_PER_DAY
+            minute += offset
+        result.append(minute)
+    return result
+
+
+def minutes_to_time(minutes: int) -> str:
+    # Service-day minutes past midnight come out as "24:15", as in GTFS.
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def minutes_to_am_pm(minutes: int) -> str:
+    # "hh:mm AM"/"hh:mm PM", as the website displays departures.
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def datetime_date_to_date(date: datetime.date) -> "Date":
+    from models.proto.schedules_pb2 import Date
+
+    if date is None:
+        return Date()
+    result = Date()
+    result.year = date.year
+    result.month = date.month
+    result.day = date.day
+    return result
+
+
+def date_to_datetime_date(date: "Date") -> datetime.date:
+    return datetime.date(year=date.year, month=date.month, day=date.day)
+
+
+def optional_date(date: "Date") -> Optional[datetime.date]:
+    # An empty Date() marks a schedule without a known end.
+    if date.year == 0:
+        return None
+    return date_to_datetime_date(date)
+
+
+def clock_to_minutes(time: str) -> int:
+    hour, minute = time.split(":")
+    return int(hour) * 60 + int(minute)
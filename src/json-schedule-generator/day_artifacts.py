@@ -0,0 +1,213 @@
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import configure_logging
+from schedule_writer import write_atomic
+from service_calendar import (
+    HORIZON_DAYS,
+    DayService,
+    ServiceCalendarIndex,
+    horizon,
+    load_calendar,
+)
+from timetable import (
+    DIRECTIONS,
+    SCHEDULES_HELP,
+    SCHEDULES_PATH,
+    Timetable,
+    load_timetables,
+)
+
+if TYPE_CHECKING:
+    from models.proto.schedules_pb2 import ServiceException
+
+LOGGER = logging.getLogger("day_artifacts")
+DEFAULT_PATH = "../../output/data"
+HASH_LENGTH = 16
+
+
+@dataclass
+class DayArtifactsReport:
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+class DayArtifacts:
+    # One small file per service day holding only the timetable in effect,
+    # holiday and event exceptions applied, so the website does no season or
+    # date arithmetic. Days with the same service have identical bytes;
+    # index.json lists each season's and each exception run's date range and
+    # content hash, which clients append as ?v= so day files can be cached
+    # forever.
+    @staticmethod
+    def write(
+        timetables: Iterable[Timetable],
+        *,
+        directory: str = DEFAULT_PATH,
+        exceptions: Iterable["ServiceException"] = (),
+        today: Optional[datetime.date] = None,
+        horizon_days: int = HORIZON_DAYS,
+    ) -> DayArtifactsReport:
+        index = ServiceCalendarIndex(timetables, exceptions)
+        days_directory = os.path.join(directory, "days")
+        os.makedirs(days_directory, exist_ok=True)
+        report = DayArtifactsReport()
+        days = set()
+        # Shared DayService objects are encoded once per run of days.
+        encoded: Dict[int, bytes] = {}
+        exception_runs = []
+        first, last = horizon(today, horizon_days)
+        for start, end, service in index.served_range(first, last):
+            data = encoded.get(id(service))
+            if data is None:
+                data = DayArtifacts.day(service.timetable, service.exceptions)
+                encoded[id(service)] = data
+            if service.exceptions:
+                exception_runs.append((start, end, service, data))
+            for offset in range((end - start).days + 1):
+                name = f"{(start + datetime.timedelta(days=offset)).isoformat()}.json"
+                days.add(name)
+                if write_if_changed(os.path.join(days_directory, name), data):
+                    report.written.append(name)
+                else:
+                    report.unchanged.append(name)
+        for name in sorted(os.listdir(days_directory)):
+            if name.endswith(".json") and name not in days:
+                os.unlink(os.path.join(days_directory, name))
+                report.removed.append(name)
+        write_if_changed(
+            os.path.join(directory, "index.json"),
+            DayArtifacts.index(
+                index.timetables, exception_runs, first=first, last=last
+            ),
+        )
+        LOGGER.info(
+            f"Day artifacts: {len(report.written)} written, "
+            f"{len(report.unchanged)} unchanged, {len(report.removed)} removed"
+        )
+        return report
+
+    @staticmethod
+    def day(timetable: Timetable, exceptions: Sequence[str] = ()) -> bytes:
+        day = {
+            "schedule": timetable.name,
+            "routes": [
+                {
+                    "location": location,
+                    "direction": direction,
+                    "departures": departures.direction(direction).tolist(),
+                }
+                for location, departures in timetable.locations.items()
+                for direction in DIRECTIONS
+            ],
+        }
+        if exceptions:
+            day["exceptions"] = list(exceptions)
+        return to_json(day)
+
+    @staticmethod
+    def index(
+        timetables: List[Timetable],
+        exception_runs: List[Tuple[datetime.date, datetime.date, DayService, bytes]],
+        *,
+        first: datetime.date,
+        last: datetime.date,
+    ) -> bytes:
+        # Season ranges are the start/end pairs from _populate_end_dates.
+        return to_json(
+            {
+                "version": 1,
+                "timezone": "America/Toronto",
+                "first": first.isoformat(),
+                "last": last.isoformat(),
+                "schedules": [
+                    {
+                        "name": timetable.name,
+                        "start": timetable.start.isoformat(),
+                        "end": timetable.end.isoformat() if timetable.end else None,
+                        "hash": content_hash(DayArtifacts.day(timetable)),
+                        "routes": routes(timetable),
+                    }
+                    for timetable in timetables
+                ],
+                "exceptions": [
+                    {
+                        "names": list(service.exceptions),
+                        "schedule": service.timetable.name,
+                        "start": start.isoformat(),
+                        "end": end.isoformat(),
+                        "hash": content_hash(data),
+                        "routes": routes(service.timetable),
+                    }
+                    for start, end, service, data in exception_runs
+                ],
+            }
+        )
+
+
+def routes(timetable: Timetable) -> List[dict]:
+    return [
+        {"location": location, "direction": direction}
+        for location in timetable.locations
+        for direction in DIRECTIONS
+    ]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def to_json(data: dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
+    return True
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write per-day timetables and data/index.json"
+    )
+    parser.add_argument(
+        "--schedules",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    parser.add_argument(
+        "--calendar", help="ServiceCalendar JSON with holiday and event exceptions"
+    )
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--today", type=datetime.date.fromisoformat)
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    if args.calendar:
+        exceptions = load_calendar(path=args.calendar).exceptions
+    else:
+        exceptions = ()
+    DayArtifacts.write(
+        load_timetables(path=args.schedules),
+        directory=args.output,
+        exceptions=exceptions,
+        today=args.today,
+        horizon_days=args.horizon_days,
+    )
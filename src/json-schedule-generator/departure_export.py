@@ -0,0 +1,184 @@
+import argparse
+import csv
+import io
+import os
+import time
+from itertools import repeat
+from typing import IO, Dict, Iterable, Iterator, List
+
+from metrics import METRICS, configure_logging
+from schedule_writer import ArtifactReport, ScheduleWriter, atomic_file
+from timetable import (
+    DIRECTIONS,
+    SCHEDULES_HELP,
+    SCHEDULES_PATH,
+    Timetable,
+    load_timetables,
+)
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# One row per departure, so nested schedule.json does not have to be
+# flattened by every notebook that loads it.
+COLUMNS = ["schedule", "start", "end", "location", "direction", "minute"]
+# Rows are handed to the writer in batches of about this many, so memory
+# stays flat however many archived timetables are exported.
+BATCH_ROWS = 1 << 14
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".csv": "csv"}
+
+Batch = Dict[str, list]
+
+
+def iter_batches(
+    timetables: Iterable[Timetable], *, size: int = BATCH_ROWS
+) -> Iterator[Batch]:
+    # Each (timetable, location, direction) is one run of rows that differ
+    # only in minute, so the other columns are filled with repeat().
+    batch: Batch = {column: [] for column in COLUMNS}
+    for timetable in timetables:
+        for location, departures in timetable.locations.items():
+            for direction in DIRECTIONS:
+                minutes = departures.direction(direction)
+                count = len(minutes)
+                batch["schedule"].extend(repeat(timetable.name, count))
+                batch["start"].extend(repeat(timetable.start, count))
+                batch["end"].extend(repeat(timetable.end, count))
+                batch["location"].extend(repeat(location, count))
+                batch["direction"].extend(repeat(direction, count))
+                batch["minute"].extend(minutes)
+            if len(batch["minute"]) >= size:
+                yield batch
+                batch = {column: [] for column in COLUMNS}
+    if batch["minute"]:
+        yield batch
+
+
+def departures_path(base: str) -> str:
+    # Parquet when pyarrow is installed, CSV otherwise.
+    return f"{base}.departures.{'parquet' if pyarrow is not None else 'csv'}"
+
+
+def export_departures(timetables: Iterable[Timetable], *, path: str) -> ArtifactReport:
+    extension = os.path.splitext(path)[1]
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Unknown departures format {extension!r}, expected one of "
+            f"{', '.join(FORMATS)}"
+        )
+    export_format = FORMATS[extension]
+    if export_format != "csv" and pyarrow is None:
+        raise ValueError(f"pyarrow is needed to write {path}")
+    started = time.perf_counter()
+    batches = iter_batches(timetables)
+    with atomic_file(path) as f:
+        if export_format == "csv":
+            rows = write_csv(batches, f)
+        else:
+            rows = write_arrow(batches, f, parquet=export_format == "parquet")
+    seconds = time.perf_counter() - started
+    METRICS.add("write.departures", seconds)
+    METRICS.count("departures.rows", rows)
+    return ScheduleWriter._report(path, os.path.getsize(path), seconds)
+
+
+def write_csv(batches: Iterable[Batch], f: IO[bytes]) -> int:
+    # Dates are ISO 8601 and an open-ended schedule has an empty end, which
+    # pandas and DuckDB both read back as missing.
+    rows = 0
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(
+            zip(
+                batch["schedule"],
+                batch["start"],
+                ["" if end is None else end for end in batch["end"]],
+                batch["location"],
+                batch["direction"],
+                batch["minute"],
+            )
+        )
+        rows += len(batch["minute"])
+    # Flushes without closing f, which atomic_file closes and renames.
+    text.detach()
+    return rows
+
+
+def arrow_schema() -> "pyarrow.Schema":
+    return pyarrow.schema(
+        [
+            ("schedule", pyarrow.string()),
+            ("start", pyarrow.date32()),
+            ("end", pyarrow.date32()),
+            ("location", pyarrow.string()),
+            ("direction", pyarrow.string()),
+            ("minute", pyarrow.int16()),
+        ]
+    )
+
+
+def write_arrow(batches: Iterable[Batch], f: IO[bytes], *, parquet: bool) -> int:
+    schema = arrow_schema()
+    if parquet:
+        import pyarrow.parquet
+
+        writer = pyarrow.parquet.ParquetWriter(f, schema, compression="zstd")
+    else:
+        import pyarrow.ipc
+
+        writer = pyarrow.ipc.new_file(f, schema)
+    rows = 0
+    with writer:
+        for batch in batches:
+            writer.write_batch(
+                pyarrow.record_batch(
+                    [
+                        pyarrow.array(batch[column], type=field.type)
+                        for column, field in zip(COLUMNS, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            rows += len(batch["minute"])
+    return rows
+
+
+def archived_timetables(path: str) -> List[Timetable]:
+    from schedule_archive import ScheduleArchive
+
+    with ScheduleArchive(path=path) as archive:
+        return archive.timetables()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export every departure as one row of a flat table"
+    )
+    parser.add_argument(
+        "output", help="file to write, ending in .parquet, .arrow or .csv"
+    )
+    parser.add_argument(
+        "--schedules",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    parser.add_argument(
+        "--archive",
+        help="export every timetable in this SQLite archive instead; archived "
+        "timetables have no end date",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    if args.archive:
+        timetables = archived_timetables(args.archive)
+    else:
+        timetables = load_timetables(path=args.schedules)
+    export_departures(timetables, path=args.output)
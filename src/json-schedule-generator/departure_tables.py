@@ -0,0 +1,97 @@
+import hashlib
+from array import array
+from typing import Dict, Iterable, Tuple
+
+from conversions import clock_to_minutes, minutes_to_time
+from models.proto.schedules_pb2 import CompactSchedules, Schedules
+from timetable import Departures, Timetable
+
+# Hex digits of SHA-256 used as a table key; collisions are checked, not
+# assumed away.
+KEY_LENGTH = 12
+
+
+def table_key(minutes: Iterable[int]) -> str:
+    text = ",".join(map(str, minutes))
+    return hashlib.sha256(text.encode("ascii")).hexdigest()[:KEY_LENGTH]
+
+
+class DepartureTables:
+    # Content-addressed departure lists: each distinct list of minutes is
+    # kept once, under table_key of its contents.
+    def __init__(self) -> None:
+        self.tables: Dict[str, array] = {}
+        self.references = 0
+
+    def intern(self, minutes: Iterable[int]) -> Tuple[str, array]:
+        minutes = array("H", minutes)
+        key = table_key(minutes)
+        self.references += 1
+        stored = self.tables.get(key)
+        if stored is None:
+            self.tables[key] = minutes
+            return key, minutes
+        if stored != minutes:
+            raise ValueError(f"Departure table key collision on {key}")
+        return key, stored
+
+    def intern_timetable(self, timetable: Timetable) -> Timetable:
+        # Identical lists across seasons and docks end up as one shared
+        # array; Departures never mutates its arrays, so sharing is safe.
+        locations = {}
+        for location, departures in timetable.locations.items():
+            shared = Departures()
+            _, shared.departs_city = self.intern(departures.departs_city)
+            _, shared.departs_island = self.intern(departures.departs_island)
+            locations[location] = shared
+        return Timetable(
+            name=timetable.name,
+            start=timetable.start,
+            end=timetable.end,
+            locations=locations,
+        )
+
+
+def compact_schedules(schedules: Schedules) -> CompactSchedules:
+    tables = DepartureTables()
+    compact = CompactSchedules()
+    for schedule in schedules.schedules:
+        compact_schedule = compact.schedules.add()
+        compact_schedule.name = schedule.name
+        compact_schedule.start.CopyFrom(schedule.start)
+        compact_schedule.end.CopyFrom(schedule.end)
+        for location, location_schedule in schedule.locations.items():
+            refs = compact_schedule.locations[location]
+            refs.departsCity, _ = tables.intern(
+                map(clock_to_minutes, location_schedule.departsCity)
+            )
+            refs.departsIsland, _ = tables.intern(
+                map(clock_to_minutes, location_schedule.departsIsland)
+            )
+    for key, minutes in tables.tables.items():
+        compact.tables[key].minutes.extend(minutes)
+    return compact
+
+
+def expand_schedules(compact: CompactSchedules) -> Schedules:
+    # Back to the schedule.json shape. Each table is formatted once, however
+    # many locations refer to it.
+    times = {
+        key: list(map(minutes_to_time, table.minutes))
+        for key, table in compact.tables.items()
+    }
+    schedules = Schedules()
+    for compact_schedule in compact.schedules:
+        schedule = schedules.schedules.add()
+        schedule.name = compact_schedule.name
+        schedule.start.CopyFrom(compact_schedule.start)
+        schedule.end.CopyFrom(compact_schedule.end)
+        for location, refs in compact_schedule.locations.items():
+            for direction, key in (
+                ("departsCity", refs.departsCity),
+                ("departsIsland", refs.departsIsland),
+            ):
+                if key not in times:
+                    raise ValueError(f"{location} refers to missing table {key}")
+                getattr(schedule.locations[location], direction).extend(times[key])
+    return schedules
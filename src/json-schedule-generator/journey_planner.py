@@ -0,0 +1,208 @@
+import argparse
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from schedule_query import TORONTO, ScheduleIndex, at_minutes, toronto_time
+from timetable import SCHEDULES_HELP, SCHEDULES_PATH, Timetable, load_timetables
+
+# Minutes from a city departure until the boat is at the island dock.
+CROSSING_MINUTES = 15
+NO_RETURN = -1
+
+# (outbound location, return location)
+Pair = Tuple[str, str]
+
+
+@dataclass
+class RoundTrip:
+    outbound_location: str
+    outbound: datetime.datetime
+    return_location: str
+    returns: datetime.datetime
+    # Minutes on the island between arriving and the return sailing.
+    stay: int
+
+
+def earliest_returns(outbound: array, returns: array, offset: int) -> array:
+    # For every outbound departure, the first return departure at least
+    # offset minutes later. Both inputs are sorted, so one pointer into
+    # returns only ever moves forward: O(len(outbound) + len(returns)).
+    result = array("h")
+    j = 0
+    for departure in outbound:
+        while j < len(returns) and returns[j] < departure + offset:
+            j += 1
+        result.append(returns[j] if j < len(returns) else NO_RETURN)
+    return result
+
+
+class JourneyPlanner:
+    # City departures to one dock paired with island departures from any
+    # dock, which are all on the same island. For each timetable and each
+    # (outbound, return) pair, the earliest return reachable after the
+    # crossing is precomputed per outbound sailing, so the "next boat back"
+    # is a table lookup and longer stays are one bisect.
+    def __init__(
+        self,
+        timetables: Iterable[Timetable],
+        *,
+        crossing_minutes: int = CROSSING_MINUTES,
+    ) -> None:
+        self.index = ScheduleIndex(timetables)
+        self.crossing_minutes = crossing_minutes
+        self._outbound: List[Dict[str, array]] = []
+        self._returns: List[Dict[str, array]] = []
+        self._earliest: List[Dict[Pair, array]] = []
+        for timetable in self.index.timetables:
+            outbound = {
+                location: array("H", sorted(departures.departs_city))
+                for location, departures in timetable.locations.items()
+            }
+            returns = {
+                location: array("H", sorted(departures.departs_island))
+                for location, departures in timetable.locations.items()
+            }
+            self._outbound.append(outbound)
+            self._returns.append(returns)
+            self._earliest.append(
+                {
+                    (outbound_location, return_location): earliest_returns(
+                        outbound_times, return_times, crossing_minutes
+                    )
+                    for outbound_location, outbound_times in outbound.items()
+                    for return_location, return_times in returns.items()
+                }
+            )
+
+    @staticmethod
+    def load(*, path: str) -> "JourneyPlanner":
+        return JourneyPlanner(load_timetables(path=path))
+
+    def locations(self, date: datetime.date) -> List[str]:
+        position = self.index.position(date)
+        if position is None:
+            return []
+        return list(self._outbound[position])
+
+    def round_trip(
+        self,
+        location: str,
+        *,
+        at: datetime.datetime,
+        stay: int = 0,
+        return_location: Optional[str] = None,
+    ) -> Optional[RoundTrip]:
+        # Takes the first city sailing to location after at, and the
+        # first boat back from return_location (default: the same dock)
+        # that leaves at least stay minutes after arriving.
+        at = toronto_time(at)
+        first = self._first_outbound(location, at)
+        if first is None:
+            return None
+        position, date, i = first
+        if (return_location or location) not in self._returns[position]:
+            return None
+        return self._round_trip(
+            position, date, at, location, i, return_location or location, stay
+        )
+
+    def round_trips(
+        self, location: str, *, at: datetime.datetime, stay: int = 0
+    ) -> List[RoundTrip]:
+        # One option per return dock, earliest return first.
+        at = toronto_time(at)
+        first = self._first_outbound(location, at)
+        if first is None:
+            return []
+        position, date, i = first
+        trips = []
+        for return_location in self._returns[position]:
+            trip = self._round_trip(
+                position, date, at, location, i, return_location, stay
+            )
+            if trip is not None:
+                trips.append(trip)
+        return sorted(trips, key=lambda trip: trip.returns)
+
+    def _first_outbound(
+        self, location: str, at: datetime.datetime
+    ) -> Optional[Tuple[int, datetime.date, int]]:
+        # (position, service date, index) of the first city sailing to
+        # location after at, trying yesterday's sailings after midnight
+        # before today's. A sailing in the current minute has already left,
+        # as in ScheduleIndex.next_departures and splitTimes.
+        for position, date, now in self.index.service_days(at):
+            outbound_times = self._outbound[position].get(location)
+            if outbound_times is None:
+                continue
+            i = bisect_right(outbound_times, now)
+            if i < len(outbound_times):
+                return position, date, i
+        return None
+
+    def _round_trip(
+        self,
+        position: int,
+        date: datetime.date,
+        at: datetime.datetime,
+        location: str,
+        i: int,
+        return_location: str,
+        stay: int,
+    ) -> Optional[RoundTrip]:
+        departure = self._outbound[position][location][i]
+        if stay <= 0:
+            back = self._earliest[position][location, return_location][i]
+        else:
+            return_times = self._returns[position][return_location]
+            j = bisect_left(return_times, departure + self.crossing_minutes + stay)
+            back = return_times[j] if j < len(return_times) else NO_RETURN
+        if back == NO_RETURN:
+            return None
+        return RoundTrip(
+            outbound_location=location,
+            outbound=at_minutes(at, departure, date=date),
+            return_location=return_location,
+            returns=at_minutes(at, back, date=date),
+            stay=back - departure - self.crossing_minutes,
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Find the boats back for a trip to the island"
+    )
+    parser.add_argument("location", help="dock the outbound boat goes to")
+    parser.add_argument(
+        "--at",
+        type=datetime.datetime.fromisoformat,
+        help="take the first boat after this Toronto time (default: now)",
+    )
+    parser.add_argument(
+        "--stay", type=int, default=0, help="minutes to spend on the island"
+    )
+    parser.add_argument(
+        "--schedules",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    at = args.at or datetime.datetime.now(TORONTO)
+    trips = JourneyPlanner.load(path=args.schedules).round_trips(
+        args.location, at=at, stay=args.stay
+    )
+    if not trips:
+        print(f"No round trip to {args.location} from {at:%Y-%m-%d %H:%M}")
+    for trip in trips:
+        print(
+            f"{trip.outbound:%H:%M} to {trip.outbound_location}, "
+            f"back {trip.returns:%H:%M} from {trip.return_location} "
+            f"({trip.stay} minutes on the island)"
+        )
@@ -1,137 +1,329 @@
+import argparse
 import datetime
+import hashlib
 import json
 import logging
+import os
 import re
-from dataclasses import asdict
-from typing import Any, List, Optional, Tuple
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from bs4 import BeautifulSoup
-from google.protobuf import json_format
-from models.proto.schedules_pb2 import Date, LocationSchedule, Schedule, Schedules
+from conversions import (
+    date_to_datetime_date,
+    datetime_date_to_date,
+    minutes_to_time,
+    time_to_minutes,
+)
+from metrics import METRICS, configure_logging, profile
+from models.proto.schedules_pb2 import (
+    Date,
+    LocationSchedule,
+    LocationTimetable,
+    Schedules,
+    ScheduleTimetable,
+    Timetables,
+)
+from response_cache import ResponseCache
 from schedule_scraper import ScheduleScraper
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(filename)s (%(lineno)d) - %(levelname)s - %(message)s",
+from schedule_validation import (
+    ScheduleValidationError,
+    ValidationReport,
+    validate_timetables,
 )
+from schedule_writer import ARTIFACTS, ScheduleWriter, write_atomic
+from timetable import (
+    SCHEDULES_PATH,
+    Departures,
+    Timetable,
+    load_schedules,
+    load_timetables,
+    schedules_to_timetables,
+    timetables_to_schedules,
+)
+
+# bs4, the table extractor and sqlite3 are only imported on the paths that
+# parse or archive, so importing this module stays cheap.
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+    from schedule_sources import Source
+
 LOGGER = logging.getLogger("json_schedule_generator")
+OUTPUT_PATH = SCHEDULES_PATH
+PROTOBUF_PATH = "../../output/schedule.pb"
+MANIFEST_PATH = "../../output/schedule.manifest.json"
+ARCHIVE_PATH = "../../output/archive.sqlite3"
+PROFILE_PATH = "../../output/profile"
+DAYS_PATH = "../../output/data"
+SITE_PATH = "../../output/site"
+MONTHS = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+# Each optional lookahead finds the first month, day and year independently,
+# so one match() gives the same result as three separate re.search calls.
+DATE_PATTERN = re.compile(
+    r"(?:(?=.*?(?P<month>January|February|March|April|May|June|July|August|September|October|November|December)))?"
+    r"(?:(?=.*?\b(?P<day>[1-9]|[12][0-9]|3[01])\b))?"
+    r"(?:(?=.*?\b(?P<year>\d{4})\b))?",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@dataclass
+class ScheduleSection:
+    soup: "Tag"
+    tables: List["Tag"] = field(default_factory=list)
+    start: Optional[datetime.date] = None
+
+
+@dataclass
+class ScheduleChanges:
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    validation: ValidationReport = field(default_factory=ValidationReport)
+
+    @property
+    def any(self) -> bool:
+        return bool(self.changed or self.removed)
+
+    def summary(self) -> dict:
+        return {
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+        }
+
+
+@dataclass
+class GeneratorState:
+    # The last generated timetables and their section fingerprints, kept by
+    # long-running callers so each run starts from memory instead of the
+    # previous output on disk.
+    timetables: Optional[Timetables] = None
+    fingerprints: Optional[Dict[str, str]] = None
 
 
 class JsonScheduleGenerator:
     SEASONS = ["spring", "summer", "fall", "winter"]
+    SECTION_IDS = {f"accordion-{season}-schedule": season for season in SEASONS}
+
+    @staticmethod
+    def create_schedules(*, schedules_soup: "BeautifulSoup") -> Schedules:
+        return timetables_to_schedules(
+            JsonScheduleGenerator.create_timetables(schedules_soup=schedules_soup)
+        )
 
     @staticmethod
-    def create_schedules(*, schedules_soup: BeautifulSoup) -> Schedules:
+    def create_timetables(*, schedules_soup: "BeautifulSoup") -> Timetables:
+        timetables, changes = JsonScheduleGenerator.update_timetables(
+            schedules_soup=schedules_soup, track_changes=False
+        )
+        if not changes.validation.ok:
+            raise ScheduleValidationError(changes.validation)
+        return timetables
+
+    @staticmethod
+    def update_timetables(
+        *,
+        schedules_soup: "BeautifulSoup",
+        previous: Optional[Timetables] = None,
+        fingerprints: Optional[Dict[str, str]] = None,
+        track_changes: bool = True,
+    ) -> Tuple[Timetables, ScheduleChanges]:
+        # Seasons whose section fingerprint matches the manifest reuse the
+        # previous ScheduleTimetable instead of re-reading their tables.
+        # Serializing a section to fingerprint it costs more than reading its
+        # tables, so one-off conversions skip it with track_changes=False.
+        fingerprints = fingerprints or {}
+        previous_schedules = {
+            schedule.name: schedule
+            for schedule in (previous.schedules if previous is not None else [])
+        }
+        with METRICS.span("generate.index_sections"):
+            sections = JsonScheduleGenerator._index_sections(
+                schedules_soup=schedules_soup
+            )
+        changes = ScheduleChanges()
         schedules_list = []
         for season in JsonScheduleGenerator.SEASONS:
+            section = sections.get(season)
+            if section is None:
+                if season in fingerprints:
+                    changes.removed.append(season)
+                continue
+            fingerprint = None
+            if track_changes:
+                with METRICS.span("generate.fingerprint"):
+                    fingerprint = JsonScheduleGenerator._fingerprint(section=section)
+                changes.fingerprints[season] = fingerprint
+            previous_schedule = previous_schedules.get(season.capitalize())
+            if fingerprint is not None and fingerprints.get(season) == fingerprint:
+                changes.unchanged.append(season)
+                if previous_schedule is not None:
+                    LOGGER.info(f"Reusing unchanged schedule for {season}")
+                    schedule = ScheduleTimetable()
+                    schedule.CopyFrom(previous_schedule)
+                    schedule.ClearField("end")
+                    schedules_list.append(schedule)
+                    METRICS.count("seasons.reused")
+                    continue
+            else:
+                changes.changed.append(season)
             LOGGER.info(f"Creating schedule for {season}")
-            table_id = f"accordion-{season}-schedule"
-            schedule_soup = schedules_soup.find(id=table_id)
-            if not JsonScheduleGenerator._is_valid_schedule(
-                schedule_soup=schedule_soup
-            ):
+            if not JsonScheduleGenerator._is_valid_schedule(section=section):
+                changes.validation.warning(
+                    "no-start-date",
+                    f"{season.capitalize()} has no start date in its caption and "
+                    "was left out",
+                    schedule=season.capitalize(),
+                )
                 continue
-            schedules_list.append(
-                JsonScheduleGenerator._create_schedule(schedule_soup=schedule_soup)
-            )
+            # A table the extractor cannot read is reported with the rest
+            # of the validation issues rather than ending the run.
+            try:
+                with METRICS.span("generate.tables"):
+                    schedule = JsonScheduleGenerator._create_schedule(section=section)
+            except ValueError as error:
+                changes.validation.error(
+                    "table-format", str(error), schedule=season.capitalize()
+                )
+                continue
+            schedules_list.append(schedule)
+            METRICS.count("seasons.created")
         LOGGER.info("Created all schedules")
-        JsonScheduleGenerator._populate_end_dates(schedules=schedules_list)
-        schedules = Schedules()
-        schedules.schedules.extend(schedules_list)
-        return schedules
+        with METRICS.span("generate.end_dates"):
+            JsonScheduleGenerator._populate_end_dates(schedules=schedules_list)
+        timetables = Timetables()
+        timetables.schedules.extend(schedules_list)
+        with METRICS.span("generate.validate"):
+            validate_timetables(
+                timetables, previous=previous, report=changes.validation
+            )
+        return timetables, changes
 
     @staticmethod
-    def _is_valid_schedule(*, schedule_soup) -> bool:
-        table_soup = schedule_soup.find("table", class_="cot-table")
-        start = JsonScheduleGenerator._get_start_date(
-            schedule_caption=table_soup.contents[1].contents[0]
-        )
-        return start is not None
+    def _fingerprint(*, section: ScheduleSection) -> str:
+        normalized = " ".join(str(section.soup).split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
     @staticmethod
-    def _create_schedule(*, schedule_soup: BeautifulSoup) -> Schedule:
-        table_soup = schedule_soup.find("table", class_="cot-table")
+    def _index_sections(
+        *, schedules_soup: "BeautifulSoup"
+    ) -> Dict[str, ScheduleSection]:
+        from bs4 import Tag
+        from table_extractor import caption_text
+
+        # One walk over the document collects every season container and the
+        # cot-table tables nested inside it, in document order.
+        sections: Dict[str, ScheduleSection] = {}
+        for tag in schedules_soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            season = JsonScheduleGenerator.SECTION_IDS.get(tag.get("id"))
+            if season is not None:
+                sections.setdefault(season, ScheduleSection(soup=tag))
+            elif tag.name == "table" and "cot-table" in tag.get("class", ()):
+                for parent in tag.parents:
+                    season = JsonScheduleGenerator.SECTION_IDS.get(parent.get("id"))
+                    if season is not None:
+                        if sections[season].soup is parent:
+                            sections[season].tables.append(tag)
+                        break
+        for section in sections.values():
+            caption = caption_text(section.tables[0]) if section.tables else None
+            if caption is not None:
+                section.start = JsonScheduleGenerator._get_start_date(
+                    schedule_caption=caption
+                )
+        return sections
+
+    @staticmethod
+    def _is_valid_schedule(*, section: Optional[ScheduleSection]) -> bool:
+        return section is not None and section.start is not None
+
+    @staticmethod
+    def _create_schedule(*, section: ScheduleSection) -> ScheduleTimetable:
         locations = {}
-        for location_schedule_soup in schedule_soup.find_all(
-            "table", class_="cot-table"
-        ):
-            location, location_schedule = (
-                JsonScheduleGenerator._create_location_schedule(
+        for location_schedule_soup in section.tables:
+            location, location_timetable = (
+                JsonScheduleGenerator._create_location_timetable(
                     location_schedule_soup=location_schedule_soup
                 )
             )
-            locations[location] = location_schedule
-        schedule = Schedule()
-        schedule.name = schedule_soup.get("id").split("-")[1].capitalize()
-        schedule.start.CopyFrom(
-            datetime_date_to_date(
-                JsonScheduleGenerator._get_start_date(
-                    schedule_caption=table_soup.contents[1].contents[0]
-                )
-            )
-        )
-        for location, location_schedule in locations.items():
-            schedule.locations[location].CopyFrom(location_schedule)
+            locations[location] = location_timetable
+        schedule = ScheduleTimetable()
+        schedule.name = section.soup.get("id").split("-")[1].capitalize()
+        schedule.start.CopyFrom(datetime_date_to_date(section.start))
+        for location, location_timetable in locations.items():
+            schedule.locations[location].CopyFrom(location_timetable)
         return schedule
 
     @staticmethod
     def _get_start_date(*, schedule_caption: str) -> Optional[datetime.date]:
-        LOGGER.info("Finding start date")
+        LOGGER.debug("Finding start date")
         month, day, year = JsonScheduleGenerator.parse_date(schedule_caption)
         if any(info is None for info in [month, day, year]):
             return None
-        return datetime.datetime.strptime(f"{month} {day} {year}", "%B %d %Y").date()
+        return datetime.date(year, MONTHS.index(month.lower()) + 1, day)
 
     @staticmethod
     def parse_date(sentence) -> Tuple[Optional[str], Optional[int], Optional[int]]:
-        # Define the regex patterns for month, day, and year
-        month_pattern = r"(January|February|March|April|May|June|July|August|September|October|November|December)"
-        day_pattern = r"\b([1-9]|[12][0-9]|3[01])\b"
-        year_pattern = r"\b(\d{4})\b"
-
-        # Search for the patterns in the sentence
-        month_match = re.search(month_pattern, sentence, re.IGNORECASE)
-        day_match = re.search(day_pattern, sentence)
-        year_match = re.search(year_pattern, sentence)
-
-        # Extract the matched values
-        month = month_match.group(0) if month_match else None
-        day = int(day_match.group(0)) if day_match else None
-        year = int(year_match.group(0)) if year_match else None
-
-        return month, day, year
+        month, day, year = DATE_PATTERN.match(sentence).group("month", "day", "year")
+        return (
+            month,
+            int(day) if day is not None else None,
+            int(year) if year is not None else None,
+        )
 
     @staticmethod
     def _create_location_schedule(
         *,
-        location_schedule_soup: List[BeautifulSoup],
+        location_schedule_soup: "Tag",
     ) -> Tuple[str, LocationSchedule]:
-        location = (
-            location_schedule_soup.contents[3].contents[1].contents[3].contents[0]
+        location, location_timetable = JsonScheduleGenerator._create_location_timetable(
+            location_schedule_soup=location_schedule_soup
+        )
+        return (
+            location,
+            Departures.from_proto(location_timetable).to_location_schedule(),
         )
-        LOGGER.info(f"Creating location schedule for {location}")
-        if not isinstance(location, str):
-            location = location.contents[0]
-        location = " ".join(location.split()[1:])
-        rows = location_schedule_soup.contents[5].contents
-        departs_city = [
-            JsonScheduleGenerator._format_time(time=row.contents[1].contents[0])
-            for row in rows
-            if row != "\n"
-        ]
-        departs_island = [
-            JsonScheduleGenerator._format_time(time=row.contents[3].contents[0])
-            for row in rows
-            if row != "\n"
-        ]
-        location_schedule = LocationSchedule()
-        location_schedule.departsCity.extend(departs_city)
-        location_schedule.departsIsland.extend(departs_island)
-        return location, location_schedule
+
+    @staticmethod
+    def _create_location_timetable(
+        *,
+        location_schedule_soup: "Tag",
+    ) -> Tuple[str, LocationTimetable]:
+        from table_extractor import extract_location_timetable
+
+        location, location_timetable = extract_location_timetable(
+            location_schedule_soup
+        )
+        LOGGER.debug(f"Creating location schedule for {location}")
+        METRICS.count("tables")
+        METRICS.count(
+            "departures",
+            len(location_timetable.departsCity) + len(location_timetable.departsIsland),
+        )
+        return location, location_timetable
 
     @staticmethod
     def _populate_end_dates(*, schedules: List) -> None:
         LOGGER.info("Populating end dates for schedules")
+        if not schedules:
+            return
         schedules.sort(key=lambda schedule: date_to_datetime_date(schedule.start))
         for i in range(len(schedules) - 1):
             schedules[i].end.CopyFrom(
@@ -144,47 +336,401 @@ class JsonScheduleGenerator:
 
     @staticmethod
     def _format_time(*, time: str) -> str:
-        if time.lower() == "noon":
-            return "12:00"
-        time = time.replace("a.m.", "AM").replace("p.m.", "PM")
-        time_obj = datetime.datetime.strptime(time, "%I:%M %p")
-        return time_obj.strftime("%H:%M")
+        return minutes_to_time(time_to_minutes(time))
+
 
+def run(
+    *,
+    sources: Sequence["Source"] = (),
+    sources_path: Optional[str] = None,
+    **options,
+) -> Optional[ScheduleChanges]:
+    # Extra pages are fetched and parsed by a SourcePipeline while the
+    # schedules page is regenerated; options are generate()'s.
+    if not sources:
+        return generate(**options)
+    from concurrent.futures import ThreadPoolExecutor
 
-def datetime_date_to_date(date: datetime.date) -> Date:
-    if date is None:
-        return Date()
-    result = Date()
-    result.year = date.year
-    result.month = date.month
-    result.day = date.day
-    return result
+    from schedule_sources import SourcePipeline, write_report
 
+    if options.get("cache") is None and options.get("use_cache", True):
+        options["cache"] = ResponseCache()
+    pipeline = SourcePipeline(sources=sources, cache=options.get("cache"))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        tracked = executor.submit(pipeline.run)
+        try:
+            return generate(**options)
+        finally:
+            results = tracked.result()
+            if sources_path is not None:
+                write_report(sources_path, results)
 
-def date_to_datetime_date(date: Date) -> datetime.date:
-    return datetime.date(year=date.year, month=date.month, day=date.day)
 
+def generate(
+    *,
+    force: bool = False,
+    use_cache: bool = True,
+    artifacts: Sequence[str] = (),
+    summary_path: Optional[str] = None,
+    archive_path: Optional[str] = None,
+    days_path: Optional[str] = None,
+    site_path: Optional[str] = None,
+    calendar_path: Optional[str] = None,
+    url: str = ScheduleScraper.SCHEDULE_URL,
+    cache: Optional[ResponseCache] = None,
+    state: Optional[GeneratorState] = None,
+    validation_path: Optional[str] = None,
+) -> Optional[ScheduleChanges]:
+    if cache is None and use_cache:
+        cache = ResponseCache()
+    # schedule.pb is always written: the next run reuses it for seasons
+    # whose fingerprint is still in the manifest.
+    artifacts = [*artifacts, "pb"] if "pb" not in artifacts else list(artifacts)
+    # A requested output that is not on disk yet is written even when
+    # nothing changed.
+    missing = [
+        path
+        for path in ScheduleWriter.paths(OUTPUT_PATH, artifacts)
+        if not os.path.exists(path)
+    ]
+    result = ScheduleScraper.fetch_schedules(url=url, cache=cache)
+    if result.not_modified and not force and not missing:
+        LOGGER.info("Schedules page not modified, skipping regeneration")
+        if cache is not None and result.validators_changed:
+            cache.store(response=result.response)
+        if state is not None and state.timetables is None:
+            with METRICS.span("load_previous"):
+                state.timetables, state.fingerprints = load_previous_output()
+        if days_path is not None or site_path is not None:
+            # The day window still moves forward when the page does not.
+            if state is not None and state.timetables is not None:
+                timetables = [
+                    Timetable.from_proto(schedule)
+                    for schedule in state.timetables.schedules
+                ]
+            else:
+                timetables = load_timetables(path=OUTPUT_PATH)
+            write_days(
+                timetables,
+                days_path=days_path,
+                site_path=site_path,
+                calendar_path=calendar_path,
+            )
+        METRICS.log_summary()
+        return None
+    soup = ScheduleScraper.parse_schedules(
+        body=result.response.body, sections=result.sections
+    )
+    previous, fingerprints = None, None
+    if not force:
+        if state is not None and state.timetables is not None:
+            previous, fingerprints = state.timetables, state.fingerprints
+        else:
+            with METRICS.span("load_previous"):
+                previous, fingerprints = load_previous_output()
+    timetables, changes = JsonScheduleGenerator.update_timetables(
+        schedules_soup=soup, previous=previous, fingerprints=fingerprints
+    )
+    LOGGER.info(f"Schedule changes: {changes.summary()}")
+    for issue in changes.validation.warnings:
+        LOGGER.warning(f"Validation {issue.check}: {issue.message}")
+    if validation_path is not None:
+        write_atomic(
+            validation_path,
+            json.dumps(changes.validation.to_dict(), indent=4).encode("utf-8"),
+        )
+    if not changes.validation.ok:
+        # Nothing is written, and the response is not cached, so the last
+        # good output stays in place and the next run fetches the page again.
+        # The run still fails: the CLI exits 1 and the watcher logs the poll
+        # as failed.
+        for issue in changes.validation.errors:
+            LOGGER.error(f"Validation {issue.check}: {issue.message}")
+        LOGGER.error("Schedules failed validation, keeping the last good output")
+        METRICS.log_summary()
+        raise ScheduleValidationError(changes.validation)
+    if changes.any or force or missing:
+        if missing and not (changes.any or force):
+            LOGGER.info(f"Writing missing outputs: {', '.join(missing)}")
+        with METRICS.span("write"):
+            ScheduleWriter.write(
+                timetables_to_schedules(timetables),
+                json_path=OUTPUT_PATH,
+                artifacts=artifacts,
+            )
+        if archive_path is not None:
+            from schedule_archive import ScheduleArchive
 
-def custom_serializer(obj: Any) -> Any:
-    if isinstance(obj, Date):
-        return date_to_datetime_date(obj).isoformat()
+            with METRICS.span("archive"), ScheduleArchive(path=archive_path) as archive:
+                archive.append(timetables)
+        write_atomic(
+            MANIFEST_PATH,
+            json.dumps(
+                {"version": 1, "fingerprints": changes.fingerprints}, indent=4
+            ).encode("utf-8"),
+        )
+    else:
+        LOGGER.info("Schedule tables unchanged, skipping write")
+    if days_path is not None or site_path is not None:
+        write_days(
+            [Timetable.from_proto(schedule) for schedule in timetables.schedules],
+            days_path=days_path,
+            site_path=site_path,
+            calendar_path=calendar_path,
+        )
+    if summary_path is not None:
+        write_atomic(summary_path, json.dumps(changes.summary()).encode("utf-8"))
+    if cache is not None:
+        cache.store(response=result.response)
+    if state is not None:
+        state.timetables, state.fingerprints = timetables, changes.fingerprints
+    METRICS.log_summary()
+    return changes
 
 
-def run():
-    soup = ScheduleScraper.scrape_schedules()
-    schedules = JsonScheduleGenerator.create_schedules(schedules_soup=soup)
-    schedules_dict = json_format.MessageToDict(schedules)
-    schedules_string = json.dumps(
-        schedules_dict, ensure_ascii=False, default=custom_serializer, indent=4
+def write_days(
+    timetables: List[Timetable],
+    *,
+    days_path: Optional[str],
+    site_path: Optional[str],
+    calendar_path: Optional[str],
+) -> None:
+    exceptions = ()
+    if calendar_path is not None:
+        from service_calendar import load_calendar
+
+        exceptions = load_calendar(path=calendar_path).exceptions
+    if days_path is not None:
+        from day_artifacts import DayArtifacts
+
+        with METRICS.span("days"):
+            DayArtifacts.write(timetables, directory=days_path, exceptions=exceptions)
+    if site_path is not None:
+        from static_site import StaticSite
+
+        with METRICS.span("site"):
+            StaticSite.build(timetables, directory=site_path, exceptions=exceptions)
+
+
+def load_previous_output() -> Tuple[Optional[Timetables], Optional[Dict[str, str]]]:
+    # Unchanged seasons are copied from the last binary output when there is
+    # one, falling back to schedule.json.
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            fingerprints = json.load(f)["fingerprints"]
+        path = PROTOBUF_PATH if os.path.exists(PROTOBUF_PATH) else OUTPUT_PATH
+        previous = schedules_to_timetables(load_schedules(path=path))
+    except (OSError, ValueError, KeyError) as error:
+        LOGGER.info(f"No usable previous output, rebuilding everything: {error}")
+        return None, None
+    return previous, fingerprints
+
+
+def parse_args() -> argparse.Namespace:
+    from schedule_sources import parse_source
+
+    parser = argparse.ArgumentParser(description="Generate output/schedule.json")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="regenerate even if the schedules page has not changed",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not read or write the on-disk HTTP response cache",
+    )
+    parser.add_argument(
+        "--artifact",
+        action="append",
+        choices=ARTIFACTS,
+        default=[],
+        dest="artifacts",
+        help="also write schedule.min.json, schedule.compact.json (each distinct "
+        "departure list stored once), schedule.pb, schedule.departures.parquet "
+        "(or .csv without pyarrow; one row per departure), or .gz/.br siblings",
+    )
+    parser.add_argument(
+        "--summary",
+        dest="summary_path",
+        help="write the changed/unchanged/removed seasons as JSON to this path",
     )
-    schedules_string = schedules_string.replace("Departs_City", "Departs City").replace(
-        "Departs_Island", "Departs Island"
+    parser.add_argument(
+        "--validation-report",
+        dest="validation_path",
+        help="write the validation errors and warnings as JSON to this path",
     )
-    LOGGER.info(f"Created schedules string: {schedules_string}")
-    with open("../../output/schedule.json", "w") as f:
-        f.write(schedules_string)
-    LOGGER.info("Wrote schedules string to output/schedule.json")
+    parser.add_argument(
+        "--archive",
+        nargs="?",
+        const=ARCHIVE_PATH,
+        dest="archive_path",
+        help=f"append each new snapshot to a SQLite archive (default {ARCHIVE_PATH})",
+    )
+    parser.add_argument(
+        "--days",
+        nargs="?",
+        const=DAYS_PATH,
+        dest="days_path",
+        help="write per-day timetables and index.json to this directory "
+        f"(default {DAYS_PATH})",
+    )
+    parser.add_argument(
+        "--calendar",
+        dest="calendar_path",
+        help="apply the holiday and event exceptions in this ServiceCalendar "
+        "JSON to the --days and --site output",
+    )
+    parser.add_argument(
+        "--site",
+        nargs="?",
+        const=SITE_PATH,
+        dest="site_path",
+        help="pre-render the website's departure tables and routes.json to this "
+        f"directory (default {SITE_PATH})",
+    )
+    parser.add_argument(
+        "--expand",
+        dest="expand_path",
+        help="rewrite schedule.json from a schedule.compact.json or schedule.pb "
+        "and exit, without fetching",
+    )
+    parser.add_argument(
+        "--url",
+        default=ScheduleScraper.SCHEDULE_URL,
+        help="fetch the schedules page from this URL instead of toronto.ca",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        type=parse_source,
+        default=[],
+        dest="sources",
+        help="also fetch and summarize this NAME=URL page, concurrently with "
+        "the schedules page",
+    )
+    parser.add_argument(
+        "--sources-report",
+        dest="sources_path",
+        help="write per-source timings and summaries for --source pages as JSON",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running, polling the schedules page and regenerating when it "
+        "changes",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=5,
+        help="shortest --watch polling interval, in minutes",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=60,
+        help="longest --watch polling interval, in minutes",
+    )
+    parser.add_argument(
+        "--on-change-command",
+        action="append",
+        default=[],
+        help="in --watch mode, run this command with the change event as JSON "
+        "on stdin",
+    )
+    parser.add_argument(
+        "--on-change-webhook",
+        action="append",
+        default=[],
+        help="in --watch mode, POST the change event as JSON to this URL",
+    )
+    parser.add_argument(
+        "--on-change-socket",
+        action="append",
+        default=[],
+        help="in --watch mode, send the change event as a JSON line to this "
+        "Unix socket",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_PATH,
+        dest="profile_path",
+        help="write cProfile, tracemalloc and metrics.json reports to this "
+        f"directory (default {PROFILE_PATH})",
+    )
+    parser.add_argument(
+        "--log-output",
+        action="store_true",
+        help="log the full generated schedule.json at debug level",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    run()
+    configure_logging()
+    args = parse_args()
+    if args.log_output:
+        logging.getLogger("schedule_writer").setLevel(logging.DEBUG)
+
+    def run_with_args() -> Optional[ScheduleChanges]:
+        try:
+            return run(
+                force=args.force,
+                use_cache=not args.no_cache,
+                artifacts=args.artifacts,
+                summary_path=args.summary_path,
+                validation_path=args.validation_path,
+                archive_path=args.archive_path,
+                days_path=args.days_path,
+                site_path=args.site_path,
+                calendar_path=args.calendar_path,
+                url=args.url,
+                sources=args.sources,
+                sources_path=args.sources_path,
+            )
+        except ScheduleValidationError:
+            # The errors are already logged; the exit status fails the
+            # nightly workflow.
+            sys.exit(1)
+
+    if args.expand_path is not None:
+        ScheduleWriter.write(
+            load_schedules(path=args.expand_path), json_path=OUTPUT_PATH
+        )
+    elif args.watch:
+        from schedule_watcher import (
+            CommandHook,
+            PollPolicy,
+            SocketHook,
+            WebhookHook,
+            watch,
+        )
+
+        watch(
+            url=args.url,
+            policy=PollPolicy(
+                minimum=args.min_interval * 60, maximum=args.max_interval * 60
+            ),
+            hooks=[
+                *(CommandHook(command) for command in args.on_change_command),
+                *(WebhookHook(url) for url in args.on_change_webhook),
+                *(SocketHook(path) for path in args.on_change_socket),
+            ],
+            force=args.force,
+            use_cache=not args.no_cache,
+            artifacts=args.artifacts,
+            summary_path=args.summary_path,
+            validation_path=args.validation_path,
+            archive_path=args.archive_path,
+            days_path=args.days_path,
+            site_path=args.site_path,
+            calendar_path=args.calendar_path,
+            sources=args.sources,
+            sources_path=args.sources_path,
+        )
+    elif args.profile_path is not None:
+        profile(args.profile_path, run_with_args)
+    else:
+        run_with_args()
@@ -0,0 +1,129 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, TypeVar
+
+from conversions import time_to_minutes
+
+LOGGER = logging.getLogger("metrics")
+LOG_FORMAT = (
+    "%(asctime)s - %(name)s - %(filename)s (%(lineno)d) - %(levelname)s - %(message)s"
+)
+PROFILE_TOP = 40
+
+T = TypeVar("T")
+
+
+def configure_logging() -> None:
+    # Shared by every command-line entry point.
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+
+class Metrics:
+    # Stage timings and counters for one run. Spans wrap whole stages, not
+    # rows, so they stay cheap enough to leave on in nightly runs.
+    def __init__(self) -> None:
+        self.spans: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.calls.clear()
+            self.counters.clear()
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        time_cache = time_to_minutes.cache_info()
+        with self._lock:
+            return {
+                "spans": {
+                    name: {
+                        "seconds": round(seconds, 6),
+                        "calls": self.calls[name],
+                    }
+                    for name, seconds in self.spans.items()
+                },
+                "counters": {
+                    **self.counters,
+                    "time_cache.hits": time_cache.hits,
+                    "time_cache.misses": time_cache.misses,
+                },
+            }
+
+    def log_summary(self) -> None:
+        with self._lock:
+            spans = ", ".join(
+                f"{name} {seconds * 1000:.1f} ms"
+                for name, seconds in self.spans.items()
+            )
+            counters = ", ".join(
+                f"{name} {value}" for name, value in self.counters.items()
+            )
+        LOGGER.info(f"Stage timings: {spans}")
+        LOGGER.info(f"Counters: {counters}")
+
+
+METRICS = Metrics()
+
+
+def profile(directory: str, function: Callable[[], T]) -> T:
+    # Writes profile.pstats, profile.txt, tracemalloc.txt and metrics.json
+    # for one call. Timings under the profiler are inflated; compare them
+    # with each other, not with unprofiled runs.
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    os.makedirs(directory, exist_ok=True)
+    METRICS.reset()
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        return function()
+    finally:
+        profiler.disable()
+        memory = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        profiler.dump_stats(os.path.join(directory, "profile.pstats"))
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(
+            PROFILE_TOP
+        )
+        with open(os.path.join(directory, "profile.txt"), "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        with open(
+            os.path.join(directory, "tracemalloc.txt"), "w", encoding="utf-8"
+        ) as f:
+            f.write(f"Peak traced memory: {peak} bytes\n")
+            for statistic in memory.statistics("lineno")[:PROFILE_TOP]:
+                f.write(f"{statistic}\n")
+        metrics = METRICS.snapshot()
+        metrics["peak_memory_bytes"] = peak
+        with open(os.path.join(directory, "metrics.json"), "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=4)
+        LOGGER.info(f"Wrote profile reports to {directory}")
@@ -1,417 +1,91 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
 # source: models/proto/schedules.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
 
-import sys
-
-_b = sys.version_info[0] < 3 and (lambda x: x) or (lambda x: x.encode("latin1"))
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
 from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
 
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC, 7, 35, 1, "", "models/proto/schedules.proto"
+)
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-    name="models/proto/schedules.proto",
-    package="schedule",
-    syntax="proto3",
-    serialized_options=None,
-    serialized_pb=_b(
-        '\n\x1cmodels/proto/schedules.proto\x12\x08schedule"0\n\x04\x44\x61te\x12\x0c\n\x04year\x18\x01 \x01(\x05\x12\r\n\x05month\x18\x02 \x01(\x05\x12\x0b\n\x03\x64\x61y\x18\x03 \x01(\x05">\n\x10LocationSchedule\x12\x13\n\x0b\x64\x65partsCity\x18\x01 \x03(\t\x12\x15\n\rdepartsIsland\x18\x02 \x03(\t"\xd8\x01\n\x08Schedule\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1d\n\x05start\x18\x02 \x01(\x0b\x32\x0e.schedule.Date\x12\x1b\n\x03\x65nd\x18\x03 \x01(\x0b\x32\x0e.schedule.Date\x12\x34\n\tlocations\x18\x04 \x03(\x0b\x32!.schedule.Schedule.LocationsEntry\x1aL\n\x0eLocationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12)\n\x05value\x18\x02 \x01(\x0b\x32\x1a.schedule.LocationSchedule:\x02\x38\x01"2\n\tSchedules\x12%\n\tschedules\x18\x01 \x03(\x0b\x32\x12.schedule.Scheduleb\x06proto3'
-    ),
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x1cmodels/proto/schedules.proto\x12\x08schedule"0\n\x04\x44\x61te\x12\x0c\n\x04year\x18\x01 \x01(\x05\x12\r\n\x05month\x18\x02 \x01(\x05\x12\x0b\n\x03\x64\x61y\x18\x03 \x01(\x05">\n\x10LocationSchedule\x12\x13\n\x0b\x64\x65partsCity\x18\x01 \x03(\t\x12\x15\n\rdepartsIsland\x18\x02 \x03(\t"\xd8\x01\n\x08Schedule\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1d\n\x05start\x18\x02 \x01(\x0b\x32\x0e.schedule.Date\x12\x1b\n\x03\x65nd\x18\x03 \x01(\x0b\x32\x0e.schedule.Date\x12\x34\n\tlocations\x18\x04 \x03(\x0b\x32!.schedule.Schedule.LocationsEntry\x1aL\n\x0eLocationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12)\n\x05value\x18\x02 \x01(\x0b\x32\x1a.schedule.LocationSchedule:\x02\x38\x01"2\n\tSchedules\x12%\n\tschedules\x18\x01 \x03(\x0b\x32\x12.schedule.Schedule"G\n\x11LocationTimetable\x12\x17\n\x0b\x64\x65partsCity\x18\x01 \x03(\x05\x42\x02\x10\x01\x12\x19\n\rdepartsIsland\x18\x02 \x03(\x05\x42\x02\x10\x01"\xeb\x01\n\x11ScheduleTimetable\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1d\n\x05start\x18\x02 \x01(\x0b\x32\x0e.schedule.Date\x12\x1b\n\x03\x65nd\x18\x03 \x01(\x0b\x32\x0e.schedule.Date\x12=\n\tlocations\x18\x04 \x03(\x0b\x32*.schedule.ScheduleTimetable.LocationsEntry\x1aM\n\x0eLocationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12*\n\x05value\x18\x02 \x01(\x0b\x32\x1b.schedule.LocationTimetable:\x02\x38\x01"<\n\nTimetables\x12.\n\tschedules\x18\x01 \x03(\x0b\x32\x1b.schedule.ScheduleTimetable"w\n\x0fServiceOverride\x12\x10\n\x08location\x18\x01 \x01(\t\x12\x11\n\tstartTime\x18\x02 \x01(\t\x12\x0f\n\x07\x65ndTime\x18\x03 \x01(\t\x12.\n\ndepartures\x18\x04 \x01(\x0b\x32\x1a.schedule.LocationSchedule"\x8a\x01\n\x10ServiceException\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1d\n\x05start\x18\x02 \x01(\x0b\x32\x0e.schedule.Date\x12\x1b\n\x03\x65nd\x18\x03 \x01(\x0b\x32\x0e.schedule.Date\x12,\n\toverrides\x18\x04 \x03(\x0b\x32\x19.schedule.ServiceOverride"A\n\x0fServiceCalendar\x12.\n\nexceptions\x18\x01 \x03(\x0b\x32\x1a.schedule.ServiceException"%\n\x0e\x44\x65partureTable\x12\x13\n\x07minutes\x18\x01 \x03(\x05\x42\x02\x10\x01"?\n\x11LocationTableRefs\x12\x13\n\x0b\x64\x65partsCity\x18\x01 \x01(\t\x12\x15\n\rdepartsIsland\x18\x02 \x01(\t"\xe7\x01\n\x0f\x43ompactSchedule\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1d\n\x05start\x18\x02 \x01(\x0b\x32\x0e.schedule.Date\x12\x1b\n\x03\x65nd\x18\x03 \x01(\x0b\x32\x0e.schedule.Date\x12;\n\tlocations\x18\x04 \x03(\x0b\x32(.schedule.CompactSchedule.LocationsEntry\x1aM\n\x0eLocationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12*\n\x05value\x18\x02 \x01(\x0b\x32\x1b.schedule.LocationTableRefs:\x02\x38\x01"\xc1\x01\n\x10\x43ompactSchedules\x12\x36\n\x06tables\x18\x01 \x03(\x0b\x32&.schedule.CompactSchedules.TablesEntry\x12,\n\tschedules\x18\x02 \x03(\x0b\x32\x19.schedule.CompactSchedule\x1aG\n\x0bTablesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\'\n\x05value\x18\x02 \x01(\x0b\x32\x18.schedule.DepartureTable:\x02\x38\x01\x62\x06proto3'
 )
 
-
-_DATE = _descriptor.Descriptor(
-    name="Date",
-    full_name="schedule.Date",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="year",
-            full_name="schedule.Date.year",
-            index=0,
-            number=1,
-            type=5,
-            cpp_type=1,
-            label=1,
-            has_default_value=False,
-            default_value=0,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="month",
-            full_name="schedule.Date.month",
-            index=1,
-            number=2,
-            type=5,
-            cpp_type=1,
-            label=1,
-            has_default_value=False,
-            default_value=0,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="day",
-            full_name="schedule.Date.day",
-            index=2,
-            number=3,
-            type=5,
-            cpp_type=1,
-            label=1,
-            has_default_value=False,
-            default_value=0,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=42,
-    serialized_end=90,
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(
+    DESCRIPTOR, "models.proto.schedules_pb2", _globals
 )
-
-
-_LOCATIONSCHEDULE = _descriptor.Descriptor(
-    name="LocationSchedule",
-    full_name="schedule.LocationSchedule",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="departsCity",
-            full_name="schedule.LocationSchedule.departsCity",
-            index=0,
-            number=1,
-            type=9,
-            cpp_type=9,
-            label=3,
-            has_default_value=False,
-            default_value=[],
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="departsIsland",
-            full_name="schedule.LocationSchedule.departsIsland",
-            index=1,
-            number=2,
-            type=9,
-            cpp_type=9,
-            label=3,
-            has_default_value=False,
-            default_value=[],
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=92,
-    serialized_end=154,
-)
-
-
-_SCHEDULE_LOCATIONSENTRY = _descriptor.Descriptor(
-    name="LocationsEntry",
-    full_name="schedule.Schedule.LocationsEntry",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="key",
-            full_name="schedule.Schedule.LocationsEntry.key",
-            index=0,
-            number=1,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="value",
-            full_name="schedule.Schedule.LocationsEntry.value",
-            index=1,
-            number=2,
-            type=11,
-            cpp_type=10,
-            label=1,
-            has_default_value=False,
-            default_value=None,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=_b("8\001"),
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=297,
-    serialized_end=373,
-)
-
-_SCHEDULE = _descriptor.Descriptor(
-    name="Schedule",
-    full_name="schedule.Schedule",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="name",
-            full_name="schedule.Schedule.name",
-            index=0,
-            number=1,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="start",
-            full_name="schedule.Schedule.start",
-            index=1,
-            number=2,
-            type=11,
-            cpp_type=10,
-            label=1,
-            has_default_value=False,
-            default_value=None,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="end",
-            full_name="schedule.Schedule.end",
-            index=2,
-            number=3,
-            type=11,
-            cpp_type=10,
-            label=1,
-            has_default_value=False,
-            default_value=None,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="locations",
-            full_name="schedule.Schedule.locations",
-            index=3,
-            number=4,
-            type=11,
-            cpp_type=10,
-            label=3,
-            has_default_value=False,
-            default_value=[],
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[
-        _SCHEDULE_LOCATIONSENTRY,
-    ],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=157,
-    serialized_end=373,
-)
-
-
-_SCHEDULES = _descriptor.Descriptor(
-    name="Schedules",
-    full_name="schedule.Schedules",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="schedules",
-            full_name="schedule.Schedules.schedules",
-            index=0,
-            number=1,
-            type=11,
-            cpp_type=10,
-            label=3,
-            has_default_value=False,
-            default_value=[],
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=375,
-    serialized_end=425,
-)
-
-_SCHEDULE_LOCATIONSENTRY.fields_by_name["value"].message_type = _LOCATIONSCHEDULE
-_SCHEDULE_LOCATIONSENTRY.containing_type = _SCHEDULE
-_SCHEDULE.fields_by_name["start"].message_type = _DATE
-_SCHEDULE.fields_by_name["end"].message_type = _DATE
-_SCHEDULE.fields_by_name["locations"].message_type = _SCHEDULE_LOCATIONSENTRY
-_SCHEDULES.fields_by_name["schedules"].message_type = _SCHEDULE
-DESCRIPTOR.message_types_by_name["Date"] = _DATE
-DESCRIPTOR.message_types_by_name["LocationSchedule"] = _LOCATIONSCHEDULE
-DESCRIPTOR.message_types_by_name["Schedule"] = _SCHEDULE
-DESCRIPTOR.message_types_by_name["Schedules"] = _SCHEDULES
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Date = _reflection.GeneratedProtocolMessageType(
-    "Date",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_DATE,
-        __module__="models.proto.schedules_pb2",
-        # @@protoc_insertion_point(class_scope:schedule.Date)
-    ),
-)
-_sym_db.RegisterMessage(Date)
-
-LocationSchedule = _reflection.GeneratedProtocolMessageType(
-    "LocationSchedule",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_LOCATIONSCHEDULE,
-        __module__="models.proto.schedules_pb2",
-        # @@protoc_insertion_point(class_scope:schedule.LocationSchedule)
-    ),
-)
-_sym_db.RegisterMessage(LocationSchedule)
-
-Schedule = _reflection.GeneratedProtocolMessageType(
-    "Schedule",
-    (_message.Message,),
-    dict(
-        LocationsEntry=_reflection.GeneratedProtocolMessageType(
-            "LocationsEntry",
-            (_message.Message,),
-            dict(
-                DESCRIPTOR=_SCHEDULE_LOCATIONSENTRY,
-                __module__="models.proto.schedules_pb2",
-                # @@protoc_insertion_point(class_scope:schedule.Schedule.LocationsEntry)
-            ),
-        ),
-        DESCRIPTOR=_SCHEDULE,
-        __module__="models.proto.schedules_pb2",
-        # @@protoc_insertion_point(class_scope:schedule.Schedule)
-    ),
-)
-_sym_db.RegisterMessage(Schedule)
-_sym_db.RegisterMessage(Schedule.LocationsEntry)
-
-Schedules = _reflection.GeneratedProtocolMessageType(
-    "Schedules",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_SCHEDULES,
-        __module__="models.proto.schedules_pb2",
-        # @@protoc_insertion_point(class_scope:schedule.Schedules)
-    ),
-)
-_sym_db.RegisterMessage(Schedules)
-
-
-_SCHEDULE_LOCATIONSENTRY._options = None
+if not _descriptor._USE_C_DESCRIPTORS:
+    DESCRIPTOR._loaded_options = None
+    _globals["_SCHEDULE_LOCATIONSENTRY"]._loaded_options = None
+    _globals["_SCHEDULE_LOCATIONSENTRY"]._serialized_options = b"8\001"
+    _globals["_LOCATIONTIMETABLE"].fields_by_name["departsCity"]._loaded_options = None
+    _globals["_LOCATIONTIMETABLE"].fields_by_name[
+        "departsCity"
+    ]._serialized_options = b"\020\001"
+    _globals["_LOCATIONTIMETABLE"].fields_by_name[
+        "departsIsland"
+    ]._loaded_options = None
+    _globals["_LOCATIONTIMETABLE"].fields_by_name[
+        "departsIsland"
+    ]._serialized_options = b"\020\001"
+    _globals["_SCHEDULETIMETABLE_LOCATIONSENTRY"]._loaded_options = None
+    _globals["_SCHEDULETIMETABLE_LOCATIONSENTRY"]._serialized_options = b"8\001"
+    _globals["_DEPARTURETABLE"].fields_by_name["minutes"]._loaded_options = None
+    _globals["_DEPARTURETABLE"].fields_by_name[
+        "minutes"
+    ]._serialized_options = b"\020\001"
+    _globals["_COMPACTSCHEDULE_LOCATIONSENTRY"]._loaded_options = None
+    _globals["_COMPACTSCHEDULE_LOCATIONSENTRY"]._serialized_options = b"8\001"
+    _globals["_COMPACTSCHEDULES_TABLESENTRY"]._loaded_options = None
+    _globals["_COMPACTSCHEDULES_TABLESENTRY"]._serialized_options = b"8\001"
+    _globals["_DATE"]._serialized_start = 42
+    _globals["_DATE"]._serialized_end = 90
+    _globals["_LOCATIONSCHEDULE"]._serialized_start = 92
+    _globals["_LOCATIONSCHEDULE"]._serialized_end = 154
+    _globals["_SCHEDULE"]._serialized_start = 157
+    _globals["_SCHEDULE"]._serialized_end = 373
+    _globals["_SCHEDULE_LOCATIONSENTRY"]._serialized_start = 297
+    _globals["_SCHEDULE_LOCATIONSENTRY"]._serialized_end = 373
+    _globals["_SCHEDULES"]._serialized_start = 375
+    _globals["_SCHEDULES"]._serialized_end = 425
+    _globals["_LOCATIONTIMETABLE"]._serialized_start = 427
+    _globals["_LOCATIONTIMETABLE"]._serialized_end = 498
+    _globals["_SCHEDULETIMETABLE"]._serialized_start = 501
+    _globals["_SCHEDULETIMETABLE"]._serialized_end = 736
+    _globals["_SCHEDULETIMETABLE_LOCATIONSENTRY"]._serialized_start = 659
+    _globals["_SCHEDULETIMETABLE_LOCATIONSENTRY"]._serialized_end = 736
+    _globals["_TIMETABLES"]._serialized_start = 738
+    _globals["_TIMETABLES"]._serialized_end = 798
+    _globals["_SERVICEOVERRIDE"]._serialized_start = 800
+    _globals["_SERVICEOVERRIDE"]._serialized_end = 919
+    _globals["_SERVICEEXCEPTION"]._serialized_start = 922
+    _globals["_SERVICEEXCEPTION"]._serialized_end = 1060
+    _globals["_SERVICECALENDAR"]._serialized_start = 1062
+    _globals["_SERVICECALENDAR"]._serialized_end = 1127
+    _globals["_DEPARTURETABLE"]._serialized_start = 1129
+    _globals["_DEPARTURETABLE"]._serialized_end = 1166
+    _globals["_LOCATIONTABLEREFS"]._serialized_start = 1168
+    _globals["_LOCATIONTABLEREFS"]._serialized_end = 1231
+    _globals["_COMPACTSCHEDULE"]._serialized_start = 1234
+    _globals["_COMPACTSCHEDULE"]._serialized_end = 1465
+    _globals["_COMPACTSCHEDULE_LOCATIONSENTRY"]._serialized_start = 1388
+    _globals["_COMPACTSCHEDULE_LOCATIONSENTRY"]._serialized_end = 1465
+    _globals["_COMPACTSCHEDULES"]._serialized_start = 1468
+    _globals["_COMPACTSCHEDULES"]._serialized_end = 1661
+    _globals["_COMPACTSCHEDULES_TABLESENTRY"]._serialized_start = 1590
+    _globals["_COMPACTSCHEDULES_TABLESENTRY"]._serialized_end = 1661
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    content_hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ResponseCache:
+    DEFAULT_DIRECTORY: str = ".cache/http"
+    LOGGER: logging.Logger = logging.getLogger("response_cache")
+
+    def __init__(self, *, directory: str = DEFAULT_DIRECTORY) -> None:
+        self.directory = directory
+
+    def load(self, *, url: str) -> Optional[CachedResponse]:
+        path = self._path(url=url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return CachedResponse(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as error:
+            ResponseCache.LOGGER.warning(
+                f"Ignoring unreadable cache entry {path}: {error}"
+            )
+            return None
+
+    def store(self, *, response: CachedResponse) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url=response.url)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(response), f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        ResponseCache.LOGGER.info(f"Cached response for {response.url}")
+
+    def _path(self, *, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+
+class MemoryResponseCache(ResponseCache):
+    # Keeps the last response per URL in memory for long-running processes,
+    # so revalidating does not re-read the cache file. Stores still write
+    # through to disk unless directory is None. Safe to share between the
+    # pipeline's fetch threads.
+    def __init__(self, *, directory: Optional[str] = ResponseCache.DEFAULT_DIRECTORY):
+        super().__init__(directory=directory)
+        self._responses: Dict[str, Optional[CachedResponse]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, *, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            if url not in self._responses:
+                self._responses[url] = (
+                    super().load(url=url) if self.directory is not None else None
+                )
+            return self._responses[url]
+
+    def store(self, *, response: CachedResponse) -> None:
+        with self._lock:
+            self._responses[response.url] = response
+            if self.directory is not None:
+                super().store(response=response)
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from conversions import minutes_to_time
+from metrics import configure_logging
+from schedule_query import TORONTO, ScheduleIndex
+from timetable import DIRECTIONS, SCHEDULES_HELP, SCHEDULES_PATH
+
+LOGGER = logging.getLogger("schedule_api")
+MAX_DEPARTURES = 100
+MAX_CACHED_RESPONSES = 1024
+
+Response = Tuple[int, bytes]
+
+
+class ScheduleApi:
+    RELOAD_INTERVAL: float = 1.0
+
+    def __init__(
+        self,
+        *,
+        path: str = SCHEDULES_PATH,
+        clock: Callable[[], datetime.datetime] = lambda: datetime.datetime.now(TORONTO),
+    ) -> None:
+        self.path = path
+        self.clock = clock
+        self.index: Optional[ScheduleIndex] = None
+        self._mtime: Optional[int] = None
+        self._cache: Dict[str, Response] = {}
+        self._cache_minute: Optional[datetime.datetime] = None
+
+    def reload_if_changed(self) -> bool:
+        loaded = self.load_if_changed()
+        if loaded is None:
+            return False
+        self.swap(*loaded)
+        return True
+
+    def load_if_changed(self) -> Optional[Tuple[ScheduleIndex, int]]:
+        # Only reads the file, so it can run in a worker thread while the
+        # event loop keeps answering from the current index.
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return None
+        return ScheduleIndex.load(path=self.path), mtime
+
+    def swap(self, index: ScheduleIndex, mtime: int) -> None:
+        # Runs on the event loop, like handle(), so no response built from
+        # the old index can be cached after the cache is cleared.
+        self.index, self._mtime = index, mtime
+        self._cache.clear()
+        LOGGER.info(f"Loaded schedules from {self.path}")
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(ScheduleApi.RELOAD_INTERVAL)
+            try:
+                loaded = await asyncio.to_thread(self.load_if_changed)
+            except (OSError, ValueError) as error:
+                # Keep serving the last good index while the file is rewritten.
+                LOGGER.warning(f"Could not reload {self.path}: {error}")
+                continue
+            if loaded is not None:
+                self.swap(*loaded)
+
+    def handle(self, target: str) -> Response:
+        if self.index is None:
+            return error_response(503, f"Schedules from {self.path} are not loaded")
+        now = self.clock().replace(second=0, microsecond=0)
+        if now != self._cache_minute:
+            self._cache.clear()
+            self._cache_minute = now
+        response = self._cache.get(target)
+        if response is None:
+            response = self._respond(target, now)
+            if len(self._cache) < MAX_CACHED_RESPONSES:
+                self._cache[target] = response
+        return response
+
+    def _respond(self, target: str, now: datetime.datetime) -> Response:
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/routes":
+            return self._routes(now)
+        if url.path == "/next":
+            return self._next(query, now)
+        return error_response(404, f"Unknown path {url.path}")
+
+    def _routes(self, now: datetime.datetime) -> Response:
+        schedule = self.index.schedule_for(now.date())
+        routes = [
+            {"location": location, "direction": direction}
+            for location, direction in self.index.routes(now.date())
+        ]
+        return json_response(
+            {
+                "date": now.date().isoformat(),
+                "schedule": schedule.name if schedule is not None else None,
+                "routes": routes,
+            }
+        )
+
+    def _next(self, query: Dict[str, str], now: datetime.datetime) -> Response:
+        location = query.get("location")
+        direction = query.get("direction")
+        if not location or direction not in DIRECTIONS:
+            return error_response(
+                400,
+                "location and direction (departsCity or departsIsland) are required",
+            )
+        try:
+            n = int(query.get("n", "1"))
+        except ValueError:
+            return error_response(400, "n must be an integer")
+        if not 1 <= n <= MAX_DEPARTURES:
+            return error_response(400, f"n must be between 1 and {MAX_DEPARTURES}")
+        if self.index.departures(location, direction, date=now.date()) is None:
+            return error_response(404, f"No {direction} route for {location} today")
+        departures = self.index.next_departures(location, direction, at=now, n=n)
+        within_hour = self.index.within_next_hour(location, direction, at=now)
+        return json_response(
+            {
+                "location": location,
+                "direction": direction,
+                "at": minutes_to_time(now.hour * 60 + now.minute),
+                "departures": [
+                    minutes_to_time(departure.hour * 60 + departure.minute)
+                    for departure in departures
+                ],
+                "withinNextHour": len(within_hour),
+            }
+        )
+
+
+def json_response(body: dict) -> Response:
+    return 200, json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def error_response(status: int, message: str) -> Response:
+    return status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+def encode_response(
+    status: int, body: bytes, *, max_age: int, keep_alive: bool
+) -> bytes:
+    # An unavailable answer is not cached, so clients retry once the
+    # schedules load.
+    return (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Cache-Control: max-age={0 if status == 503 else max_age}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("latin-1") + body
+
+
+async def handle_connection(
+    api: ScheduleApi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                _, body = error_response(400, "Malformed request line")
+                writer.write(encode_response(400, body, max_age=0, keep_alive=False))
+                await writer.drain()
+                break
+            method, target, version = parts
+            if method == "GET":
+                status, body = api.handle(target)
+            else:
+                status, body = error_response(405, f"{method} is not supported")
+            keep_alive = headers.get("connection", "").lower() != "close" and (
+                version == "HTTP/1.1"
+                or headers.get("connection", "").lower() == "keep-alive"
+            )
+            writer.write(
+                encode_response(
+                    status,
+                    body,
+                    max_age=60 - api.clock().second,
+                    keep_alive=keep_alive,
+                )
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(api: ScheduleApi, *, host: str, port: int) -> asyncio.Server:
+    try:
+        api.reload_if_changed()
+    except (OSError, ValueError) as error:
+        # watch() keeps trying; until then requests are answered with 503.
+        LOGGER.warning(f"Could not load {api.path}: {error}")
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(api, reader, writer), host, port
+    )
+
+
+async def serve(
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    path: str = SCHEDULES_PATH,
+    ready: Optional[Callable[[int], None]] = None,
+):
+    # ready, if given, is called with the bound port (useful with port 0).
+    api = ScheduleApi(path=path)
+    server = await start_server(api, host=host, port=port)
+    port = server.sockets[0].getsockname()[1]
+    watcher = asyncio.create_task(api.watch())
+    LOGGER.info(f"Serving {path} on http://{host}:{port}")
+    if ready is not None:
+        ready(port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve next-ferry answers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--path",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    asyncio.run(serve(host=args.host, port=args.port, path=args.path))
@@ -0,0 +1,195 @@
+import argparse
+import datetime
+import functools
+import hashlib
+import json
+import logging
+import sqlite3
+from typing import List, Optional
+
+from conversions import optional_date
+from models.proto.schedules_pb2 import ScheduleTimetable, Timetables
+from timetable import Timetable
+
+LOGGER = logging.getLogger("schedule_archive")
+DEFAULT_PATH = "../../output/archive.sqlite3"
+READ_CACHE_SIZE = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    captured_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timetables (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    start TEXT NOT NULL,
+    content_hash TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timetables_name_start ON timetables (name, start);
+CREATE INDEX IF NOT EXISTS timetables_start ON timetables (start);
+CREATE TABLE IF NOT EXISTS snapshot_timetables (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    timetable_id INTEGER NOT NULL REFERENCES timetables (id),
+    end TEXT,
+    PRIMARY KEY (snapshot_id, timetable_id)
+);
+CREATE INDEX IF NOT EXISTS snapshot_timetables_timetable
+    ON snapshot_timetables (timetable_id, snapshot_id);
+"""
+
+
+class ScheduleArchive:
+    # Snapshots are only ever appended. Timetable contents are stored once
+    # per distinct (end-less) ScheduleTimetable and linked to each snapshot,
+    # since nightly runs mostly see the same tables.
+    def __init__(self, *, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        # Only recently used timetables are kept decoded, not the history.
+        self._read_timetable = functools.lru_cache(maxsize=READ_CACHE_SIZE)(
+            self._read_timetable
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ScheduleArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(
+        self,
+        timetables: Timetables,
+        *,
+        captured_at: Optional[datetime.datetime] = None,
+    ) -> int:
+        captured_at = captured_at or datetime.datetime.now(datetime.timezone.utc)
+        with self.connection:
+            snapshot_id = self.connection.execute(
+                "INSERT INTO snapshots (captured_at) VALUES (?)",
+                (captured_at.isoformat(),),
+            ).lastrowid
+            for schedule in timetables.schedules:
+                end = optional_date(schedule.end)
+                timetable_id = self._timetable_id(schedule)
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO snapshot_timetables "
+                    "(snapshot_id, timetable_id, end) VALUES (?, ?, ?)",
+                    (snapshot_id, timetable_id, end.isoformat() if end else None),
+                )
+        LOGGER.info(
+            f"Archived {len(timetables.schedules)} schedules as snapshot {snapshot_id}"
+        )
+        return snapshot_id
+
+    def in_effect(self, date: datetime.date) -> Optional[Timetable]:
+        # The latest start on or before the date wins; the most recent
+        # snapshot that saw that timetable decides its content and end date.
+        row = self.connection.execute(
+            "SELECT st.timetable_id, st.end FROM timetables t "
+            "JOIN snapshot_timetables st ON st.timetable_id = t.id "
+            "WHERE t.start = (SELECT MAX(start) FROM timetables WHERE start <= ?) "
+            "ORDER BY st.snapshot_id DESC LIMIT 1",
+            (date.isoformat(),),
+        ).fetchone()
+        if row is None:
+            return None
+        timetable_id, end = row
+        end = datetime.date.fromisoformat(end) if end else None
+        if end is not None and end < date:
+            return None
+        timetable = self._read_timetable(timetable_id)
+        return Timetable(
+            name=timetable.name,
+            start=timetable.start,
+            end=end,
+            locations=timetable.locations,
+        )
+
+    def history(self, name: str) -> List[datetime.date]:
+        return [
+            datetime.date.fromisoformat(start)
+            for (start,) in self.connection.execute(
+                "SELECT DISTINCT start FROM timetables WHERE name = ? ORDER BY start",
+                (name,),
+            )
+        ]
+
+    def timetables(self) -> List[Timetable]:
+        # Every distinct timetable ever archived, oldest first and without
+        # end dates, which belong to the snapshots. Revisions of a season
+        # mostly repeat each other's departure lists, so those are shared.
+        from departure_tables import DepartureTables
+
+        tables = DepartureTables()
+        return [
+            tables.intern_timetable(
+                Timetable.from_proto(ScheduleTimetable.FromString(data))
+            )
+            for (data,) in self.connection.execute(
+                "SELECT data FROM timetables ORDER BY start, id"
+            )
+        ]
+
+    def snapshot_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def _read_timetable(self, timetable_id: int) -> Timetable:
+        (data,) = self.connection.execute(
+            "SELECT data FROM timetables WHERE id = ?", (timetable_id,)
+        ).fetchone()
+        return Timetable.from_proto(ScheduleTimetable.FromString(data))
+
+    def _timetable_id(self, schedule: ScheduleTimetable) -> int:
+        stored = ScheduleTimetable()
+        stored.CopyFrom(schedule)
+        stored.ClearField("end")
+        data = stored.SerializeToString(deterministic=True)
+        content_hash = hashlib.sha256(data).hexdigest()
+        row = self.connection.execute(
+            "SELECT id FROM timetables WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        return self.connection.execute(
+            "INSERT INTO timetables (name, start, content_hash, data) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                schedule.name,
+                optional_date(schedule.start).isoformat(),
+                content_hash,
+                data,
+            ),
+        ).lastrowid
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Show the archived timetable in effect on a date"
+    )
+    parser.add_argument("date", type=datetime.date.fromisoformat)
+    parser.add_argument("--archive", default=DEFAULT_PATH)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from google.protobuf import json_format
+
+    args = parse_args()
+    with ScheduleArchive(path=args.archive) as archive:
+        timetable = archive.in_effect(args.date)
+    if timetable is None:
+        print(f"No archived timetable in effect on {args.date}")
+    else:
+        print(
+            json.dumps(
+                json_format.MessageToDict(timetable.to_schedule()),
+                ensure_ascii=False,
+                indent=4,
+            )
+        )
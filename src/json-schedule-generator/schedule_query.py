@@ -0,0 +1,164 @@
+import datetime
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from conversions import MINUTES_PER_DAY
+from models.proto.schedules_pb2 import Schedules, Timetables
+from timetable import DIRECTIONS, Timetable, load_timetables
+
+TORONTO = ZoneInfo("America/Toronto")
+
+Route = Tuple[str, str]
+
+
+class ScheduleIndex:
+    def __init__(self, timetables: Iterable[Timetable]) -> None:
+        self.timetables: List[Timetable] = sorted(
+            timetables, key=lambda timetable: timetable.start
+        )
+        self._starts: List[datetime.date] = [
+            timetable.start for timetable in self.timetables
+        ]
+        self._routes: List[Dict[Route, array]] = [
+            {
+                (location, direction): array(
+                    "H", sorted(departures.direction(direction))
+                )
+                for location, departures in timetable.locations.items()
+                for direction in DIRECTIONS
+            }
+            for timetable in self.timetables
+        ]
+
+    @staticmethod
+    def from_schedules(schedules: Schedules) -> "ScheduleIndex":
+        return ScheduleIndex(
+            Timetable.from_schedule(schedule) for schedule in schedules.schedules
+        )
+
+    @staticmethod
+    def from_timetables(timetables: Timetables) -> "ScheduleIndex":
+        return ScheduleIndex(
+            Timetable.from_proto(schedule) for schedule in timetables.schedules
+        )
+
+    @staticmethod
+    def load(*, path: str) -> "ScheduleIndex":
+        return ScheduleIndex(load_timetables(path=path))
+
+    def schedule_for(self, date: datetime.date) -> Optional[Timetable]:
+        position = self.position(date)
+        if position is None:
+            return None
+        return self.timetables[position]
+
+    def routes(self, date: datetime.date) -> List[Route]:
+        position = self.position(date)
+        if position is None:
+            return []
+        return list(self._routes[position])
+
+    def departures(
+        self, location: str, direction: str, *, date: datetime.date
+    ) -> Optional[array]:
+        position = self.position(date)
+        if position is None:
+            return None
+        return self._routes[position].get((location, direction))
+
+    def next_departures(
+        self,
+        location: str,
+        direction: str,
+        *,
+        at: datetime.datetime,
+        n: int = 1,
+    ) -> List[datetime.datetime]:
+        at = toronto_time(at)
+        upcoming = []
+        for position, date, now in self.service_days(at):
+            times = self._routes[position].get((location, direction))
+            if times is None:
+                continue
+            # A departure in the current minute has already left, as in
+            # splitTimes.
+            first = bisect_right(times, now)
+            upcoming.extend(
+                at_minutes(at, minutes, date=date)
+                for minutes in times[first : first + n]
+            )
+        return sorted(upcoming)[:n]
+
+    def departures_within(
+        self,
+        location: str,
+        direction: str,
+        *,
+        at: datetime.datetime,
+        minutes: int = 60,
+    ) -> List[datetime.datetime]:
+        at = toronto_time(at)
+        within = []
+        for position, date, now in self.service_days(at):
+            times = self._routes[position].get((location, direction))
+            if times is None:
+                continue
+            first = bisect_right(times, now)
+            last = bisect_right(times, now + minutes, first)
+            within.extend(
+                at_minutes(at, departure, date=date) for departure in times[first:last]
+            )
+        return sorted(within)
+
+    def within_next_hour(
+        self, location: str, direction: str, *, at: datetime.datetime
+    ) -> List[datetime.datetime]:
+        return self.departures_within(location, direction, at=at, minutes=60)
+
+    def service_days(
+        self, at: datetime.datetime
+    ) -> Iterator[Tuple[int, datetime.date, int]]:
+        # (position, service date, at in that day's minutes) for yesterday,
+        # whose sailings after midnight may still be to come, then today.
+        now = at.hour * 60 + at.minute
+        for days_back in (1, 0):
+            date = at.date() - datetime.timedelta(days=days_back)
+            position = self.position(date)
+            if position is not None:
+                yield position, date, now + days_back * MINUTES_PER_DAY
+
+    def position(self, date: datetime.date) -> Optional[int]:
+        position = bisect_right(self._starts, date) - 1
+        if position < 0:
+            return None
+        end = self.timetables[position].end
+        if end is not None and end < date:
+            return None
+        return position
+
+
+def toronto_time(at: datetime.datetime) -> datetime.datetime:
+    # Naive datetimes are taken to already be Toronto wall-clock time.
+    if at.tzinfo is None:
+        return at
+    return at.astimezone(TORONTO)
+
+
+def at_minutes(
+    at: datetime.datetime, minutes: int, *, date: Optional[datetime.date] = None
+) -> datetime.datetime:
+    # minutes into the service day starting on date (default at's date),
+    # which may run past midnight, in at's timezone.
+    days, minutes = divmod(minutes, MINUTES_PER_DAY)
+    date = (date or at.date()) + datetime.timedelta(days=days)
+    return at.replace(
+        year=date.year,
+        month=date.month,
+        day=date.day,
+        hour=minutes // 60,
+        minute=minutes % 60,
+        second=0,
+        microsecond=0,
+    )
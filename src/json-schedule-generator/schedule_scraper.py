@@ -1,23 +1,331 @@
+import codecs
+import hashlib
 import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-import requests
-from bs4 import BeautifulSoup
+from metrics import METRICS
+from response_cache import CachedResponse, ResponseCache, content_hash
+
+# requests and bs4 are imported where they are used, so processes that only
+# query schedules do not load them.
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
+
+
+class ScheduleSectionExtractor(HTMLParser):
+    SECTION_ID_PATTERN: re.Pattern = re.compile(r"^accordion-[a-z]+-schedule$")
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.sections: List[str] = []
+        self._section: List[str] = []
+        self._section_tag: Optional[str] = None
+        self._depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._section_tag is None:
+            section_id = dict(attrs).get("id")
+            if section_id is None or not self.SECTION_ID_PATTERN.match(section_id):
+                return
+            self._section_tag = tag
+        if tag == self._section_tag:
+            self._depth += 1
+        self._section.append(self.get_starttag_text())
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        if self._section_tag is not None:
+            self._section.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._section_tag is None:
+            return
+        self._section.append(f"</{tag}>")
+        if tag == self._section_tag:
+            self._depth -= 1
+            if self._depth == 0:
+                self.sections.append("".join(self._section))
+                self._section = []
+                self._section_tag = None
+
+    def handle_data(self, data: str) -> None:
+        if self._section_tag is not None:
+            self._section.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        if self._section_tag is not None:
+            self._section.append(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        if self._section_tag is not None:
+            self._section.append(f"&#{name};")
+
+    def handle_comment(self, data: str) -> None:
+        if self._section_tag is not None:
+            self._section.append(f"<!--{data}-->")
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Targeted parsing only builds trees for the schedule sections while they
+# are at most this share of the page; past it, one whole-page parse is
+# cheaper than tokenizing the sections a second time.
+TARGETED_SHARE = 0.5
+SECTION_START_PATTERN = re.compile(r"""\bid\s*=\s*["']?accordion-[a-z]+-schedule\b""")
+
+
+def estimated_section_share(body: str) -> float:
+    # From where the schedule sections start, before tokenizing anything:
+    # the first to the last section start, plus one more section of the
+    # average length. 0 with fewer than two sections.
+    starts = [match.start() for match in SECTION_START_PATTERN.finditer(body)]
+    if len(starts) < 2 or not body:
+        return 0.0
+    span = (starts[-1] - starts[0]) * len(starts) / (len(starts) - 1)
+    return span / len(body)
+
+
+@dataclass
+class FetchResult:
+    response: CachedResponse
+    not_modified: bool
+    # Set when a 200 repeated the cached body under new ETag/Last-Modified
+    # values, which still need storing so the next request revalidates.
+    validators_changed: bool = False
+    # The schedule sections, extracted while the body streamed in; None when
+    # not extracted (a 304, say), so parse_schedules extracts from the body.
+    sections: Optional[List[str]] = None
+
+
+def response_encoding(response: "requests.Response") -> str:
+    # requests falls back to latin-1 for text/* without a charset, which
+    # turns the page's UTF-8 punctuation into mojibake.
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.encoding
+    return "utf-8"
+
+
+def decode_body(response: "requests.Response", content: bytes) -> str:
+    try:
+        return content.decode(response_encoding(response))
+    except (UnicodeDecodeError, LookupError):
+        # What response.apparent_encoding detects, from bytes already read.
+        from requests.compat import chardet
+
+        encoding = chardet.detect(content)["encoding"] if chardet else None
+        return content.decode(encoding or "utf-8", errors="replace")
+
+
+@dataclass
+class StreamedBody:
+    body: str
+    content_hash: str
+    sections: Optional[List[str]]
+
+
+def read_body(
+    response: "requests.Response", *, chunk_size: int, extract_sections: bool
+) -> StreamedBody:
+    # Decodes and hashes the body as it arrives and, when asked, feeds it to
+    # a ScheduleSectionExtractor, so tokenizing the page overlaps the
+    # download. A body that does not decode is read whole and decoded by
+    # decode_body's fallback instead; its sections are extracted later.
+    pieces: List[str] = []
+    raw: List[bytes] = []
+    digest = hashlib.sha256()
+    extractor = ScheduleSectionExtractor() if extract_sections else None
+    try:
+        decoder = codecs.getincrementaldecoder(response_encoding(response))()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            raw.append(chunk)
+            text = decoder.decode(chunk)
+            pieces.append(text)
+            digest.update(text.encode("utf-8"))
+            if extractor is not None:
+                extractor.feed(text)
+        text = decoder.decode(b"", final=True)
+    except (UnicodeDecodeError, LookupError):
+        raw.extend(response.iter_content(chunk_size=chunk_size))
+        body = decode_body(response, b"".join(raw))
+        return StreamedBody(body=body, content_hash=content_hash(body), sections=None)
+    finally:
+        METRICS.count("bytes_downloaded", sum(map(len, raw)))
+    pieces.append(text)
+    digest.update(text.encode("utf-8"))
+    sections = None
+    if extractor is not None:
+        extractor.feed(text)
+        extractor.close()
+        sections = extractor.sections
+    return StreamedBody(
+        body="".join(pieces), content_hash=digest.hexdigest(), sections=sections
+    )
 
 
 class ScheduleScraper:
     SCHEDULE_URL: str = (
         "https://www.toronto.ca/explore-enjoy/parks-gardens-beaches/toronto-island-park/all-ferry-schedules/"
     )
+    TIMEOUT: Tuple[float, float] = (10, 30)
+    CHUNK_SIZE: int = 64 * 1024
+    RETRIES: int = 3
+    BACKOFF: float = 0.5
     LOGGER: logging.Logger = logging.getLogger("schedule_scraper")
+    # requests.Session is not thread-safe, so each thread (the pipeline's
+    # fetch workers, say) keeps its own session and connection pool.
+    _SESSIONS: threading.local = threading.local()
 
     @staticmethod
-    def scrape_schedules() -> BeautifulSoup:
+    def scrape_schedules(*, url: str = SCHEDULE_URL) -> "BeautifulSoup":
+        result = ScheduleScraper.fetch_schedules(url=url)
+        return ScheduleScraper.parse_schedules(
+            body=result.response.body, sections=result.sections
+        )
+
+    @staticmethod
+    def fetch_schedules(
+        *,
+        url: str = SCHEDULE_URL,
+        cache: Optional[ResponseCache] = None,
+        extract_sections: bool = True,
+    ) -> FetchResult:
+        # The body is streamed; with extract_sections the schedule sections
+        # are picked out of it on the way in, for parse_schedules.
         ScheduleScraper.LOGGER.info("Retrieving ferry schedules")
+        with METRICS.span("fetch"):
+            return ScheduleScraper._fetch(
+                url=url, cache=cache, extract_sections=extract_sections
+            )
+
+    @staticmethod
+    def _fetch(
+        *, url: str, cache: Optional[ResponseCache], extract_sections: bool
+    ) -> FetchResult:
+        import requests
+
+        cached = cache.load(url=url) if cache is not None else None
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
         try:
-            response = requests.get(ScheduleScraper.SCHEDULE_URL)
-            response.raise_for_status()
+            response = ScheduleScraper._get(url=url, headers=headers)
         except requests.HTTPError as error:
             ScheduleScraper.LOGGER.error(error)
             raise error
+        with response:
+            if cached is not None and response.status_code == 304:
+                ScheduleScraper.LOGGER.info(
+                    "Ferry schedules not modified since last fetch"
+                )
+                METRICS.count("cache.not_modified")
+                return FetchResult(response=cached, not_modified=True)
+            streamed = read_body(
+                response,
+                chunk_size=ScheduleScraper.CHUNK_SIZE,
+                extract_sections=extract_sections,
+            )
+        fetched = CachedResponse(
+            url=url,
+            body=streamed.body,
+            content_hash=streamed.content_hash,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        not_modified = (
+            cached is not None and cached.content_hash == fetched.content_hash
+        )
+        METRICS.count("cache.unchanged_body" if not_modified else "cache.miss")
         ScheduleScraper.LOGGER.info("Successfully retrieved ferry schedules")
-        return BeautifulSoup(response.text, "html.parser")
+        return FetchResult(
+            response=fetched,
+            not_modified=not_modified,
+            validators_changed=not_modified
+            and (fetched.etag, fetched.last_modified)
+            != (cached.etag, cached.last_modified),
+            sections=streamed.sections,
+        )
+
+    @staticmethod
+    def _get(*, url: str, headers: Dict[str, str]) -> "requests.Response":
+        import requests
+
+        # Connection errors, timeouts and 429/5xx responses are retried with
+        # exponential backoff; other HTTP errors are raised straight away.
+        for attempt in range(ScheduleScraper.RETRIES + 1):
+            try:
+                response = ScheduleScraper.session().get(
+                    url, headers=headers, timeout=ScheduleScraper.TIMEOUT, stream=True
+                )
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError:
+                    response.close()
+                    raise
+                return response
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == ScheduleScraper.RETRIES:
+                    raise
+                reason = error
+            except requests.HTTPError as error:
+                if (
+                    error.response.status_code not in RETRY_STATUSES
+                    or attempt == ScheduleScraper.RETRIES
+                ):
+                    raise
+                reason = error
+            delay = ScheduleScraper.BACKOFF * 2**attempt
+            ScheduleScraper.LOGGER.warning(f"Retrying {url} in {delay:.1f}s: {reason}")
+            time.sleep(delay)
+
+    @staticmethod
+    def parse_schedules(
+        *, body: str, targeted: bool = True, sections: Optional[List[str]] = None
+    ) -> "BeautifulSoup":
+        # Only the accordion-{season}-schedule containers are turned into a
+        # tree, from sections already extracted while fetching if given.
+        # Sections are tokenized twice, by the extractor and by BeautifulSoup,
+        # so a page that is mostly schedule is parsed whole instead.
+        from bs4 import BeautifulSoup
+
+        if targeted and sections is None:
+            if estimated_section_share(body) > TARGETED_SHARE:
+                targeted = False
+            else:
+                sections = ScheduleScraper.extract_sections(chunks=[body])
+        if targeted and sum(map(len, sections)) <= len(body) * TARGETED_SHARE:
+            with METRICS.span("parse.soup"):
+                return BeautifulSoup("".join(sections), "html.parser")
+        with METRICS.span("parse.soup"):
+            return BeautifulSoup(body, "html.parser")
+
+    @staticmethod
+    def extract_sections(*, chunks: Iterable[str]) -> List[str]:
+        extractor = ScheduleSectionExtractor()
+        with METRICS.span("parse.extract_sections"):
+            for chunk in chunks:
+                extractor.feed(chunk)
+            extractor.close()
+        return extractor.sections
+
+    @staticmethod
+    def session() -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = getattr(ScheduleScraper._SESSIONS, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            ScheduleScraper._SESSIONS.session = session
+        return session
@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from metrics import configure_logging
+from response_cache import CachedResponse, ResponseCache
+from schedule_scraper import ScheduleScraper
+
+LOGGER = logging.getLogger("schedule_sources")
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    url: str
+    # Runs in a worker process, so it must be a picklable module-level function.
+    parse: Callable[[str], Any]
+
+
+@dataclass
+class SourceResult:
+    name: str
+    url: str
+    fetch_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    bytes: int = 0
+    not_modified: bool = False
+    validators_changed: bool = False
+    result: Any = None
+    error: Optional[str] = None
+
+
+class SourceRegistry:
+    _SOURCES: Dict[str, Source] = {}
+
+    @staticmethod
+    def register(source: Source) -> Source:
+        if source.name in SourceRegistry._SOURCES:
+            raise ValueError(f"Source {source.name!r} is already registered")
+        SourceRegistry._SOURCES[source.name] = source
+        return source
+
+    @staticmethod
+    def get(name: str) -> Source:
+        return SourceRegistry._SOURCES[name]
+
+    @staticmethod
+    def all() -> List[Source]:
+        return list(SourceRegistry._SOURCES.values())
+
+
+def parse_ferry_schedules(body: str) -> bytes:
+    from json_schedule_generator import JsonScheduleGenerator
+
+    soup = ScheduleScraper.parse_schedules(body=body)
+    timetables = JsonScheduleGenerator.create_timetables(schedules_soup=soup)
+    return timetables.SerializeToString()
+
+
+def parse_page_summary(body: str) -> dict:
+    # Generic parser for notice and status pages: enough to notice changes.
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body, "html.parser")
+    main = soup.find("main") or soup.body or soup
+    text = " ".join(main.get_text(" ").split())
+    return {
+        "title": soup.title.get_text(strip=True) if soup.title else None,
+        "headings": [
+            heading.get_text(" ", strip=True) for heading in main.find_all(["h1", "h2"])
+        ],
+        "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+    }
+
+
+SourceRegistry.register(
+    Source(
+        name="ferry-schedules",
+        url=ScheduleScraper.SCHEDULE_URL,
+        parse=parse_ferry_schedules,
+    )
+)
+
+
+def parse_context() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def timed_parse(parse: Callable[[str], Any], body: str) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = parse(body)
+    return result, time.perf_counter() - started
+
+
+class SourcePipeline:
+    def __init__(
+        self,
+        *,
+        sources: Sequence[Source],
+        fetch_workers: int = 8,
+        parse_workers: Optional[int] = None,
+        connections_per_host: int = 2,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.sources = list(sources)
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.connections_per_host = connections_per_host
+        self.cache = cache
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+        self._fetched: Dict[str, CachedResponse] = {}
+
+    def run(self) -> List[SourceResult]:
+        results = {
+            source.name: SourceResult(name=source.name, url=source.url)
+            for source in self.sources
+        }
+        parses: Dict[str, Future] = {}
+        # Workers are started while fetch threads run (and, from run(), while
+        # the schedules page is parsed), so they must not be forked from this
+        # process: a lock held by another thread would stay held in the child.
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers, mp_context=parse_context()
+        ) as parse_pool:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool:
+                fetches = {
+                    fetch_pool.submit(self._fetch, source, results): source
+                    for source in self.sources
+                }
+                # Parsing starts as soon as each page arrives, in its own
+                # process, so a large page never holds up the other fetches.
+                for fetch in as_completed(fetches):
+                    source = fetches[fetch]
+                    try:
+                        body = fetch.result()
+                    except Exception as error:
+                        results[source.name].error = f"fetch failed: {error}"
+                        LOGGER.error(f"{source.name}: {results[source.name].error}")
+                        continue
+                    if body is not None:
+                        parses[source.name] = parse_pool.submit(
+                            timed_parse, source.parse, body
+                        )
+            for name, parse in parses.items():
+                try:
+                    results[name].result, results[name].parse_seconds = parse.result()
+                except Exception as error:
+                    results[name].error = f"parse failed: {error}"
+                    LOGGER.error(f"{name}: {results[name].error}")
+        if self.cache is not None:
+            # As in run(), a response is only cached once it parsed cleanly.
+            for name, result in results.items():
+                if result.error is None and (
+                    not result.not_modified or result.validators_changed
+                ):
+                    self.cache.store(response=self._fetched[name])
+        for result in results.values():
+            LOGGER.info(
+                f"{result.name}: fetched {result.bytes} bytes in "
+                f"{result.fetch_seconds * 1000:.0f} ms, parsed in "
+                f"{result.parse_seconds * 1000:.0f} ms"
+                + (" (not modified)" if result.not_modified else "")
+                + (f", {result.error}" if result.error else "")
+            )
+        return list(results.values())
+
+    def _fetch(self, source: Source, results: Dict[str, SourceResult]) -> Optional[str]:
+        with self._host_limit(source.url):
+            started = time.perf_counter()
+            # Bodies are parsed in another process, so nothing is extracted
+            # while fetching.
+            fetched = ScheduleScraper.fetch_schedules(
+                url=source.url, cache=self.cache, extract_sections=False
+            )
+            results[source.name].fetch_seconds = time.perf_counter() - started
+        results[source.name].bytes = len(fetched.response.body.encode("utf-8"))
+        results[source.name].not_modified = fetched.not_modified
+        results[source.name].validators_changed = fetched.validators_changed
+        self._fetched[source.name] = fetched.response
+        if fetched.not_modified:
+            return None
+        return fetched.response.body
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(
+                    self.connections_per_host
+                )
+            return self._host_limits[host]
+
+
+def write_report(path: str, results: Sequence[SourceResult]) -> None:
+    report = [
+        {
+            "name": result.name,
+            "url": result.url,
+            "fetch_seconds": result.fetch_seconds,
+            "parse_seconds": result.parse_seconds,
+            "bytes": result.bytes,
+            "not_modified": result.not_modified,
+            "error": result.error,
+            "result": result.result if isinstance(result.result, dict) else None,
+        }
+        for result in results
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+def parse_source(value: str) -> Source:
+    name, _, url = value.partition("=")
+    if not name or not url:
+        raise argparse.ArgumentTypeError("expected NAME=URL")
+    return Source(name=name, url=url, parse=parse_page_summary)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch and parse every source")
+    parser.add_argument(
+        "--source",
+        action="append",
+        type=parse_source,
+        default=[],
+        dest="sources",
+        help="extra NAME=URL page to track with the generic page summary parser",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        help="only run these registered sources",
+    )
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int)
+    parser.add_argument("--connections-per-host", type=int, default=2)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--report", help="write per-source timings and summaries as JSON"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    configure_logging()
+    args = parse_args()
+    for source in args.sources:
+        SourceRegistry.register(source)
+    sources = [SourceRegistry.get(name) for name in args.only] or SourceRegistry.all()
+    pipeline = SourcePipeline(
+        sources=sources,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        connections_per_host=args.connections_per_host,
+        cache=None if args.no_cache else ResponseCache(),
+    )
+    results = pipeline.run()
+    if args.report:
+        write_report(args.report, results)
+    if any(result.error for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
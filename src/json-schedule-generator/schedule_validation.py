@@ -0,0 +1,245 @@
+import operator
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from conversions import minutes_to_time, optional_date, service_day_minutes
+from models.proto.schedules_pb2 import ScheduleTimetable, Timetables
+from timetable import DIRECTIONS
+
+ERROR = "error"
+WARNING = "warning"
+# Longer gaps between sailings in one direction are reported; the real
+# timetables never leave more than a couple of hours.
+MAX_HEADWAY_MINUTES = 180
+# A season whose departures shrink or grow by more than this fraction of
+# the previous output is reported.
+MAX_DEPARTURE_CHANGE = 0.5
+
+
+@dataclass
+class ValidationIssue:
+    check: str
+    severity: str
+    message: str
+    schedule: Optional[str] = None
+    location: Optional[str] = None
+    direction: Optional[str] = None
+
+
+@dataclass
+class ValidationReport:
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    def error(self, check: str, message: str, **where: Optional[str]) -> None:
+        self.issues.append(ValidationIssue(check, ERROR, message, **where))
+
+    def warning(self, check: str, message: str, **where: Optional[str]) -> None:
+        self.issues.append(ValidationIssue(check, WARNING, message, **where))
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "errors": len(self.errors),
+            "warnings": len(self.warnings),
+            "issues": [asdict(issue) for issue in self.issues],
+        }
+
+
+class ScheduleValidationError(ValueError):
+    def __init__(self, report: ValidationReport) -> None:
+        super().__init__(
+            "; ".join(issue.message for issue in report.errors)
+            or "Schedules failed validation"
+        )
+        self.report = report
+
+
+def validate_timetables(
+    timetables: Timetables,
+    *,
+    previous: Optional[Timetables] = None,
+    report: Optional[ValidationReport] = None,
+) -> ValidationReport:
+    # Every departure is visited once; the date and previous-output checks
+    # only look at per-season and per-location totals.
+    report = report or ValidationReport()
+    if not timetables.schedules:
+        report.error("no-schedules", "No schedule could be built from the page")
+        return report
+    previous_counts = departure_counts(previous) if previous is not None else {}
+    last_name, last_start, last_end = None, None, None
+    for schedule in timetables.schedules:
+        start, end = optional_date(schedule.start), optional_date(schedule.end)
+        if end is not None and end < start:
+            report.error(
+                "overlap",
+                f"{schedule.name} ends on {end}, before it starts on {start}",
+                schedule=schedule.name,
+            )
+        if last_start is not None and (
+            start <= last_start or (last_end is not None and start <= last_end)
+        ):
+            report.error(
+                "overlap",
+                f"{schedule.name} starting {start} overlaps {last_name}",
+                schedule=schedule.name,
+            )
+        last_name, last_start, last_end = schedule.name, start, end
+        total = 0
+        for location, location_timetable in sorted(schedule.locations.items()):
+            counts = []
+            for direction in DIRECTIONS:
+                minutes = getattr(location_timetable, direction)
+                check_departures(report, schedule.name, location, direction, minutes)
+                counts.append(len(minutes))
+            total += sum(counts)
+            if 0 in counts:
+                report.error(
+                    "one-way",
+                    f"{location} has {counts[0]} city and {counts[1]} island "
+                    f"departures in {schedule.name}",
+                    schedule=schedule.name,
+                    location=location,
+                )
+            elif counts[0] != counts[1]:
+                report.warning(
+                    "count-mismatch",
+                    f"{location} has {counts[0]} city but {counts[1]} island "
+                    f"departures in {schedule.name}",
+                    schedule=schedule.name,
+                    location=location,
+                )
+        if previous is not None:
+            compare_previous(report, schedule, total, previous_counts)
+    if previous is not None:
+        names = {schedule.name for schedule in timetables.schedules}
+        for name in previous_counts:
+            if name not in names:
+                report.warning(
+                    "season-removed",
+                    f"{name} was in the previous output but is not on the page",
+                    schedule=name,
+                )
+    return report
+
+
+def check_departures(
+    report: ValidationReport,
+    schedule: str,
+    location: str,
+    direction: str,
+    minutes: Sequence[int],
+) -> None:
+    # The gaps between consecutive departures are taken in one C-level pass;
+    # only a direction with a problem is walked again to find where it is.
+    # Each problem is reported once per direction, at its first occurrence.
+    minutes = list(minutes)
+    steps = list(map(operator.sub, minutes[1:], minutes))
+    if not steps or (min(steps) > 0 and max(steps) <= MAX_HEADWAY_MINUTES):
+        return
+    where = {"schedule": schedule, "location": location, "direction": direction}
+    if min(steps) < 0:
+        # Sailings after midnight listed as "00:15" rather than "24:15": one
+        # large drop is the day rolling over, not a misordered row.
+        wrapped = service_day_minutes(minutes)
+        if wrapped != minutes:
+            position = next(
+                i for i, (a, b) in enumerate(zip(minutes, wrapped)) if a != b
+            )
+            report.warning(
+                "rollover",
+                f"{location} {direction} in {schedule} goes from "
+                f"{minutes_to_time(minutes[position - 1])} to "
+                f"{minutes_to_time(minutes[position])}, read as "
+                f"{minutes_to_time(wrapped[position])} the same service day",
+                **where,
+            )
+            minutes = wrapped
+            steps = list(map(operator.sub, minutes[1:], minutes))
+    unordered, duplicate, gap = None, None, None
+    for position, step in enumerate(steps):
+        pair = (minutes[position], minutes[position + 1])
+        if step < 0 and unordered is None:
+            unordered = pair
+        elif step == 0 and duplicate is None:
+            duplicate = pair[0]
+        elif step > MAX_HEADWAY_MINUTES and gap is None:
+            gap = pair
+    if unordered is not None:
+        report.error(
+            "unordered",
+            f"{location} {direction} in {schedule} goes from "
+            f"{minutes_to_time(unordered[0])} back to {minutes_to_time(unordered[1])}",
+            **where,
+        )
+    if duplicate is not None:
+        report.warning(
+            "duplicate",
+            f"{location} {direction} in {schedule} lists "
+            f"{minutes_to_time(duplicate)} twice",
+            **where,
+        )
+    if gap is not None:
+        report.warning(
+            "headway",
+            f"{location} {direction} in {schedule} has no sailing between "
+            f"{minutes_to_time(gap[0])} and {minutes_to_time(gap[1])}",
+            **where,
+        )
+
+
+def departure_counts(timetables: Timetables) -> Dict[str, Dict[str, int]]:
+    return {
+        schedule.name: {
+            location: len(location_timetable.departsCity)
+            + len(location_timetable.departsIsland)
+            for location, location_timetable in schedule.locations.items()
+        }
+        for schedule in timetables.schedules
+    }
+
+
+def compare_previous(
+    report: ValidationReport,
+    schedule: ScheduleTimetable,
+    total: int,
+    previous_counts: Dict[str, Dict[str, int]],
+) -> None:
+    counts = previous_counts.get(schedule.name)
+    if counts is None:
+        return
+    for location in sorted(counts.keys() - schedule.locations.keys()):
+        report.warning(
+            "location-removed",
+            f"{location} was in the previous {schedule.name} but is not now",
+            schedule=schedule.name,
+            location=location,
+        )
+    for location in sorted(schedule.locations.keys() - counts.keys()):
+        report.warning(
+            "location-added",
+            f"{location} is new in {schedule.name}",
+            schedule=schedule.name,
+            location=location,
+        )
+    previous_total = sum(counts.values())
+    if previous_total and abs(total - previous_total) > (
+        MAX_DEPARTURE_CHANGE * previous_total
+    ):
+        report.warning(
+            "departures-changed",
+            f"{schedule.name} has {total} departures, previously {previous_total}",
+            schedule=schedule.name,
+        )
@@ -0,0 +1,235 @@
+import datetime
+import json
+import logging
+import random
+import shlex
+import signal
+import socket
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+from conversions import optional_date
+from json_schedule_generator import GeneratorState, ScheduleChanges, run
+from metrics import METRICS
+from response_cache import MemoryResponseCache, ResponseCache
+from schedule_query import TORONTO
+from schedule_scraper import ScheduleScraper
+
+LOGGER = logging.getLogger("schedule_watcher")
+
+
+@dataclass
+class PollPolicy:
+    # Seconds between polls: reset to minimum whenever the page changes,
+    # stretched by backoff after each unchanged poll up to maximum, and held
+    # at minimum from lead_days before a known season start until that day.
+    minimum: float = 5 * 60
+    maximum: float = 60 * 60
+    backoff: float = 1.5
+    lead_days: int = 7
+    jitter: float = 0.1
+
+    def next_interval(
+        self,
+        previous: Optional[float],
+        *,
+        changed: bool,
+        today: datetime.date,
+        starts: Sequence[datetime.date],
+    ) -> float:
+        if previous is None or changed:
+            interval = self.minimum
+        else:
+            interval = min(previous * self.backoff, self.maximum)
+        if any(0 <= (start - today).days <= self.lead_days for start in starts):
+            interval = self.minimum
+        return interval
+
+    def jittered(self, interval: float, rng: random.Random) -> float:
+        # Spreads polls out so restarts do not line up on the same second.
+        return interval * rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class CommandHook:
+    TIMEOUT: float = 60
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+
+    def send(self, event: bytes) -> None:
+        subprocess.run(
+            shlex.split(self.command),
+            input=event,
+            timeout=CommandHook.TIMEOUT,
+            check=True,
+        )
+
+    def __repr__(self) -> str:
+        return f"CommandHook({self.command!r})"
+
+
+class WebhookHook:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def send(self, event: bytes) -> None:
+        ScheduleScraper.session().post(
+            self.url,
+            data=event,
+            headers={"Content-Type": "application/json"},
+            timeout=ScheduleScraper.TIMEOUT,
+        ).raise_for_status()
+
+    def __repr__(self) -> str:
+        return f"WebhookHook({self.url!r})"
+
+
+class SocketHook:
+    TIMEOUT: float = 10
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def send(self, event: bytes) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(SocketHook.TIMEOUT)
+            connection.connect(self.path)
+            connection.sendall(event)
+
+    def __repr__(self) -> str:
+        return f"SocketHook({self.path!r})"
+
+
+def toronto_today() -> datetime.date:
+    return datetime.datetime.now(TORONTO).date()
+
+
+class ScheduleWatcher:
+    # Runs the generator in a loop within one process, so the HTTP session,
+    # the cached response and the last timetables stay in memory between
+    # polls. Only a changed page is re-parsed, and only changed seasons
+    # trigger a write and a change event.
+    def __init__(
+        self,
+        *,
+        url: str = ScheduleScraper.SCHEDULE_URL,
+        policy: Optional[PollPolicy] = None,
+        hooks: Sequence = (),
+        force: bool = False,
+        use_cache: bool = True,
+        today: Callable[[], datetime.date] = toronto_today,
+        wait: Optional[Callable[[float], bool]] = None,
+        rng: Optional[random.Random] = None,
+        **options,
+    ) -> None:
+        self.url = url
+        self.policy = policy or PollPolicy()
+        self.hooks = list(hooks)
+        self.options = options
+        self.today = today
+        self.rng = rng or random.Random()
+        self.state = GeneratorState()
+        self.cache = MemoryResponseCache(
+            directory=ResponseCache.DEFAULT_DIRECTORY if use_cache else None
+        )
+        self.stopped = threading.Event()
+        # wait(seconds) returns True when the watcher should stop.
+        self.wait = wait or self.stopped.wait
+        self._force = force
+
+    def poll(self) -> Optional[ScheduleChanges]:
+        METRICS.reset()
+        changes = run(
+            url=self.url,
+            cache=self.cache,
+            state=self.state,
+            force=self._force,
+            **self.options,
+        )
+        self._force = False
+        if changes is not None and changes.any:
+            self.notify(changes)
+        return changes
+
+    def notify(self, changes: ScheduleChanges) -> None:
+        event = {
+            "event": "schedules.changed",
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "url": self.url,
+            **changes.summary(),
+        }
+        payload = json.dumps(event).encode("utf-8") + b"\n"
+        for hook in self.hooks:
+            # A failing hook is logged and skipped; the output is already
+            # written and the other hooks still hear about it.
+            try:
+                hook.send(payload)
+            except Exception as error:
+                LOGGER.error(f"{hook} failed: {error}")
+            else:
+                LOGGER.info(f"Notified {hook}")
+
+    def season_starts(self) -> List[datetime.date]:
+        if self.state.timetables is None:
+            return []
+        return [
+            start
+            for start in map(
+                optional_date,
+                (schedule.start for schedule in self.state.timetables.schedules),
+            )
+            if start is not None
+        ]
+
+    def run_forever(self, *, max_polls: Optional[int] = None) -> int:
+        interval = None
+        polls = 0
+        while not self.stopped.is_set():
+            changed = False
+            # A network error or an unreadable page must not end the watcher;
+            # the last good output stays in place until the next poll.
+            try:
+                changes = self.poll()
+                changed = changes is not None and changes.any
+            except Exception as error:
+                LOGGER.error(f"Poll failed: {error}")
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            interval = self.policy.next_interval(
+                interval,
+                changed=changed,
+                today=self.today(),
+                starts=self.season_starts(),
+            )
+            delay = self.policy.jittered(interval, self.rng)
+            LOGGER.info(f"Next poll in {delay:.0f}s")
+            if self.wait(delay):
+                break
+        return polls
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def watch(
+    *,
+    url: str = ScheduleScraper.SCHEDULE_URL,
+    policy: Optional[PollPolicy] = None,
+    hooks: Sequence = (),
+    **options,
+) -> None:
+    watcher = ScheduleWatcher(url=url, policy=policy, hooks=hooks, **options)
+    previous_handler = signal.signal(
+        signal.SIGTERM, lambda signum, frame: watcher.stop()
+    )
+    LOGGER.info(f"Watching {url}")
+    try:
+        watcher.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+    LOGGER.info("Stopped watching")
@@ -0,0 +1,321 @@
+import contextlib
+import gzip
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from json.encoder import encode_basestring
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Sequence
+
+from metrics import METRICS
+
+if TYPE_CHECKING:
+    from google.protobuf.descriptor import FieldDescriptor
+    from google.protobuf.message import Message
+    from models.proto.schedules_pb2 import Schedules
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LOGGER = logging.getLogger("schedule_writer")
+
+ARTIFACTS = ["min", "compact", "pb", "departures", "gz", "br"]
+INDENT = " " * 4
+# Encoded JSON is handed to the file and compressors in blocks of this size.
+BUFFER_SIZE = 1 << 16
+
+
+@dataclass
+class ArtifactReport:
+    path: str
+    bytes: int
+    seconds: float
+
+
+class ScheduleWriter:
+    @staticmethod
+    def write(
+        schedules: "Schedules", *, json_path: str, artifacts: Sequence[str] = ()
+    ) -> List[ArtifactReport]:
+        unknown = set(artifacts) - set(ARTIFACTS)
+        if unknown:
+            raise ValueError(f"Unknown artifacts: {', '.join(sorted(unknown))}")
+        require_brotli(artifacts)
+        base = json_path[: -len(".json")] if json_path.endswith(".json") else json_path
+        compressed = [artifact for artifact in ("gz", "br") if artifact in artifacts]
+
+        reports = ScheduleWriter.stream(
+            schedules, path=json_path, compressed=compressed
+        )
+        if "min" in artifacts:
+            reports += ScheduleWriter.stream(
+                schedules,
+                path=f"{base}.min.json",
+                minified=True,
+                compressed=compressed,
+            )
+        if "compact" in artifacts:
+            from departure_tables import compact_schedules
+
+            started = time.perf_counter()
+            compact = compact_schedules(schedules)
+            METRICS.add("write.compact", time.perf_counter() - started)
+            reports += ScheduleWriter.stream(
+                compact,
+                path=f"{base}.compact.json",
+                minified=True,
+                compressed=compressed,
+            )
+        if "pb" in artifacts:
+            started = time.perf_counter()
+            data = schedules.SerializeToString()
+            seconds = time.perf_counter() - started
+            METRICS.add("write.encode", seconds)
+            write_atomic(f"{base}.pb", data)
+            reports.append(ScheduleWriter._report(f"{base}.pb", len(data), seconds))
+        if "departures" in artifacts:
+            from departure_export import departures_path, export_departures
+            from timetable import Timetable
+
+            reports.append(
+                export_departures(
+                    map(Timetable.from_schedule, schedules.schedules),
+                    path=departures_path(base),
+                )
+            )
+        return reports
+
+    @staticmethod
+    def paths(json_path: str, artifacts: Sequence[str] = ()) -> List[str]:
+        # Every file write() produces for these artifacts, so callers can
+        # tell whether a requested one is missing.
+        require_brotli(artifacts)
+        base = json_path[: -len(".json")] if json_path.endswith(".json") else json_path
+        documents = [json_path]
+        if "min" in artifacts:
+            documents.append(f"{base}.min.json")
+        if "compact" in artifacts:
+            documents.append(f"{base}.compact.json")
+        paths = [
+            f"{document}{suffix}"
+            for document in documents
+            for suffix in ["", *(f".{a}" for a in ("gz", "br") if a in artifacts)]
+        ]
+        if "pb" in artifacts:
+            paths.append(f"{base}.pb")
+        if "departures" in artifacts:
+            from departure_export import departures_path
+
+            paths.append(departures_path(base))
+        return paths
+
+    @staticmethod
+    def stream(
+        message: "Message",
+        *,
+        path: str,
+        minified: bool = False,
+        compressed: Sequence[str] = (),
+    ) -> List[ArtifactReport]:
+        # Encodes the message straight to path, and to path.gz/path.br, a
+        # block at a time; memory use is bounded by the largest repeated
+        # field rather than the size of the document.
+        paths = [path, *(f"{path}.{artifact}" for artifact in compressed)]
+        seconds = dict.fromkeys(paths, 0.0)
+        with contextlib.ExitStack() as stack:
+            sinks: Dict[str, IO[bytes]] = {path: stack.enter_context(atomic_file(path))}
+            if "gz" in compressed:
+                sinks[f"{path}.gz"] = stack.enter_context(
+                    gzip.GzipFile(
+                        filename="",
+                        mode="wb",
+                        fileobj=stack.enter_context(atomic_file(f"{path}.gz")),
+                        compresslevel=9,
+                        mtime=0,
+                    )
+                )
+            if "br" in compressed:
+                sinks[f"{path}.br"] = stack.enter_context(
+                    contextlib.closing(
+                        BrotliFile(stack.enter_context(atomic_file(f"{path}.br")))
+                    )
+                )
+
+            def flush(block: bytes) -> None:
+                for sink_path, sink in sinks.items():
+                    started = time.perf_counter()
+                    sink.write(block)
+                    seconds[sink_path] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            buffer: List[str] = []
+            buffered = 0
+            for piece in iter_json(message, minified=minified):
+                buffer.append(piece)
+                buffered += len(piece)
+                if buffered >= BUFFER_SIZE:
+                    flush("".join(buffer).encode("utf-8"))
+                    buffer.clear()
+                    buffered = 0
+            flush("".join(buffer).encode("utf-8"))
+            # Whatever the sinks did not spend is encoding time.
+            encode_seconds = time.perf_counter() - started - sum(seconds.values())
+        METRICS.add("write.encode", encode_seconds)
+        for compressed_path in paths[1:]:
+            METRICS.add("write.compress", seconds[compressed_path])
+        seconds[path] += encode_seconds
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            # Only read back when asked for with --log-output.
+            with open(path, encoding="utf-8") as f:
+                LOGGER.debug(f"Created schedules string: {f.read()}")
+        return [
+            ScheduleWriter._report(
+                artifact_path, os.path.getsize(artifact_path), seconds[artifact_path]
+            )
+            for artifact_path in paths
+        ]
+
+    @staticmethod
+    def to_json(message: "Message", *, minified: bool = False) -> bytes:
+        return "".join(iter_json(message, minified=minified)).encode("utf-8")
+
+    @staticmethod
+    def _report(path: str, size: int, seconds: float) -> ArtifactReport:
+        METRICS.count("bytes_written", size)
+        report = ArtifactReport(path=path, bytes=size, seconds=seconds)
+        LOGGER.info(
+            f"Wrote {path} ({report.bytes} bytes, serialized in "
+            f"{report.seconds * 1000:.2f} ms)"
+        )
+        return report
+
+
+def require_brotli(artifacts: Sequence[str]) -> None:
+    # brotli is in the Pipfile; an environment without it fails rather than
+    # quietly publishing no .br files.
+    if "br" in artifacts and brotli is None:
+        raise ValueError("brotli is needed to write .br artifacts")
+
+
+class BrotliFile:
+    def __init__(self, file: IO[bytes]) -> None:
+        self.file = file
+        self.compressor = brotli.Compressor(quality=11)
+
+    def write(self, data: bytes) -> None:
+        self.file.write(self.compressor.process(data))
+
+    def close(self) -> None:
+        self.file.write(self.compressor.finish())
+
+
+def iter_json(message: "Message", *, minified: bool = False) -> Iterator[str]:
+    # Yields the text of json.dumps(MessageToDict(message), ensure_ascii=False,
+    # indent=4), or the compact form, piece by piece without building the
+    # dict; map entries come out sorted by key. Covers the field types
+    # schedules.proto uses: messages, maps, repeated fields, strings, bools
+    # and 32-bit integers.
+    return _iter_message(message, 0, minified)
+
+
+def _newline(level: int, minified: bool) -> str:
+    return "" if minified else "\n" + INDENT * level
+
+
+def _iter_message(message: "Message", level: int, minified: bool) -> Iterator[str]:
+    fields = message.ListFields()
+    if not fields:
+        yield "{}"
+        return
+    inner = _newline(level + 1, minified)
+    key_separator = ":" if minified else ": "
+    yield "{"
+    for i, (field, value) in enumerate(fields):
+        yield f"{',' if i else ''}{inner}{encode_basestring(field.json_name)}{key_separator}"
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            yield from _iter_map(field, value, level + 1, minified)
+        elif field.is_repeated:
+            yield from _iter_list(field, value, level + 1, minified)
+        elif field.message_type is not None:
+            yield from _iter_message(value, level + 1, minified)
+        else:
+            yield _scalar_encoder(field)(value)
+    yield _newline(level, minified) + "}"
+
+
+def _iter_map(
+    field: "FieldDescriptor", value: Any, level: int, minified: bool
+) -> Iterator[str]:
+    value_field = field.message_type.fields_by_name["value"]
+    inner = _newline(level + 1, minified)
+    key_separator = ":" if minified else ": "
+    encode = None if value_field.message_type else _scalar_encoder(value_field)
+    yield "{"
+    # Sorted, because upb iterates maps in a per-process random order.
+    for i, key in enumerate(sorted(value)):
+        if isinstance(key, bool):
+            key_text = "true" if key else "false"
+        else:
+            key_text = str(key)
+        yield f"{',' if i else ''}{inner}{encode_basestring(key_text)}{key_separator}"
+        if encode is None:
+            yield from _iter_message(value[key], level + 1, minified)
+        else:
+            yield encode(value[key])
+    yield _newline(level, minified) + "}"
+
+
+def _iter_list(
+    field: "FieldDescriptor", values: Any, level: int, minified: bool
+) -> Iterator[str]:
+    inner = _newline(level + 1, minified)
+    if field.message_type is None:
+        # Scalar lists are short enough to join in one piece.
+        encode = _scalar_encoder(field)
+        yield f"[{inner}{(',' + inner).join(map(encode, values))}{_newline(level, minified)}]"
+        return
+    yield "["
+    for i, value in enumerate(values):
+        yield f"{',' if i else ''}{inner}"
+        yield from _iter_message(value, level + 1, minified)
+    yield _newline(level, minified) + "]"
+
+
+def _scalar_encoder(field: "FieldDescriptor") -> Callable[[Any], str]:
+    from google.protobuf.descriptor import FieldDescriptor
+
+    if field.type == FieldDescriptor.TYPE_STRING:
+        return encode_basestring
+    if field.type == FieldDescriptor.TYPE_BOOL:
+        return lambda value: "true" if value else "false"
+    if field.cpp_type in (
+        FieldDescriptor.CPPTYPE_INT32,
+        FieldDescriptor.CPPTYPE_UINT32,
+    ):
+        return str
+    raise TypeError(f"Field {field.full_name} is not supported by iter_json")
+
+
+@contextlib.contextmanager
+def atomic_file(path: str) -> Iterator[IO[bytes]]:
+    # Readers (build.sh, schedule_api.py) never see a half-written file.
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    with atomic_file(path) as f:
+        f.write(data)
@@ -0,0 +1,285 @@
+import argparse
+import datetime
+from bisect import bisect_right
+from typing import (
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from conversions import MINUTES_PER_DAY, clock_to_minutes, optional_date
+from models.proto.schedules_pb2 import ServiceCalendar, ServiceException
+from schedule_query import TORONTO
+from timetable import (
+    SCHEDULES_HELP,
+    SCHEDULES_PATH,
+    Departures,
+    Timetable,
+    load_timetables,
+)
+
+ONE_DAY = datetime.timedelta(days=1)
+# Days ahead of today that day files and the static site cover.
+HORIZON_DAYS = 366
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    # Inclusive date intervals, possibly overlapping and open-ended, cut at
+    # every boundary into disjoint segments that each list the values
+    # covering them in input order. A date resolves with one bisect; a
+    # range is a bisect plus one step per segment it overlaps.
+    def __init__(
+        self, intervals: Iterable[Tuple[datetime.date, Optional[datetime.date], T]]
+    ) -> None:
+        intervals = list(intervals)
+        starting: Dict[datetime.date, List[int]] = {}
+        stopping: Dict[datetime.date, List[int]] = {}
+        for position, (start, end, _) in enumerate(intervals):
+            if end is not None and end < start:
+                raise ValueError(f"Interval ends on {end}, before its start {start}")
+            starting.setdefault(start, []).append(position)
+            if end is not None:
+                stopping.setdefault(end + ONE_DAY, []).append(position)
+        self._starts: List[datetime.date] = []
+        self._values: List[Tuple[T, ...]] = []
+        active = set()
+        for boundary in sorted(starting.keys() | stopping.keys()):
+            active.difference_update(stopping.get(boundary, ()))
+            active.update(starting.get(boundary, ()))
+            values = tuple(intervals[position][2] for position in sorted(active))
+            if self._values and values == self._values[-1]:
+                continue
+            self._starts.append(boundary)
+            self._values.append(values)
+
+    def at(self, date: datetime.date) -> Tuple[T, ...]:
+        position = bisect_right(self._starts, date) - 1
+        if position < 0:
+            return ()
+        return self._values[position]
+
+    def segments(
+        self, first: datetime.date, last: datetime.date
+    ) -> Iterator[Tuple[datetime.date, datetime.date, Tuple[T, ...]]]:
+        # (start, end, values) for the segments overlapping [first, last],
+        # clipped to it; uncovered stretches come back with no values.
+        position = max(bisect_right(self._starts, first) - 1, 0)
+        start = first
+        while start <= last:
+            if position < len(self._starts) and self._starts[position] <= start:
+                values = self._values[position]
+                position += 1
+            else:
+                values = ()
+            following = self._starts[position] if position < len(self._starts) else None
+            end = last if following is None else min(last, following - ONE_DAY)
+            yield start, end, values
+            start = end + ONE_DAY
+
+
+class DayService:
+    __slots__ = ("timetable", "exceptions")
+
+    def __init__(self, *, timetable: Timetable, exceptions: Tuple[str, ...]) -> None:
+        # On ordinary days timetable is the season's own Timetable; on
+        # exception days its untouched locations share the season's
+        # Departures.
+        self.timetable = timetable
+        self.exceptions = exceptions
+
+    def __repr__(self) -> str:
+        return (
+            f"DayService(timetable={self.timetable.name!r}, "
+            f"exceptions={self.exceptions!r})"
+        )
+
+
+class ServiceCalendarIndex:
+    # Resolves the service in effect on any date: the season timetable from
+    # its own start/end, then any exceptions covering the date applied in
+    # calendar order. Seasons need not be back-to-back; where they overlap
+    # the later start wins. Resolved days are shared between every date of
+    # the same (season, exceptions) segment.
+    def __init__(
+        self,
+        timetables: Iterable[Timetable],
+        exceptions: Iterable[ServiceException] = (),
+    ) -> None:
+        self.timetables = sorted(timetables, key=lambda timetable: timetable.start)
+        self.exceptions = list(exceptions)
+        self._seasons = IntervalIndex(
+            (timetable.start, timetable.end, position)
+            for position, timetable in enumerate(self.timetables)
+        )
+        self._exceptions = IntervalIndex(
+            (
+                optional_date(exception.start),
+                optional_date(exception.end) or optional_date(exception.start),
+                position,
+            )
+            for position, exception in enumerate(self.exceptions)
+        )
+        self._days: Dict[Tuple[int, Tuple[int, ...]], DayService] = {}
+
+    @staticmethod
+    def load(
+        *, schedules_path: str, calendar_path: Optional[str] = None
+    ) -> "ServiceCalendarIndex":
+        return ServiceCalendarIndex(
+            load_timetables(path=schedules_path),
+            load_calendar(path=calendar_path).exceptions if calendar_path else (),
+        )
+
+    def effective(self, date: datetime.date) -> Optional[DayService]:
+        seasons = self._seasons.at(date)
+        if not seasons:
+            return None
+        return self._resolve(seasons[-1], self._exceptions.at(date))
+
+    def effective_range(
+        self, first: datetime.date, last: datetime.date
+    ) -> Iterator[Tuple[datetime.date, datetime.date, Optional[DayService]]]:
+        # (start, end, service) runs covering [first, last], merged across
+        # season and exception boundaries only where the service changes.
+        for start, end, seasons in self._seasons.segments(first, last):
+            if not seasons:
+                yield start, end, None
+                continue
+            for run_start, run_end, exceptions in self._exceptions.segments(start, end):
+                yield run_start, run_end, self._resolve(seasons[-1], exceptions)
+
+    def served_range(
+        self, first: datetime.date, last: datetime.date
+    ) -> Iterator[Tuple[datetime.date, datetime.date, DayService]]:
+        # effective_range without the runs of days with no season.
+        for start, end, service in self.effective_range(first, last):
+            if service is not None:
+                yield start, end, service
+
+    def expand(
+        self, first: datetime.date, last: datetime.date
+    ) -> Dict[datetime.date, DayService]:
+        # Every served day in [first, last]. Days of one run map to the same
+        # DayService, so a year is a few hundred dict entries pointing at a
+        # handful of timetables.
+        days = {}
+        for start, end, service in self.served_range(first, last):
+            for offset in range((end - start).days + 1):
+                days[start + datetime.timedelta(days=offset)] = service
+        return days
+
+    def expand_year(self, year: int) -> Dict[datetime.date, DayService]:
+        return self.expand(datetime.date(year, 1, 1), datetime.date(year, 12, 31))
+
+    def _resolve(self, season: int, exceptions: Tuple[int, ...]) -> DayService:
+        key = (season, exceptions)
+        service = self._days.get(key)
+        if service is None:
+            timetable = self.timetables[season]
+            if exceptions:
+                timetable = apply_exceptions(
+                    timetable, [self.exceptions[i] for i in exceptions]
+                )
+            service = DayService(
+                timetable=timetable,
+                exceptions=tuple(self.exceptions[i].name for i in exceptions),
+            )
+            self._days[key] = service
+        return service
+
+
+def horizon(
+    today: Optional[datetime.date] = None, horizon_days: int = HORIZON_DAYS
+) -> Tuple[datetime.date, datetime.date]:
+    # The first and last day to publish: yesterday, for clients whose clock
+    # is behind Toronto, through horizon_days after today (default: today in
+    # Toronto).
+    today = today or datetime.datetime.now(TORONTO).date()
+    return today - ONE_DAY, today + datetime.timedelta(days=horizon_days)
+
+
+def apply_exceptions(
+    timetable: Timetable, exceptions: Sequence[ServiceException]
+) -> Timetable:
+    locations = dict(timetable.locations)
+    for exception in exceptions:
+        for override in exception.overrides:
+            replacement = Departures.from_location_schedule(override.departures)
+            if not override.startTime and not override.endTime:
+                locations[override.location] = replacement
+                continue
+            start = clock_to_minutes(override.startTime) if override.startTime else 0
+            end = (
+                clock_to_minutes(override.endTime)
+                if override.endTime
+                # The rest of the service day, sailings after midnight too.
+                else 2 * MINUTES_PER_DAY
+            )
+            base = locations.get(override.location, Departures())
+            locations[override.location] = Departures(
+                departs_city=splice(
+                    base.departs_city, replacement.departs_city, start, end
+                ),
+                departs_island=splice(
+                    base.departs_island, replacement.departs_island, start, end
+                ),
+            )
+    return Timetable(
+        name=timetable.name,
+        start=timetable.start,
+        end=timetable.end,
+        locations=locations,
+    )
+
+
+def splice(
+    base: Sequence[int], replacement: Sequence[int], start: int, end: int
+) -> List[int]:
+    # base with its departures in [start, end) swapped for replacement's.
+    return sorted(
+        [minutes for minutes in base if not start <= minutes < end]
+        + [minutes for minutes in replacement if start <= minutes < end]
+    )
+
+
+def load_calendar(*, path: str) -> ServiceCalendar:
+    from google.protobuf import json_format
+
+    with open(path, encoding="utf-8") as f:
+        return json_format.Parse(f.read(), ServiceCalendar())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Show the service in effect over a range of dates"
+    )
+    parser.add_argument("first", type=datetime.date.fromisoformat)
+    parser.add_argument("last", type=datetime.date.fromisoformat, nargs="?")
+    parser.add_argument("--schedules", default=SCHEDULES_PATH, help=SCHEDULES_HELP)
+    parser.add_argument(
+        "--calendar", help="ServiceCalendar JSON with holiday and event exceptions"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = ServiceCalendarIndex.load(
+        schedules_path=args.schedules, calendar_path=args.calendar
+    )
+    for start, end, service in index.effective_range(
+        args.first, args.last or args.first
+    ):
+        if service is None:
+            description = "no service"
+        else:
+            description = " + ".join([service.timetable.name, *service.exceptions])
+        print(f"{start} to {end}: {description}")
@@ -0,0 +1,189 @@
+import argparse
+import datetime
+import html
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from conversions import minutes_to_am_pm
+from day_artifacts import content_hash, to_json, write_if_changed
+from metrics import configure_logging
+from service_calendar import (
+    HORIZON_DAYS,
+    ServiceCalendarIndex,
+    horizon,
+    load_calendar,
+)
+from timetable import (
+    DIRECTIONS,
+    SCHEDULES_HELP,
+    SCHEDULES_PATH,
+    Timetable,
+    load_timetables,
+)
+
+if TYPE_CHECKING:
+    from array import array
+
+    from models.proto.schedules_pb2 import ServiceException
+
+LOGGER = logging.getLogger("static_site")
+DEFAULT_PATH = "../../output/site"
+
+
+@dataclass
+class StaticSiteReport:
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+class StaticSite:
+    # The website's departure tables, rendered ahead of time: one HTML
+    # fragment per distinct route timetable, named by its content hash so it
+    # can be cached forever, and routes.json listing which fragments are in
+    # effect over each run of days. The browser only picks today's run and
+    # moves departed rows below END OF THE DAY.
+    @staticmethod
+    def build(
+        timetables: Iterable[Timetable],
+        *,
+        directory: str = DEFAULT_PATH,
+        exceptions: Iterable["ServiceException"] = (),
+        today: Optional[datetime.date] = None,
+        horizon_days: int = HORIZON_DAYS,
+    ) -> StaticSiteReport:
+        index = ServiceCalendarIndex(timetables, exceptions)
+        fragments_directory = os.path.join(directory, "fragments")
+        os.makedirs(fragments_directory, exist_ok=True)
+        fragments: Dict[str, bytes] = {}
+        # Keyed by departures, so docks and seasons with the same sailings
+        # are rendered once; runs sharing a DayService share its routes.
+        rendered: Dict[Tuple[str, bytes], str] = {}
+        service_routes: Dict[int, List[dict]] = {}
+        runs = []
+        first, last = horizon(today, horizon_days)
+        for start, end, service in index.served_range(first, last):
+            routes = service_routes.get(id(service))
+            if routes is None:
+                routes = []
+                # Exceptions can add a location after the season's sorted
+                # ones, so routes are sorted here for a stable list.
+                for location, departures in sorted(service.timetable.locations.items()):
+                    for direction in DIRECTIONS:
+                        minutes = departures.direction(direction)
+                        if not minutes:
+                            continue
+                        key = (location, minutes.tobytes())
+                        name = rendered.get(key)
+                        if name is None:
+                            data = StaticSite.fragment(location, minutes)
+                            name = content_hash(data)
+                            fragments[name] = data
+                            rendered[key] = name
+                        routes.append(
+                            {
+                                "label": route_label(location, direction),
+                                "fragment": name,
+                            }
+                        )
+                service_routes[id(service)] = routes
+            # A season with no end date runs past the horizon, so its last
+            # run is left open rather than stopping on the build's last day.
+            open_ended = end == last and service.timetable.end is None
+            run = {
+                "start": start.isoformat(),
+                "end": None if open_ended else end.isoformat(),
+                "schedule": service.timetable.name,
+                "routes": routes,
+            }
+            if service.exceptions:
+                run["exceptions"] = list(service.exceptions)
+            runs.append(run)
+
+        report = StaticSiteReport()
+        for name, data in fragments.items():
+            filename = f"{name}.html"
+            if write_if_changed(os.path.join(fragments_directory, filename), data):
+                report.written.append(filename)
+            else:
+                report.unchanged.append(filename)
+        for filename in sorted(os.listdir(fragments_directory)):
+            if (
+                filename.endswith(".html")
+                and filename[: -len(".html")] not in fragments
+            ):
+                os.unlink(os.path.join(fragments_directory, filename))
+                report.removed.append(filename)
+        write_if_changed(
+            os.path.join(directory, "routes.json"),
+            to_json(
+                {
+                    "version": 1,
+                    "timezone": "America/Toronto",
+                    "first": first.isoformat(),
+                    "last": last.isoformat(),
+                    "runs": runs,
+                }
+            ),
+        )
+        LOGGER.info(
+            f"Site fragments: {len(report.written)} written, "
+            f"{len(report.unchanged)} unchanged, {len(report.removed)} removed"
+        )
+        return report
+
+    @staticmethod
+    def fragment(location: str, minutes: "array") -> bytes:
+        # Departures in order, each row tagged with its minute of the day so
+        # the page can tell which have left without parsing times.
+        rows = "".join(
+            f'<tr data-m="{minute}"><td>{minutes_to_am_pm(minute)}</td></tr>'
+            for minute in minutes
+        )
+        return (
+            f"<table><tr><th>Remaining Schedule for {html.escape(location)} "
+            f'today:</th></tr>{rows}<tr class="end"><td>END OF THE DAY</td></tr>'
+            "</table>"
+        ).encode("utf-8")
+
+
+def route_label(location: str, direction: str) -> str:
+    if direction == "departsCity":
+        return f"City to {location}"
+    return f"{location} to City"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pre-render the website's departure tables and routes.json"
+    )
+    parser.add_argument(
+        "--schedules",
+        default=SCHEDULES_PATH,
+        help=SCHEDULES_HELP,
+    )
+    parser.add_argument(
+        "--calendar", help="ServiceCalendar JSON with holiday and event exceptions"
+    )
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--today", type=datetime.date.fromisoformat)
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    if args.calendar:
+        exceptions = load_calendar(path=args.calendar).exceptions
+    else:
+        exceptions = ()
+    StaticSite.build(
+        load_timetables(path=args.schedules),
+        directory=args.output,
+        exceptions=exceptions,
+        today=args.today,
+        horizon_days=args.horizon_days,
+    )
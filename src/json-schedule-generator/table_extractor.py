@@ -0,0 +1,187 @@
+import functools
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+from bs4 import NavigableString, Tag
+from conversions import service_day_minutes, time_to_minutes
+from metrics import METRICS
+from models.proto.schedules_pb2 import LocationTimetable
+
+CELLS = ("td", "th")
+CITY_HEADER = "departs city"
+DEPARTS_PREFIX = "departs "
+# Cells such as "–" or "No service" are not departures; a real time always
+# has a digit in it, except for "noon".
+EMPTY_CELLS = {"", "-", "–", "—"}
+
+
+class TableFormatError(ValueError):
+    pass
+
+
+def raw_text(cell: Tag) -> str:
+    contents = cell.contents
+    if len(contents) == 1 and isinstance(contents[0], NavigableString):
+        # Plain text cells, nearly all of them, skip get_text()'s tree walk.
+        return contents[0]
+    return cell.get_text(" ")
+
+
+def cell_text(cell: Tag) -> str:
+    return " ".join(raw_text(cell).split())
+
+
+def child_tags(tag: Tag, names: Tuple[str, ...]) -> Iterator[Tag]:
+    for child in tag.contents:
+        if type(child) is Tag and child.name in names:
+            yield child
+
+
+def span(cell: Tag, attribute: str) -> int:
+    value = cell.attrs.get(attribute)
+    if value is None:
+        return 1
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        return 1
+
+
+def grid_rows(rows: Iterator[Tag]) -> Iterator[Dict[int, Optional[str]]]:
+    # Yields {column: text} for each row with colspan expanded, so a header
+    # lands over every column it spans. Columns covered by an earlier
+    # rowspan hold None.
+    covered: Dict[int, int] = {}
+    for row in rows:
+        cells: Dict[int, Optional[str]] = {}
+        for column, remaining in list(covered.items()):
+            cells[column] = None
+            if remaining == 1:
+                del covered[column]
+            else:
+                covered[column] = remaining - 1
+        column = 0
+        for cell in child_tags(row, CELLS):
+            while column in cells:
+                column += 1
+            text = cell_text(cell)
+            rowspan = span(cell, "rowspan")
+            for _ in range(span(cell, "colspan")):
+                cells[column] = text
+                if rowspan > 1:
+                    covered[column] = rowspan - 1
+                column += 1
+        yield cells
+
+
+def uncover(covered: Dict[int, int], column: int) -> int:
+    covered[column] -= 1
+    if not covered[column]:
+        del covered[column]
+    return column + 1
+
+
+def head_rows(table: Tag) -> Iterator[Tag]:
+    for thead in child_tags(table, ("thead",)):
+        yield from child_tags(thead, ("tr",))
+
+
+def body_rows(table: Tag) -> Iterator[Tag]:
+    # html.parser does not add an implied <tbody>, so bare rows count too.
+    for child in child_tags(table, ("tbody", "tr")):
+        if child.name == "tr":
+            yield child
+        else:
+            yield from child_tags(child, ("tr",))
+
+
+def header_row(table: Tag) -> Tuple[Dict[int, Optional[str]], bool]:
+    # Prefer <thead>; some tables put the <th> row at the top of the body.
+    for cells in grid_rows(head_rows(table)):
+        return cells, False
+    for row in body_rows(table):
+        if next(child_tags(row, ("th",)), None) is not None:
+            return next(grid_rows(iter([row]))), True
+        break
+    raise TableFormatError("Schedule table has no header row")
+
+
+def map_columns(headers: Dict[int, Optional[str]]) -> Tuple[str, int, int]:
+    city, island, location = None, None, None
+    for column, header in sorted(headers.items()):
+        if header is None:
+            continue
+        lowered = header.lower()
+        if lowered == CITY_HEADER:
+            if city is None:
+                city = column
+        elif lowered.startswith(DEPARTS_PREFIX) and island is None:
+            island, location = column, header[len(DEPARTS_PREFIX) :]
+    if city is None or island is None:
+        raise TableFormatError(
+            f"Schedule table headers {list(headers.values())} do not name "
+            "both directions"
+        )
+    return location, city, island
+
+
+@functools.lru_cache(maxsize=1024)
+def departure(text: str) -> Optional[int]:
+    text = " ".join(text.split())
+    if text in EMPTY_CELLS:
+        return None
+    if text.lower() != "noon" and not any(char.isdigit() for char in text):
+        return None
+    return time_to_minutes(text)
+
+
+def extract_location_timetable(table: Tag) -> Tuple[str, LocationTimetable]:
+    headers, header_in_body = header_row(table)
+    location, city, island = map_columns(headers)
+    rows = body_rows(table)
+    if header_in_body:
+        next(rows)
+    departs_city, departs_island = array("H"), array("H")
+    # One pass over the rows fills both directions. Only the two mapped
+    # columns are read; rowspan continuations are skipped, not re-counted.
+    last = max(city, island)
+    covered: Dict[int, int] = {}
+    rows_read = 0
+    for row in rows:
+        rows_read += 1
+        column = 0
+        for cell in child_tags(row, CELLS):
+            while column in covered:
+                column = uncover(covered, column)
+            if column > last:
+                break
+            colspan, rowspan = 1, 1
+            if cell.attrs:
+                colspan, rowspan = span(cell, "colspan"), span(cell, "rowspan")
+            if column <= city < column + colspan:
+                minutes = departure(raw_text(cell))
+                if minutes is not None:
+                    departs_city.append(minutes)
+            if column <= island < column + colspan:
+                minutes = departure(raw_text(cell))
+                if minutes is not None:
+                    departs_island.append(minutes)
+            if rowspan > 1:
+                for spanned in range(column, column + colspan):
+                    covered[spanned] = rowspan - 1
+            column += colspan
+        # Covered columns after the last cell of the row are used up too.
+        for spanned in [spanned for spanned in covered if spanned >= column]:
+            uncover(covered, spanned)
+    METRICS.count("rows", rows_read)
+    location_timetable = LocationTimetable()
+    location_timetable.departsCity.extend(service_day_minutes(departs_city))
+    location_timetable.departsIsland.extend(service_day_minutes(departs_island))
+    return location, location_timetable
+
+
+def caption_text(table: Tag) -> Optional[str]:
+    caption = next(child_tags(table, ("caption",)), None)
+    if caption is None:
+        return None
+    return cell_text(caption)
@@ -0,0 +1,226 @@
+import datetime
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from conversions import (
+    MINUTES_PER_DAY,
+    clock_to_minutes,
+    datetime_date_to_date,
+    minutes_to_time,
+    optional_date,
+    service_day_minutes,
+)
+from models.proto.schedules_pb2 import (
+    LocationSchedule,
+    LocationTimetable,
+    Schedule,
+    Schedules,
+    ScheduleTimetable,
+    Timetables,
+)
+
+DIRECTIONS = ("departsCity", "departsIsland")
+# json_schedule_generator's output, and the default input of every tool
+# reading it back with load_schedules.
+SCHEDULES_PATH = "../../output/schedule.json"
+SCHEDULES_HELP = (
+    "schedule.json, schedule.compact.json, or a binary Schedules file ending in .pb"
+)
+
+
+def clock_times(minutes: Iterable[int]) -> List[str]:
+    return [minutes_to_time(minute % MINUTES_PER_DAY) for minute in minutes]
+
+
+class Departures:
+    __slots__ = ("departs_city", "departs_island")
+
+    def __init__(
+        self, *, departs_city: Iterable[int] = (), departs_island: Iterable[int] = ()
+    ) -> None:
+        # Unsigned 16-bit minutes since midnight; 2 bytes per departure.
+        self.departs_city = array("H", departs_city)
+        self.departs_island = array("H", departs_island)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Departures):
+            return NotImplemented
+        return (
+            self.departs_city == other.departs_city
+            and self.departs_island == other.departs_island
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Departures(departs_city={self.departs_city.tolist()}, "
+            f"departs_island={self.departs_island.tolist()})"
+        )
+
+    def direction(self, direction: str) -> array:
+        if direction == "departsCity":
+            return self.departs_city
+        if direction == "departsIsland":
+            return self.departs_island
+        raise ValueError(f"Unknown direction {direction!r}")
+
+    @staticmethod
+    def from_proto(location_timetable: LocationTimetable) -> "Departures":
+        return Departures(
+            departs_city=location_timetable.departsCity,
+            departs_island=location_timetable.departsIsland,
+        )
+
+    def to_proto(self) -> LocationTimetable:
+        location_timetable = LocationTimetable()
+        location_timetable.departsCity.extend(self.departs_city)
+        location_timetable.departsIsland.extend(self.departs_island)
+        return location_timetable
+
+    @staticmethod
+    def from_location_schedule(location_schedule: LocationSchedule) -> "Departures":
+        # schedule.json lists sailings after midnight last, as "00:05"; the
+        # drop back recovers their service-day minutes (1445).
+        return Departures(
+            departs_city=service_day_minutes(
+                map(clock_to_minutes, location_schedule.departsCity)
+            ),
+            departs_island=service_day_minutes(
+                map(clock_to_minutes, location_schedule.departsIsland)
+            ),
+        )
+
+    def to_location_schedule(self) -> LocationSchedule:
+        # Clock times, so schedule.json stays as existing readers parse it.
+        location_schedule = LocationSchedule()
+        location_schedule.departsCity.extend(clock_times(self.departs_city))
+        location_schedule.departsIsland.extend(clock_times(self.departs_island))
+        return location_schedule
+
+
+class Timetable:
+    # upb iterates proto maps in a per-process random order, so locations
+    # are kept sorted by name to make everything derived from them stable.
+    __slots__ = ("name", "start", "end", "locations")
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        start: datetime.date,
+        end: Optional[datetime.date],
+        locations: Dict[str, Departures],
+    ) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.locations = locations
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Timetable):
+            return NotImplemented
+        return (
+            self.name == other.name
+            and self.start == other.start
+            and self.end == other.end
+            and self.locations == other.locations
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Timetable(name={self.name!r}, start={self.start!r}, "
+            f"end={self.end!r}, locations={self.locations!r})"
+        )
+
+    @staticmethod
+    def from_proto(schedule_timetable: ScheduleTimetable) -> "Timetable":
+        return Timetable(
+            name=schedule_timetable.name,
+            start=optional_date(schedule_timetable.start),
+            end=optional_date(schedule_timetable.end),
+            locations={
+                location: Departures.from_proto(location_timetable)
+                for location, location_timetable in sorted(
+                    schedule_timetable.locations.items()
+                )
+            },
+        )
+
+    def to_proto(self) -> ScheduleTimetable:
+        schedule_timetable = ScheduleTimetable()
+        schedule_timetable.name = self.name
+        schedule_timetable.start.CopyFrom(datetime_date_to_date(self.start))
+        schedule_timetable.end.CopyFrom(datetime_date_to_date(self.end))
+        for location, departures in self.locations.items():
+            schedule_timetable.locations[location].CopyFrom(departures.to_proto())
+        return schedule_timetable
+
+    @staticmethod
+    def from_schedule(schedule: Schedule) -> "Timetable":
+        return Timetable(
+            name=schedule.name,
+            start=optional_date(schedule.start),
+            end=optional_date(schedule.end),
+            locations={
+                location: Departures.from_location_schedule(location_schedule)
+                for location, location_schedule in sorted(schedule.locations.items())
+            },
+        )
+
+    def to_schedule(self) -> Schedule:
+        schedule = Schedule()
+        schedule.name = self.name
+        schedule.start.CopyFrom(datetime_date_to_date(self.start))
+        schedule.end.CopyFrom(datetime_date_to_date(self.end))
+        for location, departures in self.locations.items():
+            schedule.locations[location].CopyFrom(departures.to_location_schedule())
+        return schedule
+
+
+def timetables_to_schedules(timetables: Timetables) -> Schedules:
+    schedules = Schedules()
+    for schedule_timetable in timetables.schedules:
+        schedule = schedules.schedules.add()
+        schedule.name = schedule_timetable.name
+        schedule.start.CopyFrom(schedule_timetable.start)
+        schedule.end.CopyFrom(schedule_timetable.end)
+        for location, location_timetable in schedule_timetable.locations.items():
+            schedule.locations[location].CopyFrom(
+                Departures.from_proto(location_timetable).to_location_schedule()
+            )
+    return schedules
+
+
+def schedules_to_timetables(schedules: Schedules) -> Timetables:
+    timetables = Timetables()
+    for schedule in schedules.schedules:
+        schedule_timetable = timetables.schedules.add()
+        schedule_timetable.name = schedule.name
+        schedule_timetable.start.CopyFrom(schedule.start)
+        schedule_timetable.end.CopyFrom(schedule.end)
+        for location, location_schedule in schedule.locations.items():
+            schedule_timetable.locations[location].CopyFrom(
+                Departures.from_location_schedule(location_schedule).to_proto()
+            )
+    return timetables
+
+
+def load_schedules(*, path: str) -> Schedules:
+    if path.endswith(".pb"):
+        with open(path, "rb") as f:
+            return Schedules.FromString(f.read())
+    from google.protobuf import json_format
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".compact.json"):
+            from departure_tables import expand_schedules
+            from models.proto.schedules_pb2 import CompactSchedules
+
+            return expand_schedules(json_format.Parse(f.read(), CompactSchedules()))
+        return json_format.Parse(f.read(), Schedules())
+
+
+def load_timetables(*, path: str) -> List[Timetable]:
+    return [
+        Timetable.from_schedule(schedule)
+        for schedule in load_schedules(path=path).schedules
+    ]
@@ -1,131 +1,77 @@
-function createDate(year, month, day, time = null) {
-    // Creates a moment object with the specified date and time (optional) in America/Toronto timezone
-    const dateStr = `${year}-${month}-${day}` + (time ? ` ${time}` : '');
-    return moment.tz(dateStr, time ? 'YYYY-MM-DD HH:mm' : 'YYYY-MM-DD', 'America/Toronto');
-}
+// Departure tables are pre-rendered by static_site.py, so the page only needs
+// today's date and the current minute in Toronto to pick and split them.
+const TIMEZONE = 'America/Toronto';
+const clockFormat = new Intl.DateTimeFormat('en-US', {
+    timeZone: TIMEZONE, hour: '2-digit', minute: '2-digit', second: '2-digit', hour12: true,
+});
+const dateFormat = new Intl.DateTimeFormat('en-CA', {
+    timeZone: TIMEZONE, year: 'numeric', month: '2-digit', day: '2-digit',
+    hour: '2-digit', minute: '2-digit', hourCycle: 'h23',
+});
 
-function createToday(){
-    return moment.tz('America/Toronto')
+function createToday() {
+    // Today's date as YYYY-MM-DD and the minutes since midnight in America/Toronto timezone
+    const parts = {};
+    dateFormat.formatToParts(new Date()).forEach(part => {
+        parts[part.type] = part.value;
+    });
+    return {
+        date: `${parts.year}-${parts.month}-${parts.day}`,
+        minutes: Number(parts.hour) * 60 + Number(parts.minute),
+    };
 }
 
 function displayCurrentTimeEST() {
-    const currentTime = createToday().format('hh:mm:ss A');
-    document.getElementById('currentTime').innerText = currentTime;
+    document.getElementById('currentTime').innerText = clockFormat.format(new Date());
 }
 
 async function displayAllRoutes() {
-    // Fetches and processes the ferry schedule, adjusting dates to America/Toronto timezone
-    const response = await fetch('data/schedule.json');
-    const data = await response.json();
-    
-    const schedules = data.schedules;
-    const today = createToday().format('YYYY-MM-DD');
+    // Lists the routes of the run of days that includes today
+    const response = await fetch('data/routes.json', {cache: 'no-cache'});
+    const site = await response.json();
+    const today = createToday().date;
+    // A run with no end is the current season, which has no end date yet
+    const run = site.runs.find(run => run.start <= today && (run.end === null || today <= run.end));
+    if (!run) {
+        const timesContainer = document.getElementById('ferryTimes');
+        timesContainer.innerHTML = `<p>The schedule for ${today} is unavailable</p>`;
+        timesContainer.classList.add('styledFerryTimes');
+        return;
+    }
     const routeSelect = document.getElementById('ferryRoute');
-
-    schedules.forEach(schedule => {
-        const startDate = createDate(schedule.start.year, schedule.start.month, schedule.start.day);
-        
-        // Assume endDate is valid indefinitely if not specified
-        let endDate = createDate(9999, 12, 31);
-        if (Object.keys(schedule.end).length !== 0) {
-            endDate = createDate(schedule.end.year, schedule.end.month, schedule.end.day);
-        }
-
-        if (startDate.isSameOrBefore(today) && endDate.isSameOrAfter(today)) {
-            Object.keys(schedule.locations).forEach(location => {
-                Object.keys(schedule.locations[location]).forEach(direction => {
-                    let routeOption;
-                    if (direction === "departsCity") {
-                        routeOption = `City to ${location}`;
-                    } else if (direction === "departsIsland") {
-                        routeOption = `${location} to City`;
-                    }
-                    const option = document.createElement('option');
-                    option.value = JSON.stringify({location, direction});
-                    option.innerText = routeOption;
-                    routeSelect.appendChild(option);
-                });
-            });
-        }
+    run.routes.forEach(route => {
+        const option = document.createElement('option');
+        option.value = route.fragment;
+        option.innerText = route.label;
+        routeSelect.appendChild(option);
     });
 }
 
-async function showNextFerryTimes(selectedRoute) {
+async function showNextFerryTimes(fragment) {
     // Shows ferry times, highlighting those within the next hour in America/Toronto timezone
-    const {location, direction} = JSON.parse(selectedRoute);
-    const response = await fetch('data/schedule.json');
-    const data = await response.json();
-    const schedules = data.schedules;
-    const today = createToday().format('YYYY-MM-DD');
     const timesContainer = document.getElementById('ferryTimes');
-    timesContainer.innerHTML = `<p>Ferries within the next hour are highlighted</p>`;
+    if (!fragment) {
+        timesContainer.innerHTML = '';
+        return;
+    }
+    // Fragments are named by their content hash, so the browser may cache them indefinitely
+    const response = await fetch(`data/fragments/${fragment}.html`);
+    timesContainer.innerHTML = `<p>Ferries within the next hour are highlighted</p>` + await response.text();
     timesContainer.classList.add('styledFerryTimes');
-
-    schedules.forEach(schedule => {
-        const startDate = createDate(schedule.start.year, schedule.start.month, schedule.start.day);
-        
-        let endDate = createDate(9999, 12, 31); // Assume indefinitely valid end date
-        if (Object.keys(schedule.end).length !== 0) {
-            endDate = createDate(schedule.end.year, schedule.end.month, schedule.end.day);
-        }
-        
-        if (startDate.isSameOrBefore(today) && endDate.isSameOrAfter(today)) {
-            if (schedule.locations[location] && schedule.locations[location][direction]) {
-                let allTimes = schedule.locations[location][direction];
-                let [remainingTimes, pastTimes] = splitTimes(allTimes);
-
-                let tableHTML = `<table><tr><th>Remaining Schedule for ${location} today:</th></tr>`;
-                if (remainingTimes.length > 0) {
-                    remainingTimes.forEach(time => {
-                        const highlightClass = isWithinNextHour(time) ? 'class="highlight"' : '';
-                        tableHTML += `<tr ${highlightClass}><td>${convertToAmPm(time)}</td></tr>`;
-                    });
-                }
-
-                tableHTML += `<tr><td>END OF THE DAY</td></tr>`;
-
-                pastTimes.forEach(time => {
-                    tableHTML += `<tr><td>${convertToAmPm(time)}</td></tr>`;
-                });
-
-                tableHTML += `</table>`;
-                timesContainer.innerHTML += tableHTML;
-            }
-        }
-    });
+    splitTimes(timesContainer.querySelector('table'), createToday().minutes);
 }
 
-function splitTimes(times) {
-    // Splits times into past and future relative to current time in America/Toronto timezone
-    const now = createToday();
-    let nextTimes = [];
-    let pastTimes = [];
-
-    times.forEach(time => {
-        // Create a moment object for the time entry with today's date in America/Toronto timezone
-        const timeMoment = createDate(now.year(), now.month() + 1, now.date(), time);
-        if (timeMoment.isAfter(now)) {
-            nextTimes.push(time);
-        } else {
-            pastTimes.push(time);
+function splitTimes(table, now) {
+    // Moves departures that have left below END OF THE DAY, keeping their order
+    const end = table.querySelector('tr.end');
+    table.querySelectorAll('tr[data-m]').forEach(row => {
+        const minutes = Number(row.dataset.m);
+        if (minutes <= now) {
+            end.parentNode.appendChild(row);
+        } else if (minutes - now <= 60) {
+            row.classList.add('highlight');
         }
     });
-    return [nextTimes, pastTimes];
-}
-
-function isWithinNextHour(time) {
-    // Checks if a given time is within the next hour in America/Toronto timezone
-    const now = createToday();
-    // Create a moment object for the time entry with today's date in America/Toronto timezone
-    const targetTime = createDate(createToday().year(), createToday().month() + 1, createToday().date(), time);
-
-    return targetTime.diff(now, 'minutes') <= 60 && targetTime.isAfter(now);
-}
-
-
-function convertToAmPm(time) {
-    // Converts time to AM/PM format
-    return moment(time, 'HH:mm').format('hh:mm A');
 }
 
 window.onload = function() {